@@ -3,35 +3,76 @@
 import json
 import os
 import sys
-from typing import List, Dict, Any, Optional
+import time
+from typing import List, Dict, Any, Iterator, Optional, Set, Tuple
 from datetime import datetime
 
+from src.api_transport import ApiRequestError, get_default_transport
+from src.http_fixtures import HttpFixtures
 from src.mediawiki_client import MediaWikiClient
 from src.template_parser import TemplateParser
 from src.report_generator import ReportGenerator
 from src.data_validator import DataValidator
 from src.suggested_articles import SuggestedArticlesCollector
-from src.config import CONTEST_TEMPLATE, CACHE_FILE, OUTPUT_FILE, ALLOWED_CONTEST_COUNTRIES, NEW_USER_EDIT_THRESHOLD, NEW_USER_REFERENCE_DATE
+from src.suggested_index import SuggestedIndex
+from src.wikidata_client import WikidataClient, is_woman, match_labels
+from src.pipeline import PipelineRunner, Stage, StageFailed
+from src.profiling import MemoryProfiler
+from src.metrics import get_metrics
+from src.crawl_checkpoint import CrawlCheckpoint
+from src.config import CONTEST_TEMPLATE, CACHE_FILE, STRUCTURE_PAGES_CACHE_FILE, WIKIDATA_SITELINKS_CACHE_FILE, WIKIDATA_CLAIMS_CACHE_FILE, WIKIDATA_TITLES_CACHE_FILE, CHECKPOINT_FILE, STAGE_CACHE_DIR, RUN_REPORT_FILE, PROMETHEUS_FILE, PROFILE_DIR, MEMORY_PROFILE_FILE, SLOWEST_ARTICLES_COUNT, OUTPUT_FILE, ALLOWED_CONTEST_COUNTRIES, NEW_USER_EDIT_THRESHOLD, NEW_USER_REFERENCE_DATE, FULL_METRICS_SCOPE, STREAM_CHUNK_SIZE, API_RATE_MODE, API_RATE_LIMIT
 
 
 class CEESpringStats:
     """Main class for collecting and processing CEE Spring contest statistics."""
 
-    def __init__(self):
+    def __init__(self, metrics_scope: str = FULL_METRICS_SCOPE, stream_chunk_size: int = 0,
+                 resume: bool = False, prometheus_file: Optional[str] = PROMETHEUS_FILE,
+                 profile_dir: Optional[str] = None, memory_profile_file: Optional[str] = None):
         self.client = MediaWikiClient()
         self.parser = TemplateParser()
         self.reporter = ReportGenerator()
         self.validator = DataValidator()
-        self.suggested_collector = SuggestedArticlesCollector()
+        self.suggested_collector = SuggestedArticlesCollector(cache_file=STRUCTURE_PAGES_CACHE_FILE)
+        self.wikidata_client = WikidataClient(sitelinks_cache_file=WIKIDATA_SITELINKS_CACHE_FILE,
+                                              claims_cache_file=WIKIDATA_CLAIMS_CACHE_FILE,
+                                              titles_cache_file=WIKIDATA_TITLES_CACHE_FILE)
         self.cache_file = CACHE_FILE
         self.output_file = OUTPUT_FILE
-        self.suggested_ids = set()  # Will store all suggested Wikidata IDs
-        self.suggested_by_country = {}  # Will store mapping of Wikidata ID to country
+        self.report_dir = os.path.dirname(OUTPUT_FILE)  # Directory of the other reports
+        self.metrics_scope = metrics_scope  # "all" or "eligible", see FULL_METRICS_SCOPE
+        self.stream_chunk_size = stream_chunk_size  # 0 = fetch all content at once
+        self.resume = resume  # Continue from the checkpoint of an interrupted run
+        self.checkpoint_file = CHECKPOINT_FILE
+        self.stage_cache_dir = STAGE_CACHE_DIR
+        self.checkpoint: Optional[CrawlCheckpoint] = None  # Set up by run()
+        self.metrics = get_metrics()
+        self.run_report_file = RUN_REPORT_FILE
+        self.prometheus_file = prometheus_file
+        self.profile_dir = profile_dir  # If set, stages are profiled and parse times kept
+        self.article_parse_times: List[Tuple[float, str, int]] = []  # (seconds, title, size)
+        self.memory_profile_file = memory_profile_file  # If set, memory use per stage is traced
+        self.memory_profiler: Optional[MemoryProfiler] = None  # Set up by run()
 
     def run(self, use_cache: bool = True, save_cache: bool = True) -> bool:
         """
         Run the complete statistics collection process.
 
+        The process is a graph of stages (see _build_stages). Stages that do
+        not depend on each other, such as the Meta-Wiki suggestion lists and
+        the lvwiki crawl, run concurrently.
+
+        Crawl progress is checkpointed as it goes (article content once per
+        chunk, see _iter_articles_data). If the run is interrupted by a failed
+        API request, running again with resume=True skips the work already
+        recorded; the checkpoint is removed after a successful run.
+
+        Metrics of the run are written to a JSON run report (and optionally a
+        Prometheus text file) whether or not it succeeds. With a profile_dir,
+        every stage that runs is profiled (stages then run one at a time) and
+        the slowest articles to parse are reported. With a memory_profile_file,
+        peak and retained memory of every stage are traced and written to it.
+
         Args:
             use_cache: Whether to use cached data if available
             save_cache: Whether to save data to cache
@@ -42,26 +83,139 @@ class CEESpringStats:
         print(f"Starting CEE Spring {CONTEST_TEMPLATE} statistics collection...")
         print(f"Timestamp: {datetime.now().isoformat()}")
 
-        # Collect suggested articles from Meta-Wiki
+        self.metrics.reset()
+        self.article_parse_times = []
+        self.checkpoint = CrawlCheckpoint(self.checkpoint_file)
+        if not self.resume:
+            self.checkpoint.clear()
+        elif self.checkpoint.load():
+            print(f"Resuming from checkpoint: {self.checkpoint_file}")
+        else:
+            print("No checkpoint found, starting from the beginning.")
+            self.checkpoint.clear()  # an unusable file must not be appended to
+
+        self.memory_profiler = MemoryProfiler() if self.memory_profile_file else None
+        if self.memory_profiler:
+            self.memory_profiler.start()
+
+        runner = PipelineRunner(self._build_stages(use_cache, save_cache), use_cache=use_cache,
+                                cache_dir=self.stage_cache_dir, profile_dir=self.profile_dir,
+                                memory_profiler=self.memory_profiler)
+        try:
+            results = runner.run()
+        except StageFailed as e:
+            print(str(e))
+            self._finish_run(runner, success=False, error=str(e))
+            if self.checkpoint.has_progress:
+                print(f"Progress saved to {self.checkpoint_file}; run again with --resume to continue.")
+            return False
+
+        self._finish_run(runner, success=results['reports'])
+        self.checkpoint.clear()
+        return results['reports']
+
+    def _finish_run(self, runner: PipelineRunner, success: bool, error: Optional[str] = None) -> None:
+        """Print timings and API rates and write the run report."""
+        if self.memory_profiler:
+            self.memory_profiler.stop()
+        runner.print_timings()
+        self.client.transport.print_rates()
+
+        fixtures = self.client.transport.fixtures
+        if fixtures and fixtures.mode == 'record':
+            fixtures.save()
+            print(f"Recorded {len(fixtures.entries)} API responses to: {fixtures.path}")
+        elif fixtures:
+            print(f"Replayed API responses from {fixtures.path} ({fixtures.unused} recorded responses unused)")
+
+        self.metrics.record_stages(runner.timings)
+        if self.memory_profiler:
+            self._report_memory()
+        for host, controller in self.client.transport.controllers().items():
+            self.metrics.set('api_rate', controller.rate, host=host, mode=controller.mode)
+        if self.metrics.write_json(self.run_report_file, success=success, error=error):
+            print(f"Run report saved to: {self.run_report_file}")
+        if self.prometheus_file and self.metrics.write_prometheus(self.prometheus_file):
+            print(f"Prometheus metrics saved to: {self.prometheus_file}")
+        if self.profile_dir:
+            self._report_slowest_articles()
+            print(f"Stage profiles (.pstats, .collapsed) saved to: {self.profile_dir}")
+
+    def _report_memory(self) -> None:
+        """Print and save the memory profile, and add it to the run metrics."""
+        for stage, record in self.memory_profiler.records.items():
+            self.metrics.set('stage_peak_bytes', record['peak_bytes'], stage=stage)
+            self.metrics.set('stage_retained_bytes', record['retained_bytes'], stage=stage)
+        print("\nMemory per stage:")
+        print(self.memory_profiler.report(), end='')
+        try:
+            self.memory_profiler.write_json(self.memory_profile_file)
+            print(f"Memory profile saved to: {self.memory_profile_file}")
+        except OSError as e:
+            print(f"Error saving memory profile: {e}")
+
+    def _report_slowest_articles(self) -> None:
+        """Print and save the articles that took longest to parse."""
+        if not self.article_parse_times:
+            print("No articles were parsed in this run (loaded from cache?).")
+            return
+
+        slowest = sorted(self.article_parse_times, reverse=True)[:SLOWEST_ARTICLES_COUNT]
+        lines = [f"{'Seconds':>9}  {'Bytes':>9}  Article"]
+        lines.extend(f"{seconds:9.4f}  {size:9,}  {title}" for seconds, title, size in slowest)
+        report = "\n".join(lines) + "\n"
+
+        print(f"\nSlowest {len(slowest)} articles by parse time:")
+        print(report, end='')
+        self.reporter.save_report(report, os.path.join(self.profile_dir, "slowest_articles.txt"))
+
+    def _build_stages(self, use_cache: bool, save_cache: bool) -> List[Stage]:
+        """Describe the pipeline as stages with their inputs."""
+        return [
+            Stage('suggested', self._stage_suggested, output_type=SuggestedIndex),
+            Stage('coverage', self._stage_coverage, inputs=['suggested'], output_type=dict),
+            Stage('articles', lambda: self._stage_articles(use_cache, save_cache), output_type=list),
+            Stage('participants', self._stage_participants, inputs=['articles'], output_type=list),
+            Stage('edit_counts', self._stage_edit_counts, inputs=['participants'],
+                  output_type=dict, cacheable=True),
+            Stage('wikidata_ids', self._stage_wikidata_ids, inputs=['articles', 'coverage'], output_type=dict),
+            Stage('claims', self._stage_claims, inputs=['articles', 'wikidata_ids'], output_type=dict),
+            Stage('enriched', self._stage_enrich,
+                  inputs=['articles', 'suggested', 'edit_counts', 'claims', 'wikidata_ids'], output_type=list),
+            Stage('validated', self._stage_validate, inputs=['enriched'], output_type=tuple, cacheable=True),
+            Stage('reports', self._stage_reports, inputs=['validated', 'suggested', 'coverage'], output_type=bool),
+        ]
+
+    def _stage_suggested(self) -> SuggestedIndex:
+        """Collect suggested articles from Meta-Wiki."""
         print("Collecting suggested articles from Meta-Wiki...")
         suggested_by_country = self.suggested_collector.collect_all_suggested_wikidata_ids()
 
-        # Build reverse mapping from Wikidata ID to countries (one ID may appear in multiple lists)
-        self.suggested_by_country = {}
-        self.suggested_ids = set()
-        for country, wikidata_ids in suggested_by_country.items():
-            for wikidata_id in wikidata_ids:
-                self.suggested_by_country.setdefault(wikidata_id, []).append(country)
-                self.suggested_ids.add(wikidata_id)
-
-        print(f"Found {len(self.suggested_ids)} suggested Wikidata IDs from Meta-Wiki")
+        # One ID may appear in the lists of several countries
+        suggested = SuggestedIndex.from_countries(suggested_by_country)
+        print(f"Found {len(suggested)} suggested Wikidata IDs from Meta-Wiki")
+        return suggested
 
+    def _stage_coverage(self, suggested: SuggestedIndex) -> Dict[str, Dict[str, Any]]:
+        """Look up which suggested items already have an article on lv.wikipedia.org."""
+        print("Checking suggested items on Wikidata...")
+        try:
+            return self.wikidata_client.resolve_sitelinks((f"Q{number}" for number in suggested.ids))
+        except ApiRequestError as e:
+            # The coverage report is optional; the contest statistics do not depend on it
+            print(f"Could not check suggested items on Wikidata, skipping the coverage report: {e}")
+            return {}
+
+    def _stage_articles(self, use_cache: bool, save_cache: bool) -> List[Dict[str, Any]]:
+        """Load articles from the cache file or crawl them from Wikipedia."""
         # Try to load from cache first
         articles_data = []
         if use_cache and os.path.exists(self.cache_file):
             articles_data = self._load_cache()
             if articles_data:
                 print(f"Loaded {len(articles_data)} articles from cache.")
+        if use_cache:
+            self.metrics.cache_lookup('articles', bool(articles_data))
 
         # If no cached data, collect from Wikipedia
         if not articles_data:
@@ -69,33 +223,104 @@ class CEESpringStats:
             articles_data = self._collect_articles_data()
 
             if not articles_data:
-                print("No articles found with the specified template.")
-                return False
+                raise StageFailed("No articles found with the specified template.")
 
             # Save to cache
             if save_cache:
                 self._save_cache(articles_data)
                 print(f"Saved {len(articles_data)} articles to cache.")
 
-        # Fetch edit counts as of contest start date and tag new users
+        return articles_data
+
+    @staticmethod
+    def _stage_participants(articles: List[Dict[str, Any]]) -> List[str]:
+        """List the unique participants, sorted so the list fingerprints stably."""
+        return sorted({a['participant'] for a in articles if a.get('participant')})
+
+    def _stage_edit_counts(self, participants: List[str]) -> Dict[str, int]:
+        """Fetch edit counts as of the contest start date."""
         print(f"Fetching user edit counts before {NEW_USER_REFERENCE_DATE}...")
-        unique_participants = list({
-            a['participant'] for a in articles_data if a.get('participant')
-        })
-        edit_counts = self.client.get_user_edit_counts_before_date(
-            unique_participants, NEW_USER_REFERENCE_DATE
+        return self.client.get_user_edit_counts_before_date(
+            participants, NEW_USER_REFERENCE_DATE, checkpoint=self.checkpoint
         )
-        for article in articles_data:
-            p = article.get('participant', '')
-            count = edit_counts.get(p, -1)
+
+    def _stage_wikidata_ids(self, articles: List[Dict[str, Any]],
+                            coverage: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, str]]:
+        """
+        Find the Wikidata items of articles whose page props do not name one yet.
+
+        Returns:
+            {title: {'id': qid, 'source': 'sitelink' or 'label'}}; items found
+            by label are only guesses (see match_labels)
+        """
+        unlinked = [article['title'] for article in articles if not article.get('wikidata_id')]
+        try:
+            linked = self.wikidata_client.resolve_titles(unlinked)
+        except ApiRequestError as e:
+            print(f"Could not look up unlinked articles on Wikidata: {e}")
+            linked = {}
+        found = {title: {'id': qid, 'source': 'sitelink'} for title, qid in linked.items()}
+        # Articles about suggested items that are not linked on Wikidata at all
+        for title, qid in match_labels((title for title in unlinked if title not in linked), coverage).items():
+            found[title] = {'id': qid, 'source': 'label'}
+        return found
+
+    def _stage_claims(self, articles: List[Dict[str, Any]],
+                      wikidata_ids: Dict[str, Dict[str, str]]) -> Dict[str, Dict[str, Any]]:
+        """Look up what the articles' Wikidata items are about."""
+        print("Classifying articles by their Wikidata items...")
+        linked = {title: found['id'] for title, found in wikidata_ids.items() if found['source'] == 'sitelink'}
+        qids = [article.get('wikidata_id') or linked.get(article['title']) for article in articles]
+        try:
+            return self.wikidata_client.resolve_claims(qid for qid in qids if qid)
+        except ApiRequestError as e:
+            # Only the cross-check in the validation report depends on the claims
+            print(f"Could not fetch Wikidata claims, skipping the classification: {e}")
+            return {}
+
+    def _stage_enrich(self, articles: List[Dict[str, Any]], suggested: SuggestedIndex,
+                      edit_counts: Dict[str, int], claims: Dict[str, Dict[str, Any]],
+                      wikidata_ids: Dict[str, Dict[str, str]]) -> List[Dict[str, Any]]:
+        """Fill in Wikidata IDs found by title, mark suggested articles and women's biographies, tag new users."""
+        enriched = []
+        for article in articles:
+            article = dict(article)
+            found = None if article.get('wikidata_id') else wikidata_ids.get(article['title'])
+            if found:
+                # Label matches are kept apart: they are shown to the jury, not counted
+                article['wikidata_id_source'] = found['source']
+                article['label_match' if found['source'] == 'label' else 'wikidata_id'] = found['id']
+            enriched.append(article)
+
+        positions = suggested.positions(article.get('wikidata_id') for article in enriched)
+        label_positions = suggested.positions(article.get('label_match') for article in enriched)
+        for article, position, label_position in zip(enriched, positions, label_positions):
+            article['from_suggested_list'] = position >= 0
+            article['suggested_countries'] = suggested.countries_at(position)
+            if 'label_match' in article:
+                article['label_match_countries'] = suggested.countries_at(label_position)
+            article['is_woman_biography'] = is_woman(claims.get(article.get('wikidata_id')))
+            count = edit_counts.get(article.get('participant', ''), -1)
             article['edit_count'] = count
             article['is_new_user'] = (count != -1 and count < NEW_USER_EDIT_THRESHOLD)
+
         new_user_names = [p for p, c in edit_counts.items() if c != -1 and c < NEW_USER_EDIT_THRESHOLD]
         print(f"New users (< {NEW_USER_EDIT_THRESHOLD} edits): {new_user_names if new_user_names else 'none'}")
+        return enriched
 
-        # Validate and clean data
+    def _stage_validate(self, enriched: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[str], List[str]]:
+        """Validate and clean data."""
         print("Validating data...")
-        articles_data, errors, warnings = self.validator.validate_articles_data(articles_data)
+        articles_data, errors, warnings = self.validator.validate_articles_data(enriched)
+        return articles_data, list(errors), list(warnings)
+
+    def _stage_reports(self, validated: Tuple[List[Dict[str, Any]], List[str], List[str]],
+                       suggested: SuggestedIndex, coverage: Dict[str, Dict[str, Any]]) -> bool:
+        """Report validation results and generate all reports."""
+        articles_data, errors, warnings = validated
+        # The validation report reads the validator state, which a cached stage did not set
+        self.validator.validation_errors = list(errors)
+        self.validator.warnings = list(warnings)
 
         if errors:
             print("Validation errors found:")
@@ -112,14 +337,16 @@ class CEESpringStats:
 
         # Generate reports
         print("Generating reports...")
-        success = self._generate_reports(articles_data)
+        success = self._generate_reports(articles_data, coverage, suggested.by_country())
 
         if success:
             print("Reports generated successfully!")
             print(f"Main report saved to: {self.output_file}")
-            print("Participant report saved to: output/participant_report.txt")
-            print("Contest categories saved to: output/contest_categories.txt")
-            print("Validation report saved to: output/validation_report.txt")
+            print(f"Participant report saved to: {os.path.join(self.report_dir, 'participant_report.txt')}")
+            print(f"Contest categories saved to: {os.path.join(self.report_dir, 'contest_categories.txt')}")
+            print(f"Validation report saved to: {os.path.join(self.report_dir, 'validation_report.txt')}")
+            if coverage:
+                print(f"Suggested coverage saved to: {os.path.join(self.report_dir, 'suggested_coverage.txt')}")
         else:
             print("Failed to generate reports.")
 
@@ -129,7 +356,7 @@ class CEESpringStats:
         """Collect data for all articles with the CEE Spring template."""
         # Find all articles with the template
         print(f"Searching for articles with template: {CONTEST_TEMPLATE}")
-        article_titles = self.client.find_articles_with_template(CONTEST_TEMPLATE)
+        article_titles = self.client.find_articles_with_template(CONTEST_TEMPLATE, checkpoint=self.checkpoint)
 
         if not article_titles:
             print("No articles found with the specified template.")
@@ -138,95 +365,177 @@ class CEESpringStats:
         print(f"Found {len(article_titles)} articles with the template.")
 
         # Get page info for all articles
-        print("Fetching page information...")
-        page_info = self.client.get_page_info(article_titles)
+        page_info = self.checkpoint.get('page_info') if self.checkpoint else None
+        if page_info is None:
+            print("Fetching page information...")
+            page_info = self.client.get_page_info(article_titles)
+            if self.checkpoint:
+                self.checkpoint.update(page_info=page_info)
 
-        # Batch-fetch talk page and article content
-        print("Fetching talk page content...")
-        talk_contents = self.client.get_pages_content(article_titles, namespace=1)
-        print("Fetching article content...")
-        article_contents = self.client.get_pages_content(article_titles, namespace=0)
+        articles_data = list(self._iter_articles_data(article_titles, page_info))
 
-        # Process each article
-        articles_data = []
-        total_articles = len(article_titles)
+        print(f"Successfully processed {len(articles_data)} articles.")
+        return articles_data
 
-        for i, title in enumerate(article_titles, 1):
+    def _iter_articles_data(self, article_titles: List[str],
+                            page_info: Dict[str, Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Yield processed article data chunk by chunk.
+
+        In streaming mode each chunk of stream_chunk_size titles goes through
+        fetch, parse and enrich before the next one is fetched, so raw
+        wikitext is only held for one chunk at a time. Otherwise all titles
+        form a single chunk. With a checkpoint each finished chunk is saved,
+        so a resumed crawl starts after the last one: a streamed crawl loses
+        at most one chunk of work, an unstreamed one the whole content fetch.
+        """
+        total_articles = len(article_titles)
+        if not total_articles:
+            return
+        chunk_size = self.stream_chunk_size or total_articles
+
+        start = 0
+        if self.checkpoint:
+            start = self.checkpoint.get('crawled_titles', 0)
+            if start:
+                print(f"Resuming crawl after {start}/{total_articles} articles")
+                yield from self.checkpoint.get('crawled_articles', [])
+
+        for start in range(start, total_articles, chunk_size):
+            chunk = article_titles[start:start + chunk_size]
+            chunk_articles = list(self._process_chunk(chunk, page_info, start, total_articles))
+            yield from chunk_articles
+            if self.checkpoint:
+                self.checkpoint.record(values={'crawled_titles': start + len(chunk)},
+                                       extend={'crawled_articles': chunk_articles})
+
+    def _process_chunk(self, titles: List[str], page_info: Dict[str, Dict[str, Any]],
+                       offset: int, total_articles: int) -> Iterator[Dict[str, Any]]:
+        """Fetch, parse and enrich one chunk of articles, yielding article data dicts."""
+        # Batch-fetch talk pages and parse their templates first
+        print(f"Fetching talk page content ({len(titles)} pages)...")
+        talk_contents = self.client.get_pages_content(titles, namespace=1)
+        if self.memory_profiler:
+            self.memory_profiler.mark('talk_content')
+        templates = {}
+        unparsed = set()
+        for title in titles:
+            talk_content = talk_contents.get(title)
+            if talk_content:
+                template_data = self.parser.parse_cee_spring_template(talk_content)
+                if template_data:
+                    templates[title] = template_data
+                else:
+                    unparsed.add(title)
+        del talk_contents
+
+        # Article wikitext is the heaviest payload: only fetch it where it is used
+        metric_titles = [
+            title for title in titles
+            if title in templates and self._needs_full_metrics(templates[title])
+        ]
+        metric_set = set(metric_titles)
+        print(f"Fetching article content for {len(metric_titles)} of {len(titles)} articles...")
+        article_sizes = {t: page_info.get(t, {}).get('size', 0) for t in metric_titles}
+        article_contents = self.client.get_pages_content(metric_titles, namespace=0, sizes=article_sizes)
+        if self.memory_profiler:
+            self.memory_profiler.mark('article_content')
+
+        # Process each article, releasing its wikitext as soon as it is reduced
+        for i, title in enumerate(titles, offset + 1):
             print(f"Processing article {i}/{total_articles}: {title}")
 
             try:
-                article_data = self._process_single_article(
-                    title,
-                    page_info.get(title, {}),
-                    talk_contents.get(title),
-                    article_contents.get(title),
-                )
+                if title in unparsed:
+                    print(f"  Warning: Could not parse the CEE Spring template on the talk page of {title}")
+                    article_data = None
+                elif title not in templates:
+                    print(f"  Warning: No talk page found for {title}")
+                    article_data = None
+                else:
+                    started = time.perf_counter()
+                    article_data = self._process_single_article(
+                        title,
+                        page_info.get(title, {}),
+                        article_content=article_contents.pop(title, None),
+                        template_data=templates[title],
+                        expect_content=title in metric_set,
+                    )
+                    if self.profile_dir:
+                        self.article_parse_times.append(
+                            (time.perf_counter() - started, title, page_info.get(title, {}).get('size', 0))
+                        )
                 if article_data:
-                    articles_data.append(article_data)
                     print(f"  ✓ Processed: {article_data['participant']} - {len(article_data['topics'])} topics")
+                    yield article_data
                 else:
                     print("  ✗ Failed to process article")
             except Exception as e:
                 print(f"  ✗ Error processing {title}: {e}")
                 continue
 
-        print(f"Successfully processed {len(articles_data)} articles.")
-        return articles_data
-
-    def _process_single_article(self, title: str, page_info: Dict[str, Any], talk_content: Optional[str] = None, article_content: Optional[str] = None) -> Optional[Dict[str, Any]]:
-        """Process a single article and extract all relevant data."""
-        if talk_content is None:
-            talk_content = self.client.get_page_content(title, namespace=1)
-        if not talk_content:
-            print(f"  Warning: No talk page found for {title}")
+    def _needs_full_metrics(self, template_data: Dict[str, Any]) -> bool:
+        """Check whether an article's wikitext must be fetched for its readable length."""
+        if self.metrics_scope == "eligible":
+            valid_countries, _ = self._split_countries(template_data.get('countries', []))
+            return bool(valid_countries)
+        return True
+
+    @staticmethod
+    def _split_countries(countries: List[str]) -> Tuple[List[str], List[str]]:
+        """Split country names into allowed contest countries and the rest."""
+        valid_countries = []
+        invalid_countries = []
+        for country in countries:
+            country = country.strip()
+            if country:
+                if country in ALLOWED_CONTEST_COUNTRIES:
+                    valid_countries.append(country)
+                else:
+                    invalid_countries.append(country)
+        return valid_countries, invalid_countries
+
+    def _process_single_article(self, title: str, page_info: Dict[str, Any], talk_content: Optional[str] = None,
+                                article_content: Optional[str] = None, template_data: Optional[Dict[str, Any]] = None,
+                                expect_content: bool = True) -> Optional[Dict[str, Any]]:
+        """Process a single article and extract all relevant data.
+
+        Content is expected to be fetched in batches beforehand; a missing talk
+        page or article is not refetched here one title at a time. Pass
+        template_data when the talk page has already been parsed, and
+        expect_content=False when the article text was deliberately not fetched.
+        """
+        if template_data is None:
+            if not talk_content:
+                print(f"  Warning: No talk page found for {title}")
+                return None
+            template_data = self.parser.parse_cee_spring_template(talk_content)
+        if not template_data:
+            print(f"  Warning: Could not parse the CEE Spring template on the talk page of {title}")
             return None
 
-        if article_content is None:
-            article_content = self.client.get_page_content(title, namespace=0)
         if not article_content:
-            print(f"  Warning: No article content found for {title}")
+            if expect_content:
+                print(f"  Warning: No article content found for {title}")
             article_content = ""
 
         # Extract article data
-        article_data = self.parser.extract_article_data(
-            title, talk_content, article_content, page_info
+        article_data = self.parser.build_article_data(
+            title, template_data, article_content, page_info
         )
 
-        # Check if this article is from suggested list and get countries
-        if article_data and 'wikidata_id' in article_data:
-            wikidata_id = article_data['wikidata_id']
-            if wikidata_id in self.suggested_ids:
-                article_data['from_suggested_list'] = True
-                article_data['suggested_countries'] = self.suggested_by_country.get(wikidata_id, [])
-            else:
-                article_data['from_suggested_list'] = False
-                article_data['suggested_countries'] = []
-        else:
-            article_data['from_suggested_list'] = False
-            article_data['suggested_countries'] = []
-
         # Add country validation information
-        if article_data:
-            countries = article_data.get('countries', [])
-            valid_countries = []
-            invalid_countries = []
-
-            for country in countries:
-                country = country.strip()
-                if country:
-                    if country in ALLOWED_CONTEST_COUNTRIES:
-                        valid_countries.append(country)
-                    else:
-                        invalid_countries.append(country)
-
-            article_data['valid_countries'] = valid_countries
-            article_data['invalid_countries'] = invalid_countries
-            article_data['has_valid_country'] = len(valid_countries) > 0
-            article_data['eligible_for_contest'] = len(valid_countries) > 0
+        valid_countries, invalid_countries = self._split_countries(article_data.get('countries', []))
+        article_data['valid_countries'] = valid_countries
+        article_data['invalid_countries'] = invalid_countries
+        article_data['has_valid_country'] = len(valid_countries) > 0
+        article_data['eligible_for_contest'] = len(valid_countries) > 0
 
         return article_data
 
-    def _generate_reports(self, articles_data: List[Dict[str, Any]]) -> bool:
+    def _generate_reports(self, articles_data: List[Dict[str, Any]],
+                          coverage: Optional[Dict[str, Dict[str, Any]]] = None,
+                          suggested_by_country: Optional[Dict[str, Set[str]]] = None) -> bool:
         """Generate all reports from the collected data."""
         try:
             # Generate main wikitext table
@@ -235,17 +544,26 @@ class CEESpringStats:
 
             # Generate participant report
             participant_report = self.reporter.generate_participant_report(articles_data)
-            success2 = self.reporter.save_report(participant_report, "output/participant_report.txt")
+            success2 = self.reporter.save_report(participant_report, os.path.join(self.report_dir, "participant_report.txt"))
 
             # Generate contest categories report
             categories_report = self.reporter.generate_contest_categories_report(articles_data)
-            success3 = self.reporter.save_report(categories_report, "output/contest_categories.txt")
+            success3 = self.reporter.save_report(categories_report, os.path.join(self.report_dir, "contest_categories.txt"))
 
-            # Generate validation report
+            # Generate validation report, with the notes for the jury
             validation_report = self.validator.get_validation_report()
-            success4 = self.reporter.save_report(validation_report, "output/validation_report.txt")
+            review_report = self.reporter.generate_review_report(articles_data)
+            if review_report:
+                validation_report += "\n\n" + review_report
+            success4 = self.reporter.save_report(validation_report, os.path.join(self.report_dir, "validation_report.txt"))
 
-            return success1 and success2 and success3 and success4
+            # Generate suggested coverage report (skipped if Wikidata could not be checked)
+            success5 = True
+            if coverage and suggested_by_country:
+                coverage_report = self.reporter.generate_suggested_coverage_report(suggested_by_country, coverage)
+                success5 = self.reporter.save_report(coverage_report, os.path.join(self.report_dir, "suggested_coverage.txt"))
+
+            return success1 and success2 and success3 and success4 and success5
 
         except Exception as e:
             print(f"Error generating reports: {e}")
@@ -339,10 +657,42 @@ def main():
     parser.add_argument('--no-cache', action='store_true', help='Do not use cached data')
     parser.add_argument('--no-save-cache', action='store_true', help='Do not save data to cache')
     parser.add_argument('--summary-only', action='store_true', help='Only print summary from cached data')
+    parser.add_argument('--metrics-scope', choices=['all', 'eligible'], default=FULL_METRICS_SCOPE,
+                        help='Articles whose wikitext is fetched for readable length (default: %(default)s)')
+    parser.add_argument('--stream', action='store_true',
+                        help=f'Process articles in chunks of {STREAM_CHUNK_SIZE} to bound peak memory')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue an interrupted crawl from its checkpoint')
+    parser.add_argument('--prometheus-file', default=PROMETHEUS_FILE,
+                        help='Also write run metrics in Prometheus text format to this file')
+    parser.add_argument('--profile', action='store_true',
+                        help=f'Profile every stage into {PROFILE_DIR} and list the slowest articles to parse')
+    parser.add_argument('--memory-profile', action='store_true',
+                        help=f'Trace peak and retained memory per stage into {MEMORY_PROFILE_FILE}')
+    fixture_group = parser.add_mutually_exclusive_group()
+    fixture_group.add_argument('--record', metavar='FILE',
+                               help='Record all API responses to a compressed fixture file')
+    fixture_group.add_argument('--replay', metavar='FILE',
+                               help='Serve API responses from a recorded fixture file, without network access')
+    parser.add_argument('--rate-mode', choices=['adaptive', 'fixed'], default=API_RATE_MODE,
+                        help='Tune the API request rate from server responses, or keep it fixed '
+                             f'at {API_RATE_LIMIT} req/s (default: %(default)s)')
 
     args = parser.parse_args()
-
-    stats_collector = CEESpringStats()
+    get_default_transport().set_rate_mode(args.rate_mode)
+    if args.record:
+        get_default_transport().set_fixtures(HttpFixtures(args.record, 'record'))
+    elif args.replay:
+        get_default_transport().set_fixtures(HttpFixtures(args.replay, 'replay'))
+
+    stats_collector = CEESpringStats(
+        metrics_scope=args.metrics_scope,
+        stream_chunk_size=STREAM_CHUNK_SIZE if args.stream else 0,
+        resume=args.resume,
+        prometheus_file=args.prometheus_file,
+        profile_dir=PROFILE_DIR if args.profile else None,
+        memory_profile_file=MEMORY_PROFILE_FILE if args.memory_profile else None,
+    )
 
     if args.summary_only:
         # Load from cache and print summary
@@ -4,16 +4,18 @@
 Usage:
     uv run python post_stats.py              # post stats and contest categories
     uv run python post_stats.py --dry-run    # print what would be posted without editing
+    uv run python post_stats.py --force      # post even if nothing changed since last run
 """
 
 import argparse
+import json
 import os
 import re
 import sys
 from dotenv import load_dotenv
 
 from src.config import OUTPUT_FILE
-from src.wikipedia_poster import WikipediaPoster
+from src.wikipedia_poster import WikipediaPoster, content_hash
 
 load_dotenv()
 
@@ -24,6 +26,26 @@ BEGIN_MARKER = os.environ.get("WIKI_BEGIN_MARKER", "<!-- BEGIN -->")
 END_MARKER = os.environ.get("WIKI_END_MARKER", "<!-- END -->")
 EDIT_SUMMARY_STATS = "Automātisks CEE Spring 2026 statistikas atjauninājums"
 EDIT_SUMMARY_RESULTS = "Automātisks CEE Spring 2026 rezultātu atjauninājums"
+POSTED_HASHES_FILE = "cache/posted_hashes.json"
+
+
+def load_posted_hashes(path: str = POSTED_HASHES_FILE) -> dict:
+    """Load the page title -> content hash record of the last successful post."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_posted_hashes(hashes: dict, path: str = POSTED_HASHES_FILE) -> None:
+    """Save the page title -> content hash record after a successful post."""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(hashes, f, ensure_ascii=False, indent=2)
+    except OSError as exc:
+        print(f"Could not save posted hashes: {exc}")
 
 
 def main() -> int:
@@ -44,6 +66,11 @@ def main() -> int:
         default=CATEGORIES_FILE,
         help=f"Path to contest categories file (default: {CATEGORIES_FILE})",
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Post even if the content matches the last successful post",
+    )
     args = parser.parse_args()
 
     # Read the generated stats
@@ -83,6 +110,15 @@ def main() -> int:
         print(new_categories[:500] + ("..." if len(new_categories) > 500 else ""))
         return 0
 
+    new_hashes = {
+        STATS_PAGE: content_hash(new_stats),
+        RESULTS_PAGE: content_hash(new_categories),
+    }
+    posted_hashes = load_posted_hashes()
+    if not args.force and all(posted_hashes.get(t) == h for t, h in new_hashes.items()):
+        print("No change since last post — skipping login and edits")
+        return 0
+
     # Check credentials
     username = os.environ.get("WIKI_USERNAME")
     password = os.environ.get("WIKI_PASSWORD")
@@ -96,7 +132,7 @@ def main() -> int:
 
     poster = WikipediaPoster()
 
-    if not poster.login(username, password):
+    if not poster.login(username, password, prefetch_titles=[STATS_PAGE, RESULTS_PAGE]):
         return 1
 
     success_stats = poster.update_between_markers(
@@ -115,6 +151,12 @@ def main() -> int:
         summary=EDIT_SUMMARY_RESULTS,
     )
 
+    if success_stats:
+        posted_hashes[STATS_PAGE] = new_hashes[STATS_PAGE]
+    if success_results:
+        posted_hashes[RESULTS_PAGE] = new_hashes[RESULTS_PAGE]
+    save_posted_hashes(posted_hashes)
+
     return 0 if (success_stats and success_results) else 1
 
 
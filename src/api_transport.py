@@ -0,0 +1,277 @@
+"""Shared HTTP transport for the MediaWiki API clients."""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .http_fixtures import HttpFixtures
+from .metrics import get_metrics
+from .rate_control import AdaptiveRateController, FixedRateController
+from .config import (
+    USER_AGENT, API_RATE_LIMIT, API_RATE_MODE, API_RATE_FLOOR, API_RATE_CEILING, API_LATENCY_TARGET, API_CONNECT_TIMEOUT, API_READ_TIMEOUT,
+    API_POOL_CONNECTIONS, API_POOL_MAXSIZE, API_MAX_GET_URL_LENGTH,
+    API_MAX_RETRIES, API_RETRY_BASE_DELAY, API_RETRY_MAX_DELAY, API_MAXLAG,
+)
+
+# HTTP statuses that signal a temporary condition worth retrying
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class ApiRequestError(Exception):
+    """Raised when an API request fails and partial results must not be used."""
+
+
+class ApiTransport:
+    """Pooled, rate-limited HTTP transport shared by all API clients.
+
+    Keeps one keep-alive connection pool per host, negotiates gzip, applies
+    connect/read timeouts and switches long GET requests to POST. The
+    request rate of each host is set by a rate controller: adaptive (AIMD)
+    by default, or fixed at rate_limit. Every API
+    request made by the tool goes through request(), which makes it the single
+    place for rate limiting, retries and similar cross-cutting concerns.
+    """
+
+    def __init__(self, rate_limit: float = API_RATE_LIMIT, max_retries: int = API_MAX_RETRIES,
+                 maxlag: Optional[int] = API_MAXLAG, rate_mode: str = API_RATE_MODE):
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept-Encoding': 'gzip',
+        })
+        adapter = HTTPAdapter(pool_connections=API_POOL_CONNECTIONS, pool_maxsize=API_POOL_MAXSIZE)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.rate_limit = rate_limit
+        self.rate_mode = rate_mode
+        self._controllers: Dict[str, Union[FixedRateController, AdaptiveRateController]] = {}
+        self.timeout = (API_CONNECT_TIMEOUT, API_READ_TIMEOUT)
+        self.max_retries = max_retries
+        self.maxlag = maxlag
+        # Record responses to, or serve them from, a fixture file (see set_fixtures)
+        self.fixtures: Optional[HttpFixtures] = None
+        self._last_request_time: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def set_fixtures(self, fixtures: Optional[HttpFixtures]) -> None:
+        """Record all responses into fixtures, or replay them from it without network access."""
+        self.fixtures = fixtures
+
+    def set_rate_mode(self, rate_mode: str) -> None:
+        """Switch between 'adaptive' and 'fixed' rate control for all hosts."""
+        if rate_mode not in ('adaptive', 'fixed'):
+            raise ValueError(f"Unknown rate mode: {rate_mode}")
+        with self._lock:
+            self.rate_mode = rate_mode
+            self._controllers.clear()
+
+    def controller(self, host: str) -> Union[FixedRateController, AdaptiveRateController]:
+        """Return the rate controller of a host, creating it on first use."""
+        with self._lock:
+            if host not in self._controllers:
+                if self.rate_mode == 'fixed':
+                    self._controllers[host] = FixedRateController(self.rate_limit)
+                else:
+                    self._controllers[host] = AdaptiveRateController(
+                        self.rate_limit, API_RATE_FLOOR, API_RATE_CEILING, API_LATENCY_TARGET
+                    )
+            return self._controllers[host]
+
+    def controllers(self) -> Dict[str, Union[FixedRateController, AdaptiveRateController]]:
+        """Return the rate controllers of all hosts used so far."""
+        with self._lock:
+            return dict(self._controllers)
+
+    def print_rates(self) -> None:
+        """Print the current request rate of every host used so far."""
+        for host, controller in sorted(self.controllers().items()):
+            print(f"API rate {host}: {controller.describe()}")
+
+    def _rate_limit(self, host: str) -> None:
+        """Enforce the minimum interval between requests to the same host."""
+        min_interval = 1.0 / self.controller(host).rate
+        with self._lock:
+            last = self._last_request_time.get(host, 0)
+            wait = last + min_interval - time.time()
+            # Reserve the slot before sleeping so concurrent callers queue up behind it
+            self._last_request_time[host] = max(time.time(), last + min_interval)
+        if wait > 0:
+            get_metrics().inc('api_rate_limit_sleep_seconds_total', wait, host=host)
+            time.sleep(wait)
+
+    def _needs_post(self, url: str, params: Dict[str, Any]) -> bool:
+        """Check whether a GET request with these parameters would have a too long URL."""
+        prepared = requests.Request('GET', url, params=params).prepare()
+        return len(prepared.url) > API_MAX_GET_URL_LENGTH
+
+    @staticmethod
+    def _retry_after(response: requests.Response) -> Optional[float]:
+        """Return the wait in seconds requested by a Retry-After header, if any."""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def wire_bytes(response: requests.Response, decoded: int) -> int:
+        """
+        Return the bytes of a read response body as sent over the wire.
+
+        With gzip the decoded body is several times larger than what was
+        transferred, so this asks urllib3 how much it read from the socket,
+        falling back to Content-Length and then to the decoded size.
+        """
+        tell = getattr(response.raw, 'tell', None)
+        read = tell() if callable(tell) else None
+        if isinstance(read, int) and read > 0:
+            return read
+        length = response.headers.get('Content-Length')
+        if isinstance(length, str) and length.isdigit():
+            return int(length)
+        return decoded
+
+    @staticmethod
+    def _backoff(attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before retry number attempt: exponential with full jitter, at least retry_after."""
+        delay = random.uniform(0, min(API_RETRY_MAX_DELAY, API_RETRY_BASE_DELAY * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, API_RETRY_MAX_DELAY))
+        return delay
+
+    def request(self, url: str, params: Optional[Dict[str, Any]] = None,
+                data: Optional[Dict[str, Any]] = None, timeout: Optional[Any] = None,
+                stream: bool = False) -> requests.Response:
+        """
+        Send a request to an API endpoint, retrying temporary failures.
+
+        Requests with form data are POSTed. Parameter-only requests are sent as
+        GET unless the URL would get too long (e.g. many pipe-joined titles),
+        in which case the parameters are POSTed as form data instead.
+
+        Every request carries maxlag. Connection errors, timeouts, HTTP 429/5xx
+        and maxlag errors are retried with exponential backoff and jitter,
+        waiting at least as long as the server's Retry-After, until
+        max_retries is used up.
+
+        In replay mode (see set_fixtures) the recorded response is returned
+        instead, without rate limiting or network access.
+
+        Args:
+            url: API endpoint URL
+            params: Query parameters
+            data: Form data (forces POST)
+            timeout: Override for the (connect, read) timeout
+            stream: Do not read the response body up front
+
+        Returns:
+            The HTTP response (status already checked)
+
+        Raises:
+            requests.RequestException: On errors that are not temporary, or
+                once the retry budget is used up
+        """
+        if data is None and params is not None and self._needs_post(url, params):
+            data, params = params, None
+        if self.maxlag is not None:
+            if data is not None:
+                data = {'maxlag': self.maxlag, **data}
+            else:
+                params = {'maxlag': self.maxlag, **(params or {})}
+
+        host = urlsplit(url).netloc
+        controller = self.controller(host)
+        metrics = get_metrics()
+        fields = data if data is not None else (params or {})
+        endpoint = {
+            'host': host,
+            'action': fields.get('action', ''),
+            'module': fields.get('prop') or fields.get('list') or fields.get('meta') or '',
+        }
+        if self.fixtures:
+            all_fields = {**(params or {}), **(data or {})}
+            if self.fixtures.mode == 'replay':
+                metrics.inc('api_requests_total', **endpoint)
+                response = self.fixtures.replay(url, all_fields)
+                response.raise_for_status()
+                return response
+
+        attempt = 0
+        while True:
+            self._rate_limit(host)
+            retry_after = None
+            started = time.perf_counter()
+            metrics.inc('api_requests_total', **endpoint)
+            try:
+                if data is not None:
+                    response = self.session.post(url, params=params, data=data,
+                                                 timeout=timeout or self.timeout, stream=stream)
+                else:
+                    response = self.session.get(url, params=params,
+                                                timeout=timeout or self.timeout, stream=stream)
+
+                # MediaWiki reports maxlag as an API error on a 200 response
+                maxlagged = response.headers.get('MediaWiki-API-Error') == 'maxlag'
+                if maxlagged or response.status_code in RETRY_STATUSES:
+                    lagged = maxlagged or response.status_code in (429, 503)
+                    controller.record(time.perf_counter() - started, 'lagged' if lagged else 'error')
+                    retry_after = self._retry_after(response)
+                    reason = (f"server lagged {response.headers.get('X-Database-Lag', '?')}s"
+                              if maxlagged else f"HTTP {response.status_code}")
+                    response.close()
+                    if attempt >= self.max_retries:
+                        raise requests.HTTPError(
+                            f"{reason}, giving up after {attempt} retries", response=response
+                        )
+                else:
+                    latency = time.perf_counter() - started
+                    controller.record(latency, 'ok')
+                    metrics.observe('api_request_seconds', latency, host=host)
+                    if not stream:
+                        # Streamed bodies are counted by the caller once they are read
+                        metrics.inc('api_response_bytes_total',
+                                    self.wire_bytes(response, len(response.content or b'')), host=host)
+                    response.raise_for_status()
+                    if self.fixtures:
+                        self.fixtures.record(url, all_fields, response)
+                    return response
+            except (requests.ConnectionError, requests.Timeout) as e:
+                controller.record(time.perf_counter() - started, 'error')
+                if attempt >= self.max_retries:
+                    raise
+                reason = str(e)
+
+            delay = self._backoff(attempt, retry_after)
+            attempt += 1
+            metrics.inc('api_retries_total', host=host)
+            print(f"  API request failed ({reason}), retry {attempt}/{self.max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+    def get_json(self, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a request and decode the JSON response body."""
+        return self.request(url, params=params).json()
+
+
+_default_transport: Optional[ApiTransport] = None
+_default_lock = threading.Lock()
+
+
+def get_default_transport() -> ApiTransport:
+    """Return the process-wide transport shared by all API clients."""
+    global _default_transport
+    with _default_lock:
+        if _default_transport is None:
+            _default_transport = ApiTransport()
+        return _default_transport
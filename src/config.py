@@ -8,6 +8,17 @@ load_dotenv()
 # MediaWiki API settings
 MEDIAWIKI_API_URL = "https://lv.wikipedia.org/w/api.php"
 META_WIKI_API_URL = "https://meta.wikimedia.org/w/api.php"
+WIKIDATA_API_URL = "https://www.wikidata.org/w/api.php"
+# Wikipedia whose articles are looked up in Wikidata sitelinks
+WIKIDATA_SITE = "lvwiki"
+# Items per wbgetentities request (the API limit without bot rights)
+WIKIDATA_BATCH_SIZE = 50
+# Claims used to classify article subjects: instance of, sex or gender; the
+# item for human; and the values counted as women (female, trans woman)
+WIKIDATA_INSTANCE_OF = "P31"
+WIKIDATA_SEX_OR_GENDER = "P21"
+WIKIDATA_HUMAN = "Q5"
+WIKIDATA_FEMALE = ("Q6581072", "Q1052281")
 USER_AGENT = "CEE-Spring-Stats-Tool/1.0 (https://lv.wikipedia.org/wiki/User:YourUsername)"
 
 # Contest settings
@@ -16,17 +27,99 @@ CONTEST_TEMPLATE = f"CEE Spring {CONTEST_YEAR}"
 STRUCTURE_PAGE_PREFIX = f"Wikimedia CEE Spring {CONTEST_YEAR}/Structure/"
 CATEGORY_PREFIX = f"CEE Spring {CONTEST_YEAR} raksti"
 
-# API rate limiting (requests per second)
+# API rate limiting (requests per second, per API host)
 API_RATE_LIMIT = 1.0
+# "adaptive" starts at API_RATE_LIMIT and tunes the rate per host from
+# observed latency, maxlag answers and errors, within API_RATE_FLOOR and
+# the hard ceiling API_RATE_CEILING. "fixed" always uses API_RATE_LIMIT.
+API_RATE_MODE = "adaptive"
+API_RATE_FLOOR = 0.2
+API_RATE_CEILING = 4.0
+API_LATENCY_TARGET = 2.0  # seconds; slower responses count as congestion
+
+# HTTP transport settings shared by all API clients
+API_CONNECT_TIMEOUT = 10  # seconds
+API_READ_TIMEOUT = 60  # seconds
+API_POOL_CONNECTIONS = 4  # number of hosts with kept-alive connection pools
+API_POOL_MAXSIZE = 8  # kept-alive connections per host
+# GET requests whose URL would be longer than this are sent as POST instead
+API_MAX_GET_URL_LENGTH = 2000
+
+# Retries of failed API requests: connection errors, timeouts, HTTP 429/5xx
+# and maxlag errors are retried up to API_MAX_RETRIES times with exponential
+# backoff and jitter, or after the wait the server asks for in Retry-After
+API_MAX_RETRIES = 5
+API_RETRY_BASE_DELAY = 1.0  # seconds, doubled on every retry
+API_RETRY_MAX_DELAY = 60.0  # seconds
+# Sent with every API request: the server refuses work while its database
+# replication lag is above this many seconds
+API_MAXLAG = 5
+
+# Batching of content queries: at most API_BATCH_SIZE titles per request, and
+# for titles with a known size, at most CONTENT_BATCH_MAX_BYTES of wikitext so
+# the response stays well below the API result size limit (8 MiB by default)
+API_BATCH_SIZE = 50
+CONTENT_BATCH_MAX_BYTES = 4 * 1024 * 1024
+
+# Decode content query responses incrementally, one page at a time, instead of
+# materialising the whole response (lower peak memory for large batches)
+STREAM_CONTENT_JSON = False
 
 # New user threshold: users with fewer than this many edits on lv.wikipedia.org
 # before the contest start date are considered new users.
 NEW_USER_EDIT_THRESHOLD = 400
 NEW_USER_REFERENCE_DATE = "2026-03-21T00:00:00Z"
 
+# Which articles get full metrics (article wikitext download and readable text length):
+# "all"      - every article with a parseable contest template (default)
+# "eligible" - only articles with at least one valid contest country; the
+#              main table shows 0 readable length for the rest
+FULL_METRICS_SCOPE = "all"
+
+# Titles per chunk in streaming mode (--stream): each chunk is fetched, parsed
+# and reduced to article data before the next one, bounding peak memory
+STREAM_CHUNK_SIZE = 200
+
 # Output settings
 OUTPUT_FILE = f"output/cee_spring_{CONTEST_YEAR}_results.txt"
 CACHE_FILE = f"cache/cee_spring_{CONTEST_YEAR}_cache.json"
+# Wikidata IDs extracted from each Meta-Wiki structure page with the page's
+# revision ID; a page is downloaded again only when it has a newer revision
+STRUCTURE_PAGES_CACHE_FILE = f"cache/cee_spring_{CONTEST_YEAR}_structure_pages.json"
+# lvwiki article (sitelink) and label of each suggested Wikidata item, with
+# the item's revision ID
+WIKIDATA_SITELINKS_CACHE_FILE = "cache/wikidata_sitelinks.json"
+# Instance of (P31) and sex or gender (P21) of the articles' Wikidata items,
+# with the item's revision ID
+WIKIDATA_CLAIMS_CACHE_FILE = "cache/wikidata_claims.json"
+# Wikidata items found by title for articles whose page props do not name one
+# yet; an entry is dropped once the article is linked
+WIKIDATA_TITLES_CACHE_FILE = "cache/wikidata_titles.json"
+
+# Machine-readable report of run metrics (stage timings, API requests, cache
+# hits, parse times). Optionally also written in Prometheus text format.
+RUN_REPORT_FILE = "output/run_report.json"
+PROMETHEUS_FILE = None
+
+# Output of --profile: per-stage .pstats and collapsed-stack files and the
+# list of the slowest articles to parse
+PROFILE_DIR = "output/profile"
+SLOWEST_ARTICLES_COUNT = 20
+
+# Output of --memory-profile: peak and retained traced memory per stage, with
+# the allocation sites holding the most memory
+MEMORY_PROFILE_FILE = "output/profile/memory.json"
+
+# Crawl progress for resuming an interrupted run with --resume
+CHECKPOINT_FILE = f"cache/cee_spring_{CONTEST_YEAR}_checkpoint.json"
+
+# Pipeline stages: cached stage outputs (reused when a stage's inputs are
+# unchanged) and the number of stages that may run at the same time
+STAGE_CACHE_DIR = "cache/stages"
+PIPELINE_MAX_WORKERS = 3
+
+# Saved login cookies for post_stats.py (written with 0600 permissions)
+SESSION_FILE = "cache/wiki_session.json"
 
 # No limits on topics and countries - parse and display all
 
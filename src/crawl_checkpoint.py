@@ -0,0 +1,115 @@
+"""Checkpoint file for resuming an interrupted crawl."""
+
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from .config import CONTEST_TEMPLATE
+
+
+class CrawlCheckpoint:
+    """Progress of a crawl, saved to disk after every completed step.
+
+    Holds the embeddedin title list with its pending eicontinue token, page
+    info, the article data of completed chunks and per-user edit counts with
+    any pending uccontinue token. A run started with --resume loads the file
+    and skips the work recorded in it.
+
+    The file is an append-only journal of JSON lines: a header naming the
+    template, then one record per step holding only that step's progress
+    (values to set, items to add to a list, entries to add to a dict), so
+    saving a step costs the same however far the crawl has got. Loading
+    replays the records; a last line cut short by an interrupted write is
+    ignored.
+    """
+
+    def __init__(self, path: str, template: str = CONTEST_TEMPLATE):
+        self.path = path
+        self.template = template
+        self.data: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> bool:
+        """Load saved progress. Returns True if a checkpoint for this template was found."""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                lines = f.readlines()
+        except OSError:
+            return False
+        try:
+            header = json.loads(lines[0]) if lines else {}
+        except ValueError:
+            return False
+        if header.get('template') != self.template:
+            print(f"Ignoring checkpoint for a different template: {header.get('template')}")
+            return False
+
+        data: Dict[str, Any] = {}
+        for line in lines[1:]:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break  # interrupted while writing the last record
+            self._apply(data, record)
+        with self._lock:
+            self.data = data
+        return True
+
+    @staticmethod
+    def _apply(data: Dict[str, Any], record: Dict[str, Any]) -> None:
+        data.update(record.get('set', {}))
+        for key, items in record.get('extend', {}).items():
+            data.setdefault(key, []).extend(items)
+        for key, entries in record.get('merge', {}).items():
+            data.setdefault(key, {}).update(entries)
+
+    def get(self, key: str, default: Optional[Any] = None) -> Any:
+        """Return a saved value."""
+        with self._lock:
+            return self.data.get(key, default)
+
+    def update(self, **values: Any) -> None:
+        """Record progress: set the given values."""
+        self.record(values=values)
+
+    def record(self, values: Optional[Dict[str, Any]] = None, extend: Optional[Dict[str, List[Any]]] = None,
+               merge: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        """
+        Record one step of progress and append it to the checkpoint file.
+
+        The changes are applied together, so a resumed crawl sees all or none
+        of them.
+
+        Args:
+            values: Values to set
+            extend: Items to append to list values
+            merge: Entries to add to dict values
+        """
+        record = {name: changes for name, changes in (('set', values), ('extend', extend), ('merge', merge))
+                  if changes}
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._apply(self.data, record)
+            exists = os.path.exists(self.path)
+            if not exists:
+                parent = os.path.dirname(self.path)
+                if parent:
+                    os.makedirs(parent, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                if not exists:
+                    f.write(json.dumps({'template': self.template}, ensure_ascii=False) + '\n')
+                f.write(line)
+
+    def clear(self) -> None:
+        """Forget all progress and remove the checkpoint file."""
+        with self._lock:
+            self.data = {}
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    @property
+    def has_progress(self) -> bool:
+        """Whether any progress has been recorded."""
+        with self._lock:
+            return bool(self.data)
@@ -1,6 +1,6 @@
 """Data validation and duplicate detection utilities."""
 
-from typing import List, Dict, Any, Set, Tuple
+from typing import List, Dict, Any, Iterable, Iterator, Set, Tuple
 from collections import defaultdict
 
 
@@ -28,25 +28,30 @@ class DataValidator:
             self.validation_errors.append("No articles data provided")
             return [], self.validation_errors, self.warnings
 
-        # Remove duplicates
-        cleaned_data = self._remove_duplicates(articles_data)
-
-        # Validate each article
-        validated_data = []
-        for article in cleaned_data:
-            if self._validate_single_article(article):
-                validated_data.append(self._clean_article_data(article))
+        # Remove duplicates, validate and clean each article in a single pass
+        validated_data = list(self.iter_clean_articles(articles_data))
 
         # Check for data consistency
         self._check_data_consistency(validated_data)
 
         return validated_data, self.validation_errors, self.warnings
 
-    def _remove_duplicates(self, articles_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Remove duplicate articles based on title."""
+    def iter_clean_articles(self, articles_data: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Yield deduplicated, validated and cleaned articles one at a time.
+
+        Works on any iterable, so articles can be validated as they stream in
+        from the crawl. Errors and warnings are collected on the validator.
+        """
+        for article in self._iter_unique(articles_data):
+            if self._validate_single_article(article):
+                yield self._clean_article_data(article)
+
+    def _iter_unique(self, articles_data: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Yield articles with a non-empty title that was not seen before."""
         seen_titles = set()
-        unique_articles = []
         duplicates_found = []
+        warnings_position = len(self.warnings)
 
         for article in articles_data:
             title = article.get('title', '').strip()
@@ -59,14 +64,18 @@ class DataValidator:
                 continue
 
             seen_titles.add(title)
-            unique_articles.append(article)
+            yield article
 
+        # Report duplicates ahead of the per-article warnings, as before streaming
         if duplicates_found:
-            self.warnings.append(f"Removed {len(duplicates_found)} duplicate articles: {', '.join(duplicates_found[:5])}")
+            duplicate_warnings = [f"Removed {len(duplicates_found)} duplicate articles: {', '.join(duplicates_found[:5])}"]
             if len(duplicates_found) > 5:
-                self.warnings.append(f"... and {len(duplicates_found) - 5} more duplicates")
+                duplicate_warnings.append(f"... and {len(duplicates_found) - 5} more duplicates")
+            self.warnings[warnings_position:warnings_position] = duplicate_warnings
 
-        return unique_articles
+    def _remove_duplicates(self, articles_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Remove duplicate articles based on title."""
+        return list(self._iter_unique(articles_data))
 
     def _validate_single_article(self, article: Dict[str, Any]) -> bool:
         """Validate a single article's data."""
@@ -0,0 +1,114 @@
+"""Record-and-replay fixtures of API traffic for deterministic offline runs."""
+
+import gzip
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List
+
+import requests
+
+# Request fields whose values are secret or change on every login. They are
+# stored as "***" and ignored when matching a replayed request.
+REDACTED_FIELDS = {'lgpassword', 'lgtoken', 'token'}
+
+# Response headers kept in a fixture (cookies are never stored)
+KEPT_HEADERS = {'content-type', 'retry-after', 'mediawiki-api-error', 'x-database-lag'}
+
+
+def _redact(fields: Dict[str, Any]) -> Dict[str, str]:
+    return {k: ('***' if k in REDACTED_FIELDS else str(v)) for k, v in fields.items()}
+
+
+def _request_key(url: str, fields: Dict[str, Any]) -> str:
+    """Identify a request by URL and parameters, whether it was sent as GET or POST."""
+    return json.dumps([url, sorted(_redact(fields).items())], ensure_ascii=False)
+
+
+class HttpFixtures:
+    """A gzip-compressed file of API requests and the responses they got.
+
+    In 'record' mode every response is stored as it is received and the file
+    is written by save(). In 'replay' mode the file is loaded and responses
+    are served back in the order they were recorded, with no network access.
+    A request that is repeated with the same parameters gets the recorded
+    responses in turn, and the last one once they run out.
+    """
+
+    def __init__(self, path: str, mode: str):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown fixture mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.entries: List[Dict[str, Any]] = []
+        self._responses: Dict[str, List[Dict[str, Any]]] = {}
+        self._served: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        if mode == 'replay':
+            self.load()
+
+    def load(self) -> None:
+        """Read the fixture file and index its responses by request."""
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        self.entries = data['entries']
+        self._responses = {}
+        for entry in self.entries:
+            key = _request_key(entry['url'], entry['request'])
+            self._responses.setdefault(key, []).append(entry)
+
+    def save(self) -> None:
+        """Write the recorded traffic to the fixture file."""
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        with self._lock:
+            data = {'recorded': datetime.now().isoformat(), 'entries': self.entries}
+        with gzip.open(self.path, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    def record(self, url: str, fields: Dict[str, Any], response: requests.Response) -> None:
+        """Store a response. Reads the whole body, also of streamed responses."""
+        entry = {
+            'url': url,
+            'request': _redact(fields),
+            'status': response.status_code,
+            'headers': {k: v for k, v in response.headers.items() if k.lower() in KEPT_HEADERS},
+            # surrogateescape keeps the body byte-exact even if it is not valid UTF-8
+            'body': response.content.decode('utf-8', 'surrogateescape'),
+        }
+        with self._lock:
+            self.entries.append(entry)
+
+    def replay(self, url: str, fields: Dict[str, Any]) -> requests.Response:
+        """
+        Return the recorded response to a request.
+
+        Raises:
+            requests.ConnectionError: If the request was never recorded
+        """
+        key = _request_key(url, fields)
+        with self._lock:
+            recorded = self._responses.get(key)
+            if not recorded:
+                raise requests.ConnectionError(f"No recorded response in {self.path} for {_redact(fields)}")
+            served = self._served.get(key, 0)
+            self._served[key] = served + 1
+            entry = recorded[min(served, len(recorded) - 1)]
+
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.headers.update(entry['headers'])
+        response.url = url
+        response.encoding = 'utf-8'
+        response._content = entry['body'].encode('utf-8', 'surrogateescape')
+        response._content_consumed = True
+        return response
+
+    @property
+    def unused(self) -> int:
+        """Number of recorded responses that were not served during replay."""
+        with self._lock:
+            return sum(max(0, len(entries) - self._served.get(key, 0))
+                       for key, entries in self._responses.items())
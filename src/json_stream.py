@@ -0,0 +1,116 @@
+"""Incremental decoding of MediaWiki query responses."""
+
+import codecs
+import json
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+
+class _StreamReader:
+    """Text buffer over an iterable of byte chunks, decoded as UTF-8 on demand."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.exhausted = False
+
+    def fill(self, min_chars: int = 1) -> bool:
+        """Read until at least min_chars more characters are buffered. Returns False at EOF."""
+        # Drop consumed text so the buffer only holds the value being decoded
+        if self.pos:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        target = len(self.buf) + min_chars
+        while len(self.buf) < target:
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                self.buf += self._decoder.decode(b'', final=True)
+                self.exhausted = True
+                return False
+            self.buf += self._decoder.decode(chunk)
+        return True
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                raise ValueError("Unexpected end of JSON stream")
+
+    def expect(self, char: str) -> None:
+        """Consume the next non-whitespace character, which must be char."""
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos}, got {self.buf[self.pos]!r}")
+        self.pos += 1
+
+    def skip_comma(self) -> None:
+        """Consume a separating comma if one follows."""
+        if self.peek() == ',':
+            self.pos += 1
+
+    def value(self) -> Any:
+        """Decode one complete JSON value, reading more input as needed."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self.buf, self.pos)
+                # A number at the very end of the buffer may continue in the next chunk
+                if end < len(self.buf) or self.exhausted:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.exhausted:
+                    raise
+            # Grow the buffer geometrically so large values decode in linear time
+            self.fill(max(len(self.buf) - self.pos, 65536))
+
+
+def iter_query_pages(chunks: Iterable[bytes], envelope: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the entries of query.pages one at a time while the response is read.
+
+    Only one page object is materialised at a time, instead of the whole
+    response tree. Expects a formatversion=2 response, where pages is a list.
+
+    Args:
+        chunks: Raw response body chunks (e.g. response.iter_content())
+        envelope: Optional dict that receives every other top-level field
+            (continue, warnings, query.normalized, ...) once the stream is consumed
+
+    Yields:
+        Page dictionaries from query.pages
+    """
+    if envelope is None:
+        envelope = {}
+    reader = _StreamReader(chunks)
+
+    reader.expect('{')
+    while reader.peek() != '}':
+        key = reader.value()
+        reader.expect(':')
+        if key == 'query' and reader.peek() == '{':
+            query = envelope.setdefault('query', {})
+            reader.expect('{')
+            while reader.peek() != '}':
+                query_key = reader.value()
+                reader.expect(':')
+                if query_key == 'pages' and reader.peek() == '[':
+                    reader.expect('[')
+                    while reader.peek() != ']':
+                        yield reader.value()
+                        reader.skip_comma()
+                    reader.expect(']')
+                else:
+                    query[query_key] = reader.value()
+                reader.skip_comma()
+            reader.expect('}')
+        else:
+            envelope[key] = reader.value()
+        reader.skip_comma()
+    reader.expect('}')
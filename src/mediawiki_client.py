@@ -1,57 +1,150 @@
 """MediaWiki API client for fetching Wikipedia data."""
 
 import requests
-import time
-import json
-from typing import Dict, List, Optional, Any
-from .config import MEDIAWIKI_API_URL, USER_AGENT, API_RATE_LIMIT
+from urllib.parse import urlsplit
+from typing import Dict, Iterator, List, Optional, Any, Tuple
+from .api_transport import ApiRequestError, ApiTransport, get_default_transport
+from .crawl_checkpoint import CrawlCheckpoint
+from .config import MEDIAWIKI_API_URL, API_BATCH_SIZE, CONTENT_BATCH_MAX_BYTES, STREAM_CONTENT_JSON
+from .json_stream import iter_query_pages
+from .metrics import get_metrics
 
 
 class MediaWikiClient:
     """Client for interacting with MediaWiki API."""
 
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({'User-Agent': USER_AGENT})
-        self.last_request_time = 0
+    def __init__(self, transport: Optional[ApiTransport] = None, api_url: str = MEDIAWIKI_API_URL,
+                 stream_json: bool = STREAM_CONTENT_JSON):
+        self.transport = transport or get_default_transport()
+        self.session = self.transport.session
+        self.api_url = api_url
+        self.stream_json = stream_json
 
-    def _rate_limit(self):
-        """Enforce rate limiting between API requests."""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        min_interval = 1.0 / API_RATE_LIMIT
-
-        if time_since_last < min_interval:
-            time.sleep(min_interval - time_since_last)
-
-        self.last_request_time = time.time()
-
-    def _make_request(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Make a request to the MediaWiki API with rate limiting."""
-        self._rate_limit()
-
-        # Add common parameters
+    @staticmethod
+    def _add_common_params(params: Dict[str, Any]) -> Dict[str, Any]:
+        """Add the parameters every API request needs."""
         params.update({
             'action': params.get('action', 'query'),
             'format': 'json',
             'formatversion': '2'
         })
+        return params
+
+    def _make_request(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Make a request to the MediaWiki API through the shared transport.
+
+        Raises:
+            ApiRequestError: If the request fails or the response is not JSON, so
+                that a crawl stops instead of carrying on with partial data
+        """
+        self._add_common_params(params)
 
         try:
-            response = self.session.get(MEDIAWIKI_API_URL, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
-            print(f"API request failed: {e}")
-            return {}
+            return self.transport.get_json(self.api_url, params)
+        except (requests.RequestException, ValueError) as e:
+            raise ApiRequestError(f"API request failed: {e}") from e
+
+    def _iter_streamed_pages(self, params: Dict[str, Any]) -> Iterator[Tuple[Dict[str, Any], Dict[str, str]]]:
+        """
+        Run a query and yield its pages one at a time, decoding the response incrementally.
+
+        Follows continuation like _query_continued(), reading the continue
+        parameters from the response envelope once its pages are consumed.
 
-    def find_articles_with_template(self, template_name: str, namespace: int = 1) -> List[str]:
+        Yields:
+            (page, normalized) pairs, where normalized maps normalized titles
+            back to the requested ones (see _normalized_titles). MediaWiki
+            sends query.normalized before query.pages, so it is complete by
+            the time the pages are read.
+        """
+        params = dict(params)
+        last_continue = None
+        while True:
+            envelope: Dict[str, Any] = {}
+            try:
+                response = self.transport.request(
+                    self.api_url, params=self._add_common_params(dict(params)), stream=True
+                )
+                chunks = self._counted_chunks(response, self.api_url)
+                for page in iter_query_pages(chunks, envelope):
+                    yield page, self._normalized_titles(envelope)
+            except (requests.RequestException, ValueError) as e:
+                raise ApiRequestError(f"API request failed: {e}") from e
+
+            continue_params = envelope.get('continue')
+            if not continue_params or continue_params == last_continue:
+                return
+            last_continue = continue_params
+            params.update(continue_params)
+
+    @staticmethod
+    def _counted_chunks(response: requests.Response, url: str) -> Iterator[bytes]:
+        """Yield a streamed response body in chunks, counting its wire bytes in the run metrics."""
+        decoded = 0
+        try:
+            for chunk in response.iter_content(chunk_size=65536):
+                decoded += len(chunk)
+                yield chunk
+        finally:
+            get_metrics().inc('api_response_bytes_total', ApiTransport.wire_bytes(response, decoded),
+                              host=urlsplit(url).netloc)
+
+    def _query_continued(self, params: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Run a query and follow its continuation to completion.
+
+        Yields each response in turn; the caller merges the partial results.
+        """
+        params = dict(params)
+        last_continue = None
+        while True:
+            data = self._make_request(dict(params))
+            yield data
+
+            continue_params = data.get('continue')
+            if not continue_params or continue_params == last_continue:
+                break
+            last_continue = continue_params
+            params.update(continue_params)
+
+    @staticmethod
+    def _normalized_titles(data: Dict[str, Any]) -> Dict[str, str]:
+        """Map normalized page titles in a response back to the requested titles."""
+        return {n['to']: n['from'] for n in data.get('query', {}).get('normalized', [])}
+
+    @staticmethod
+    def _size_batches(titles: List[str], sizes: Optional[Dict[str, int]] = None) -> Iterator[List[str]]:
+        """
+        Split titles into request batches.
+
+        Each batch has at most API_BATCH_SIZE titles and, when sizes are known,
+        at most CONTENT_BATCH_MAX_BYTES of content (a single oversized page
+        gets a batch of its own).
+        """
+        batch: List[str] = []
+        batch_bytes = 0
+        for title in titles:
+            size = sizes.get(title, 0) if sizes else 0
+            if batch and (len(batch) >= API_BATCH_SIZE or batch_bytes + size > CONTENT_BATCH_MAX_BYTES):
+                yield batch
+                batch, batch_bytes = [], 0
+            batch.append(title)
+            batch_bytes += size
+        if batch:
+            yield batch
+
+    def find_articles_with_template(self, template_name: str, namespace: int = 1,
+                                    checkpoint: Optional[CrawlCheckpoint] = None) -> List[str]:
         """
         Find all articles that have a specific template on their talk pages.
 
         Args:
             template_name: Name of the template to search for
             namespace: Namespace to search in (1 = talk pages)
+            checkpoint: Optional checkpoint; the titles found so far and the
+                pending eicontinue token are saved after every response and
+                picked up from it on the next run
 
         Returns:
             List of article titles that have the template
@@ -59,6 +152,15 @@ class MediaWikiClient:
         articles = []
         continue_param = None
 
+        if checkpoint:
+            saved = checkpoint.get('embeddedin')
+            if saved:
+                articles = list(checkpoint.get('embeddedin_titles', []))
+                continue_param = saved['continue']
+                if saved['complete']:
+                    return articles
+                print(f"Resuming template search after {len(articles)} articles")
+
         while True:
             params = {
                 'action': 'query',
@@ -76,16 +178,26 @@ class MediaWikiClient:
             if 'query' not in data or 'embeddedin' not in data['query']:
                 break
 
+            found = []
             for page in data['query']['embeddedin']:
                 # Convert talk page title to article title
                 article_title = self._talk_to_article_title(page['title'])
                 if article_title:
-                    articles.append(article_title)
+                    found.append(article_title)
+            articles.extend(found)
 
             # Check for continuation
             if 'continue' in data and 'eicontinue' in data['continue']:
                 continue_param = data['continue']['eicontinue']
             else:
+                continue_param = None
+
+            if checkpoint:
+                checkpoint.record(
+                    values={'embeddedin': {'continue': continue_param, 'complete': continue_param is None}},
+                    extend={'embeddedin_titles': found},
+                )
+            if continue_param is None:
                 break
 
         return articles
@@ -109,13 +221,20 @@ class MediaWikiClient:
         """
         return self.get_pages_content([title], namespace).get(title)
 
-    def get_pages_content(self, titles: List[str], namespace: int = 0) -> Dict[str, Optional[str]]:
+    def get_pages_content(self, titles: List[str], namespace: int = 0,
+                          sizes: Optional[Dict[str, int]] = None) -> Dict[str, Optional[str]]:
         """
-        Get the content of multiple pages in batches of 50.
+        Get the content of multiple pages in batches.
+
+        Batches hold up to 50 titles and are additionally limited by the known
+        page sizes so that each response stays under the API result size limit.
+        Continuation is followed, so pages left out of a truncated response are
+        fetched as well.
 
         Args:
             titles: List of page titles (without namespace prefix)
             namespace: Namespace (0 = main, 1 = talk/Diskusija)
+            sizes: Optional mapping of titles to page length in bytes
 
         Returns:
             Dictionary mapping original titles to page content (None if not found)
@@ -128,38 +247,125 @@ class MediaWikiClient:
         else:
             prefixed = list(titles)
         title_map = {p: t for p, t in zip(prefixed, titles)}
+        prefixed_sizes = None
+        if sizes:
+            prefixed_sizes = {p: sizes.get(t, 0) for p, t in title_map.items()}
 
-        batch_size = 50
         results: Dict[str, Optional[str]] = {}
 
-        for i in range(0, len(prefixed), batch_size):
-            batch = prefixed[i:i + batch_size]
+        for batch in self._size_batches(prefixed, prefixed_sizes):
+            error = self._try_fetch_content_batch(batch, title_map, results)
+            if error:
+                print(f"  Batch of {len(batch)} pages failed: {error}")
+
+        # Titles absent from the results were lost to failed requests (a page
+        # that does not exist still comes back as 'missing'). Refetch them in
+        # batches rather than one request per title.
+        unsettled = [p for p in prefixed if title_map[p] not in results]
+        if unsettled:
+            print(f"Refetching {len(unsettled)} pages missing from failed batches...")
+            for batch in self._size_batches(unsettled, prefixed_sizes):
+                self._try_fetch_content_batch(batch, title_map, results)
+                still_missing = [p for p in batch if title_map[p] not in results]
+                if still_missing:
+                    self._bisect_failed_batch(still_missing, title_map, results)
 
-            params = {
-                'action': 'query',
-                'prop': 'revisions',
-                'rvprop': 'content',
-                'rvslots': 'main',
-                'titles': '|'.join(batch)
-            }
+        return results
 
-            data = self._make_request(params)
+    def _try_fetch_content_batch(self, batch: List[str], title_map: Dict[str, str],
+                                 results: Dict[str, Optional[str]]) -> Optional[ApiRequestError]:
+        """Fetch one batch like _fetch_content_batch, returning a failed request's error instead of raising it."""
+        try:
+            self._fetch_content_batch(batch, title_map, results)
+        except ApiRequestError as e:
+            return e
+        return None
 
+    def _fetch_content_batch(self, batch: List[str], title_map: Dict[str, str],
+                             results: Dict[str, Optional[str]]) -> None:
+        """Fetch the content of one batch of titles into results, following continuation."""
+        params = {
+            'action': 'query',
+            'prop': 'revisions',
+            'rvprop': 'content',
+            'rvslots': 'main',
+            'titles': '|'.join(batch)
+        }
+
+        if self.stream_json:
+            for page, normalized in self._iter_streamed_pages(params):
+                requested = normalized.get(page['title'], page['title'])
+                self._store_page_content(page, requested, title_map, results)
+            return
+
+        for data in self._query_continued(params):
             if 'query' not in data or 'pages' not in data['query']:
                 continue
 
+            normalized = self._normalized_titles(data)
             for page in data['query']['pages']:
-                original_title = title_map.get(page['title'], page['title'])
-                if 'missing' in page or 'revisions' not in page:
-                    results[original_title] = None
-                else:
-                    revision = page['revisions'][0]
-                    if 'slots' in revision and 'main' in revision['slots']:
-                        results[original_title] = revision['slots']['main']['content']
-                    else:
-                        results[original_title] = None
+                requested = normalized.get(page['title'], page['title'])
+                self._store_page_content(page, requested, title_map, results)
+
+    @staticmethod
+    def _store_page_content(page: Dict[str, Any], requested: str, title_map: Dict[str, str],
+                            results: Dict[str, Optional[str]]) -> None:
+        """Store the content of one revisions query page under its original title."""
+        original_title = title_map.get(requested, requested)
+        if 'missing' in page or 'invalid' in page:
+            results[original_title] = None
+        elif 'revisions' not in page:
+            # Content may still arrive in a continuation response; until it
+            # does the title stays unsettled, so a failed continuation gets
+            # it refetched
+            pass
+        else:
+            revision = page['revisions'][0]
+            if 'slots' in revision and 'main' in revision['slots']:
+                results[original_title] = revision['slots']['main']['content']
+            else:
+                results[original_title] = None
 
-        return results
+    def _bisect_failed_batch(self, batch: List[str], title_map: Dict[str, str],
+                             results: Dict[str, Optional[str]]) -> None:
+        """
+        Split a batch that keeps failing and refetch the halves.
+
+        Keeps bisecting only while one half succeeds, which isolates a title
+        that breaks its whole batch in O(log n) requests. When both halves fail
+        the API itself is likely unavailable and the titles are given up on.
+
+        Raises:
+            ApiRequestError: If both halves failed with request errors (after
+                the transport's retries), so the crawl stops and can be resumed
+                instead of carrying on without the content
+        """
+        if len(batch) == 1:
+            print(f"  Could not fetch content for {batch[0]}")
+            return
+
+        mid = len(batch) // 2
+        failed_halves = []
+        total_failures = 0
+        errors = []
+        for half in (batch[:mid], batch[mid:]):
+            error = self._try_fetch_content_batch(half, title_map, results)
+            if error:
+                errors.append(error)
+            still_missing = [p for p in half if title_map[p] not in results]
+            if len(still_missing) == len(half):
+                total_failures += 1
+            if still_missing:
+                failed_halves.append(still_missing)
+
+        if total_failures == 2:
+            if len(errors) == 2:
+                raise ApiRequestError(f"Giving up on {len(batch)} pages: {errors[-1]}") from errors[-1]
+            print(f"  Giving up on {len(batch)} pages: repeated batch failures")
+            return
+
+        for half in failed_halves:
+            self._bisect_failed_batch(half, title_map, results)
 
     def get_page_info(self, titles: List[str]) -> Dict[str, Dict[str, Any]]:
         """
@@ -174,13 +380,9 @@ class MediaWikiClient:
         if not titles:
             return {}
 
-        # Process in batches of 50 (API limit)
-        batch_size = 50
         all_info = {}
 
-        for i in range(0, len(titles), batch_size):
-            batch = titles[i:i + batch_size]
-
+        for batch in self._size_batches(titles):
             params = {
                 'action': 'query',
                 'prop': 'info|pageprops',
@@ -188,28 +390,26 @@ class MediaWikiClient:
                 'titles': '|'.join(batch)
             }
 
-            data = self._make_request(params)
-
-            if 'query' not in data or 'pages' not in data['query']:
-                continue
-
-            for page in data['query']['pages']:
-                if 'missing' not in page:
-                    # Get Wikidata item ID if available
-                    wikidata_id = None
-                    if 'pageprops' in page and 'wikibase_item' in page['pageprops']:
-                        wikidata_id = page['pageprops']['wikibase_item']
-
-                    all_info[page['title']] = {
-                        'pageid': page.get('pageid'),
-                        'size': page.get('length', 0),  # Use 'length' instead of 'size'
-                        'touched': page.get('touched'),
-                        'wikidata_id': wikidata_id
-                    }
+            for data in self._query_continued(params):
+                if 'query' not in data or 'pages' not in data['query']:
+                    continue
+
+                for page in data['query']['pages']:
+                    if 'missing' not in page:
+                        info = all_info.setdefault(page['title'], {
+                            'pageid': page.get('pageid'),
+                            'size': page.get('length', 0),  # Use 'length' instead of 'size'
+                            'touched': page.get('touched'),
+                            'wikidata_id': None
+                        })
+                        # Get Wikidata item ID if available
+                        if 'pageprops' in page and 'wikibase_item' in page['pageprops']:
+                            info['wikidata_id'] = page['pageprops']['wikibase_item']
 
         return all_info
 
-    def get_user_edit_counts_before_date(self, usernames: List[str], before_date: str) -> Dict[str, int]:
+    def get_user_edit_counts_before_date(self, usernames: List[str], before_date: str,
+                                         checkpoint: Optional[CrawlCheckpoint] = None) -> Dict[str, int]:
         """
         Get the number of edits each user had made before a given date.
 
@@ -220,6 +420,9 @@ class MediaWikiClient:
         Args:
             usernames: List of usernames to check
             before_date: ISO 8601 timestamp (e.g. "2026-03-21T00:00:00Z")
+            checkpoint: Optional checkpoint; finished counts are saved after
+                every user, and a user interrupted by a failed request is
+                resumed from its uccontinue token
 
         Returns:
             Dictionary mapping username to edit count (capped at threshold when >= threshold).
@@ -228,12 +431,23 @@ class MediaWikiClient:
         from .config import NEW_USER_EDIT_THRESHOLD
 
         results = {}
+        pending = {}
+        if checkpoint:
+            if checkpoint.get('edit_counts_date') == before_date:
+                results = dict(checkpoint.get('edit_counts', {}))
+                pending = checkpoint.get('edit_counts_pending') or {}
+            else:
+                checkpoint.record(values={'edit_counts_date': before_date, 'edit_counts': {},
+                                          'edit_counts_pending': None})
+
         for username in usernames:
-            if not username:
+            if not username or username in results:
                 continue
 
-            count = 0
-            continue_param = None
+            if pending.get('user') == username:
+                count, continue_param = pending['count'], pending['continue']
+            else:
+                count, continue_param = 0, None
 
             while True:
                 params = {
@@ -248,7 +462,14 @@ class MediaWikiClient:
                 if continue_param:
                     params['uccontinue'] = continue_param
 
-                data = self._make_request(params)
+                try:
+                    data = self._make_request(params)
+                except ApiRequestError:
+                    if checkpoint:
+                        checkpoint.update(edit_counts_pending={
+                            'user': username, 'count': count, 'continue': continue_param
+                        })
+                    raise
 
                 if 'error' in data:
                     count = -1
@@ -266,6 +487,8 @@ class MediaWikiClient:
                     break
 
             results[username] = count
+            if checkpoint:
+                checkpoint.record(values={'edit_counts_pending': None}, merge={'edit_counts': {username: count}})
 
         return results
 
@@ -282,12 +505,9 @@ class MediaWikiClient:
         if not titles:
             return {}
 
-        batch_size = 50
         all_categories = {}
 
-        for i in range(0, len(titles), batch_size):
-            batch = titles[i:i + batch_size]
-
+        for batch in self._size_batches(titles):
             params = {
                 'action': 'query',
                 'prop': 'categories',
@@ -295,16 +515,15 @@ class MediaWikiClient:
                 'titles': '|'.join(batch)
             }
 
-            data = self._make_request(params)
+            # clcontinue splits long category lists across responses
+            for data in self._query_continued(params):
+                if 'query' not in data or 'pages' not in data['query']:
+                    continue
 
-            if 'query' not in data or 'pages' not in data['query']:
-                continue
-
-            for page in data['query']['pages']:
-                if 'missing' not in page:
-                    categories = []
-                    if 'categories' in page:
-                        categories = [cat['title'] for cat in page['categories']]
-                    all_categories[page['title']] = categories
+                for page in data['query']['pages']:
+                    if 'missing' not in page:
+                        categories = all_categories.setdefault(page['title'], [])
+                        if 'categories' in page:
+                            categories.extend(cat['title'] for cat in page['categories'])
 
         return all_categories
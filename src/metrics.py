@@ -0,0 +1,209 @@
+"""Run metrics: counters, gauges and histograms written to a JSON run report."""
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+# Prefix of the metric names in the Prometheus text format
+PROMETHEUS_PREFIX = "cee_spring_"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative histogram with fixed bucket bounds, as used by Prometheus."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.bounds = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'buckets': {str(b): c for b, c in zip(self.bounds, self.bucket_counts)},
+        }
+
+
+class RunMetrics:
+    """Thread-safe metrics of one run.
+
+    Metrics are identified by a name and a set of labels, for example
+    api_requests_total{host="lv.wikipedia.org", module="revisions"}.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all metrics and start a new run."""
+        with self._lock:
+            self.started = datetime.now()
+            self.counters: Dict[str, Dict[Labels, float]] = {}
+            self.gauges: Dict[str, Dict[Labels, float]] = {}
+            self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+
+    @staticmethod
+    def _labels(labels: Dict[str, Any]) -> Labels:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Add to a counter."""
+        key = self._labels(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels: Any) -> None:
+        """Set a gauge."""
+        with self._lock:
+            self.gauges.setdefault(name, {})[self._labels(labels)] = value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Record a value in a histogram."""
+        key = self._labels(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram()
+            series[key].observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels: Any) -> Iterator[None]:
+        """Record the duration of the with block in a histogram."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def cache_lookup(self, cache: str, hit: bool) -> None:
+        """Count a lookup in one of the caches."""
+        self.inc('cache_lookups_total', cache=cache, result='hit' if hit else 'miss')
+
+    def record_stages(self, timings: Dict[str, Dict[str, Any]]) -> None:
+        """Record the per-stage timings of a PipelineRunner."""
+        for stage, timing in timings.items():
+            self.set('stage_wall_seconds', timing['wall_seconds'], stage=stage)
+            self.set('stage_cpu_seconds', timing['cpu_seconds'], stage=stage)
+            if timing.get('cacheable'):
+                self.cache_lookup('stage', timing['cached'])
+
+    def cache_hit_ratios(self) -> Dict[str, float]:
+        """Return the share of lookups that were hits, per cache."""
+        totals: Dict[str, List[float]] = {}
+        with self._lock:
+            for labels, value in self.counters.get('cache_lookups_total', {}).items():
+                label_dict = dict(labels)
+                hits_total = totals.setdefault(label_dict['cache'], [0, 0])
+                if label_dict['result'] == 'hit':
+                    hits_total[0] += value
+                hits_total[1] += value
+        return {cache: hits / total for cache, (hits, total) in totals.items() if total}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return all metrics as a JSON-serialisable report."""
+        def series(metrics: Dict[Labels, Any], convert: Callable[[Any], Any]) -> List[Dict[str, Any]]:
+            return [{'labels': dict(labels), 'value': convert(value)} for labels, value in metrics.items()]
+
+        with self._lock:
+            report = {
+                'started': self.started.isoformat(),
+                'finished': datetime.now().isoformat(),
+                'counters': {n: series(m, float) for n, m in self.counters.items()},
+                'gauges': {n: series(m, float) for n, m in self.gauges.items()},
+                'histograms': {n: series(m, Histogram.to_dict) for n, m in self.histograms.items()},
+            }
+        report['cache_hit_ratios'] = self.cache_hit_ratios()
+        return report
+
+    def write_json(self, path: str, **extra: Any) -> bool:
+        """Write the run report, with any extra top-level fields, to a JSON file."""
+        report = self.to_dict()
+        report.update(extra)
+        return self._write(path, json.dumps(report, ensure_ascii=False, indent=2))
+
+    def to_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for kind, metrics in (('counter', self.counters), ('gauge', self.gauges)):
+                for name, series in sorted(metrics.items()):
+                    full_name = PROMETHEUS_PREFIX + name
+                    lines.append(f"# TYPE {full_name} {kind}")
+                    for labels, value in sorted(series.items()):
+                        lines.append(f"{full_name}{_format_labels(labels)} {value:g}")
+            for name, series in sorted(self.histograms.items()):
+                full_name = PROMETHEUS_PREFIX + name
+                lines.append(f"# TYPE {full_name} histogram")
+                for labels, histogram in sorted(series.items()):
+                    for bound, count in zip(histogram.bounds, histogram.bucket_counts):
+                        lines.append(f"{full_name}_bucket{_format_labels(labels + (('le', f'{bound:g}'),))} {count}")
+                    lines.append(f"{full_name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{full_name}_sum{_format_labels(labels)} {histogram.sum:g}")
+                    lines.append(f"{full_name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> bool:
+        """Write all metrics to a Prometheus text-format file (e.g. for node_exporter)."""
+        return self._write(path, self.to_prometheus())
+
+    @staticmethod
+    def _write(path: str, text: str) -> bool:
+        try:
+            parent = os.path.dirname(path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            return True
+        except OSError as e:
+            print(f"Error writing metrics to {path}: {e}")
+            return False
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (k, v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in labels
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+_metrics = RunMetrics()
+
+
+def get_metrics() -> RunMetrics:
+    """Return the process-wide run metrics."""
+    return _metrics
+
+
+def timed(name: str, **labels: Any) -> Callable:
+    """Decorator recording the duration of every call in a histogram."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with _metrics.timer(name, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,178 @@
+"""Small stage-graph runner for the statistics pipeline."""
+
+import hashlib
+import json
+import os
+import pickle
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .config import STAGE_CACHE_DIR, PIPELINE_MAX_WORKERS
+from .profiling import MemoryProfiler, profile_call
+
+
+class StageFailed(Exception):
+    """Raised by a stage function to stop the pipeline with a message."""
+
+
+class Stage:
+    """A pipeline stage: a function from named inputs to one named, typed output.
+
+    The stage function is called with keyword arguments named after its inputs.
+    Cacheable stages are skipped when the fingerprint of their inputs matches
+    the one stored with their last cached output.
+    """
+
+    def __init__(self, name: str, func: Callable[..., Any], inputs: Sequence[str] = (),
+                 output_type: type = object, cacheable: bool = False, version: int = 1):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.output_type = output_type
+        self.cacheable = cacheable
+        self.version = version
+
+    def fingerprint(self, inputs: Dict[str, Any]) -> str:
+        """Hash the stage identity and its input values."""
+        payload = json.dumps([self.name, self.version, inputs], sort_keys=True,
+                             ensure_ascii=False, default=_canonical)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _canonical(value: Any) -> Any:
+    """JSON fallback that makes sets and tuples hash the same on every run."""
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    if isinstance(value, tuple):
+        return list(value)
+    return str(value)
+
+
+class PipelineRunner:
+    """Runs stages in dependency order, independent stages concurrently."""
+
+    def __init__(self, stages: List[Stage], use_cache: bool = True,
+                 cache_dir: str = STAGE_CACHE_DIR, max_workers: int = PIPELINE_MAX_WORKERS,
+                 profile_dir: Optional[str] = None, memory_profiler: Optional[MemoryProfiler] = None):
+        names = [stage.name for stage in stages]
+        if len(set(names)) != len(names):
+            raise ValueError("Stage names must be unique")
+        for stage in stages:
+            unknown = [i for i in stage.inputs if i not in names]
+            if unknown:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {unknown}")
+
+        self.stages = stages
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+        self.profile_dir = profile_dir  # If set, every stage that runs is profiled into it
+        self.memory_profiler = memory_profiler  # If set, records the memory use of every stage that runs
+        # Profiled stages run one at a time so that each profile only covers its own stage
+        self.max_workers = 1 if profile_dir or memory_profiler else max_workers
+        self.timings: Dict[str, Dict[str, Any]] = {}
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Run all stages and return their outputs keyed by stage name.
+
+        Raises:
+            StageFailed: If a stage fails; stages already running are finished first
+        """
+        results: Dict[str, Any] = {}
+        pending = list(self.stages)
+        failure: Optional[BaseException] = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running = {}
+            while pending or running:
+                if failure is None:
+                    for stage in [s for s in pending if all(i in results for i in s.inputs)]:
+                        pending.remove(stage)
+                        inputs = {name: results[name] for name in stage.inputs}
+                        running[pool.submit(self._run_stage, stage, inputs)] = stage
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    try:
+                        results[stage.name] = future.result()
+                    except Exception as exc:  # pylint: disable=broad-except
+                        failure = failure or exc
+
+        if failure is not None:
+            if isinstance(failure, StageFailed):
+                raise failure
+            raise StageFailed(f"{type(failure).__name__}: {failure}") from failure
+        return results
+
+    def _run_stage(self, stage: Stage, inputs: Dict[str, Any]) -> Any:
+        """Run one stage, or load its output from the stage cache."""
+        start_wall = time.perf_counter()
+        start_cpu = time.thread_time()
+
+        fingerprint = stage.fingerprint(inputs) if stage.cacheable else None
+        output = self._load_cached(stage, fingerprint) if fingerprint and self.use_cache else None
+        cached = output is not None
+        if not cached:
+            if self.memory_profiler:
+                output = self.memory_profiler.call(stage.name, self._call_stage,
+                                                   {'stage': stage, 'inputs': inputs})
+            else:
+                output = self._call_stage(stage, inputs)
+            if not isinstance(output, stage.output_type):
+                raise StageFailed(
+                    f"Stage '{stage.name}' returned {type(output).__name__}, "
+                    f"expected {stage.output_type.__name__}"
+                )
+            if fingerprint:
+                self._save_cached(stage, fingerprint, output)
+
+        self.timings[stage.name] = {
+            'wall_seconds': time.perf_counter() - start_wall,
+            'cpu_seconds': time.thread_time() - start_cpu,
+            'cached': cached,
+            'cacheable': stage.cacheable,
+        }
+        return output
+
+    def _call_stage(self, stage: Stage, inputs: Dict[str, Any]) -> Any:
+        if self.profile_dir:
+            return profile_call(stage.name, stage.func, inputs, self.profile_dir)
+        return stage.func(**inputs)
+
+    def _cache_path(self, stage: Stage) -> str:
+        return os.path.join(self.cache_dir, f"{stage.name}.pickle")
+
+    def _load_cached(self, stage: Stage, fingerprint: str) -> Any:
+        """Return the cached output if it was produced from the same inputs."""
+        try:
+            with open(self._cache_path(stage), 'rb') as f:
+                cached = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if cached.get('fingerprint') != fingerprint or not isinstance(cached.get('output'), stage.output_type):
+            return None
+        return cached['output']
+
+    def _save_cached(self, stage: Stage, fingerprint: str, output: Any) -> None:
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(self._cache_path(stage), 'wb') as f:
+                pickle.dump({'fingerprint': fingerprint, 'output': output}, f)
+        except OSError as e:
+            print(f"Could not cache output of stage '{stage.name}': {e}")
+
+    def print_timings(self) -> None:
+        """Print wall and CPU time per stage."""
+        print("\nStage timings:")
+        for stage in self.stages:
+            timing = self.timings.get(stage.name)
+            if timing is None:
+                print(f"  {stage.name:<16} not run")
+                continue
+            note = " (cached)" if timing['cached'] else ""
+            print(f"  {stage.name:<16} {timing['wall_seconds']:8.2f}s wall "
+                  f"{timing['cpu_seconds']:8.2f}s cpu{note}")
@@ -0,0 +1,199 @@
+"""Per-stage cProfile dumps, collapsed-stack output for flame graphs, and memory profiles."""
+
+import cProfile
+import json
+import os
+import pstats
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# pstats function key: (filename, line number, function name)
+FuncKey = Tuple[str, int, str]
+
+# Deepest stack written to a collapsed-stack file, and the smallest share of
+# time (in seconds) worth following, which keeps the walk from exploding on
+# call graphs with many paths
+MAX_STACK_DEPTH = 64
+MIN_STACK_SECONDS = 1e-5
+
+# Allocation sites listed per stage in a memory profile
+MEMORY_TOP_SITES = 10
+
+
+def profile_call(name: str, func: Callable[..., Any], kwargs: Dict[str, Any], out_dir: str) -> Any:
+    """
+    Call func under cProfile and write <name>.pstats and <name>.collapsed to out_dir.
+
+    Only one profiler can be active at a time on newer Python versions, so
+    profiled stages must not run concurrently.
+    """
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, **kwargs)
+    finally:
+        os.makedirs(out_dir, exist_ok=True)
+        profiler.dump_stats(os.path.join(out_dir, f"{name}.pstats"))
+        write_collapsed_stacks(pstats.Stats(profiler), os.path.join(out_dir, f"{name}.collapsed"))
+
+
+def _label(func: FuncKey) -> str:
+    filename, line, name = func
+    if filename == '~':
+        return name  # built-in function, e.g. <built-in method builtins.len>
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def collapse_stacks(stats: pstats.Stats) -> Dict[str, int]:
+    """
+    Turn a call-graph profile into collapsed stacks with self time in microseconds.
+
+    cProfile records caller/callee pairs rather than full stacks, so stacks
+    are rebuilt by walking down from the functions without callers. A
+    function's self time is split between its call sites in proportion to
+    the cumulative time each caller spent in it, which is exact for tree-like
+    call graphs and an approximation where functions are shared. Recursive
+    calls are cut at the first repetition.
+    """
+    raw = stats.stats  # type: ignore[attr-defined]
+    callees: Dict[FuncKey, List[Tuple[FuncKey, float]]] = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, (_, _, _, edge_cumulative) in callers.items():
+            callees.setdefault(caller, []).append((func, edge_cumulative))
+
+    stacks: Dict[str, int] = {}
+
+    def walk(func: FuncKey, share: float, path: List[str], seen: set) -> None:
+        _, _, self_time, cumulative, _ = raw[func]
+        path = path + [_label(func)]
+        micros = int(self_time * share * 1e6)
+        if micros:
+            key = ';'.join(path)
+            stacks[key] = stacks.get(key, 0) + micros
+        if len(path) >= MAX_STACK_DEPTH or not cumulative:
+            return
+        for callee, edge_cumulative in callees.get(func, []):
+            if callee in seen or callee not in raw:
+                continue
+            callee_cumulative = raw[callee][3]
+            if callee_cumulative:
+                # Part of the callee's time spent under this call site
+                callee_share = share * min(1.0, edge_cumulative / callee_cumulative)
+                if callee_cumulative * callee_share >= MIN_STACK_SECONDS:
+                    walk(callee, callee_share, path, seen | {callee})
+
+    for func, (_, _, _, _, callers) in raw.items():
+        if not callers:
+            walk(func, 1.0, [], {func})
+    return stacks
+
+
+def write_collapsed_stacks(stats: pstats.Stats, path: str) -> None:
+    """Write collapsed stacks ("a;b;c <microseconds>" per line) for flamegraph.pl or speedscope."""
+    stacks = collapse_stacks(stats)
+    with open(path, 'w', encoding='utf-8') as f:
+        for stack, micros in sorted(stacks.items()):
+            f.write(f"{stack} {micros}\n")
+
+
+def _short_path(filename: str) -> str:
+    """Path relative to the working directory for files below it, else unchanged."""
+    relative = os.path.relpath(filename)
+    return filename if relative.startswith('..') else relative
+
+
+class MemoryProfiler:
+    """Peak and retained memory per pipeline stage, traced with tracemalloc.
+
+    For each stage it records the peak of traced memory while the stage ran,
+    the memory still allocated when it finished (its output and anything else
+    kept alive, including earlier stages' outputs) and the allocation sites
+    holding the most of it. Points inside a stage can be recorded with mark().
+    Python 3.8 cannot reset the traced peak, so there the peak of a stage is
+    the highest traced memory since tracing started. Tracing slows Python code down several times, so timings of a
+    memory-profiled run are not representative.
+    """
+
+    def __init__(self, top_sites: int = MEMORY_TOP_SITES):
+        self.top_sites = top_sites
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self._stage: Optional[str] = None
+        self._stage_start_bytes = 0
+        self._started_tracing = False
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def stop(self) -> None:
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def call(self, name: str, func: Callable[..., Any], kwargs: Dict[str, Any]) -> Any:
+        """Call func as stage name and record its memory use. Stages must not run concurrently."""
+        self._stage = name
+        self._stage_start_bytes = tracemalloc.get_traced_memory()[0]
+        if hasattr(tracemalloc, 'reset_peak'):  # Python 3.9+
+            tracemalloc.reset_peak()
+        try:
+            return func(**kwargs)
+        finally:
+            self._record(name)
+            self._stage = None
+
+    def mark(self, label: str) -> None:
+        """
+        Record memory at a point inside the running stage, as "<stage>:<label>".
+
+        Marks repeated with the same label (e.g. once per chunk) keep the
+        measurement with the most memory retained.
+        """
+        if self._stage is None:
+            return
+        name = f"{self._stage}:{label}"
+        previous = self.records.get(name)
+        if previous is None or tracemalloc.get_traced_memory()[0] > previous['retained_bytes']:
+            self._record(name)
+
+    def _record(self, name: str) -> None:
+        # Read the counters before the snapshot, which allocates memory itself
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<unknown>'),
+        ))
+        self.records[name] = {
+            'peak_bytes': peak,
+            'retained_bytes': current,
+            'retained_increase_bytes': current - self._stage_start_bytes,
+            'top_sites': [
+                {
+                    'site': f"{_short_path(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+                    'size_bytes': stat.size,
+                    'count': stat.count,
+                }
+                for stat in snapshot.statistics('lineno')[:self.top_sites]
+            ],
+        }
+
+    def report(self) -> str:
+        """Human-readable summary: peak and retained memory per stage, and the top allocation sites."""
+        lines = [f"{'Peak MiB':>9}  {'Retained MiB':>12}  {'Added MiB':>9}  Stage"]
+        for name, record in self.records.items():
+            lines.append(f"{record['peak_bytes'] / 2**20:9.1f}  {record['retained_bytes'] / 2**20:12.1f}  "
+                         f"{record['retained_increase_bytes'] / 2**20:9.1f}  {name}")
+        for name, record in self.records.items():
+            lines.append(f"\nLargest allocations alive after {name}:")
+            lines.extend(f"  {site['size_bytes'] / 2**20:9.2f} MiB  {site['count']:>9,} blocks  {site['site']}"
+                         for site in record['top_sites'])
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path: str) -> None:
+        """Write the records of all stages to a JSON file."""
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.records, f, ensure_ascii=False, indent=2)
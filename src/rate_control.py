@@ -0,0 +1,72 @@
+"""Request rate controllers for the API transport."""
+
+import threading
+import time
+
+
+class FixedRateController:
+    """Constant request rate: the conservative mode."""
+
+    mode = 'fixed'
+
+    def __init__(self, rate: float):
+        self.rate = rate
+
+    def record(self, latency: float, outcome: str) -> None:
+        """Observations do not change a fixed rate."""
+
+    def describe(self) -> str:
+        return f"{self.rate:.2f} req/s (fixed)"
+
+
+class AdaptiveRateController:
+    """Request rate tuned by additive increase, multiplicative decrease (AIMD).
+
+    Every fast, successful request raises the rate by increase_step req/s up
+    to max_rate, the hard ceiling. A request slower than latency_target, a
+    maxlag/429/503 answer or a failed request cuts the rate by decrease_factor,
+    at most once per cooldown so that one congestion episode, which usually
+    hits several requests in a row, only counts once.
+    """
+
+    mode = 'adaptive'
+
+    def __init__(self, rate: float, min_rate: float, max_rate: float, latency_target: float,
+                 increase_step: float = 0.1, decrease_factor: float = 0.5, cooldown: float = 5.0):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate = min(max(rate, min_rate), max_rate)
+        self.latency_target = latency_target
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.decreases = 0
+        self._last_decrease = float('-inf')
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, outcome: str) -> None:
+        """
+        Update the rate from one finished request.
+
+        Args:
+            latency: Seconds until the response arrived
+            outcome: 'ok', 'lagged' (maxlag, 429 or 503) or 'error'
+        """
+        with self._lock:
+            if outcome == 'ok' and latency <= self.latency_target:
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+                return
+
+            now = time.monotonic()
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            old_rate = self.rate
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self.decreases += 1
+            reason = outcome if outcome != 'ok' else f"latency {latency:.1f}s"
+        print(f"  Slowing down API requests: {old_rate:.2f} -> {self.rate:.2f} req/s ({reason})")
+
+    def describe(self) -> str:
+        return (f"{self.rate:.2f} req/s (adaptive, {self.min_rate:g}-{self.max_rate:g}, "
+                f"{self.decreases} slowdowns)")
@@ -1,7 +1,9 @@
 """Generator for creating wikitext reports from collected data."""
 
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Set
+from .metrics import timed
+from .suggested_index import qid_number
 from .config import CATEGORY_PREFIX, CONTEST_YEAR, NEW_USER_EDIT_THRESHOLD, NEW_USER_REFERENCE_DATE
 
 
@@ -11,6 +13,7 @@ class ReportGenerator:
     def __init__(self):
         pass
 
+    @timed('report_generation_seconds', report='wikitext_table')
     def generate_wikitext_table(self, articles_data: List[Dict[str, Any]],
                                title: str = "Konkursā iesniegtie raksti") -> str:
         """
@@ -210,6 +213,7 @@ class ReportGenerator:
 
         return stats
 
+    @timed('report_generation_seconds', report='contest_categories')
     def generate_contest_categories_report(self, articles_data: List[Dict[str, Any]]) -> str:
         """Generate a report for different contest categories."""
         if not articles_data:
@@ -348,6 +352,57 @@ class ReportGenerator:
 
         return report
 
+    @timed('report_generation_seconds', report='review')
+    def generate_review_report(self, articles_data: List[Dict[str, Any]]) -> str:
+        """
+        Generate notes for the jury, kept out of the published reports.
+
+        Lists eligible articles whose 'Sievietes' topic disagrees with their
+        Wikidata item ('is_woman_biography' from the Wikidata claims; articles
+        whose item is not classified yet are left out), and articles without
+        an item whose title matches the label of a suggested item
+        ('label_match'). Those are not counted as from the suggested lists
+        until the jury confirms them by linking the item.
+
+        Returns:
+            The notes in the plain-text format of the validation report, or
+            an empty string if there is nothing to review
+        """
+        tagged_not_women = []
+        untagged_women = []
+        for article in articles_data:
+            if not article.get('eligible_for_contest', False):
+                continue
+            if not article.get('participant', '').strip() or article.get('readable_length', 0) < 1500:
+                continue
+            is_woman = article.get('is_woman_biography')
+            tagged = 'Sievietes' in article.get('topics', [])
+            if tagged and is_woman is False:
+                tagged_not_women.append(article)
+            elif not tagged and is_woman:
+                untagged_women.append(article)
+
+        report = []
+        for heading, articles in (
+                ("TOPIC 'Sievietes' BUT NOT A WOMAN'S BIOGRAPHY ON WIKIDATA:", tagged_not_women),
+                ("WOMAN'S BIOGRAPHY ON WIKIDATA WITHOUT TOPIC 'Sievietes':", untagged_women)):
+            if articles:
+                report.append(heading)
+                for article in sorted(articles, key=lambda a: a['title']):
+                    report.append(f"  🔍 {article['title']} ({article['participant'].strip()}, {article['wikidata_id']})")
+                report.append("")
+
+        label_matches = sorted((a for a in articles_data if a.get('label_match')), key=lambda a: a['title'])
+        if label_matches:
+            report.append("NOT LINKED TO WIKIDATA, TITLE MATCHES A SUGGESTED ITEM (not counted as suggested):")
+            for article in label_matches:
+                countries = ', '.join(article.get('label_match_countries', []))
+                report.append(f"  🔍 {article['title']} ({article.get('participant', '').strip()}, "
+                              f"{article['label_match']}: {countries})")
+            report.append("")
+        return "\n".join(report)
+
+    @timed('report_generation_seconds', report='participants')
     def generate_participant_report(self, articles_data: List[Dict[str, Any]]) -> str:
         """Generate a report organized by participants."""
         if not articles_data:
@@ -391,6 +446,51 @@ class ReportGenerator:
 
         return wikitext
 
+    @timed('report_generation_seconds', report='suggested_coverage')
+    def generate_suggested_coverage_report(self, suggested_by_country: Dict[str, Set[str]],
+                                           items: Dict[str, Dict[str, Any]]) -> str:
+        """
+        Generate a report of which suggested items already have an article and which are still open.
+
+        Args:
+            suggested_by_country: Suggested Q-IDs per country
+            items: Result of WikidataClient.resolve_sitelinks() for the suggested Q-IDs
+        """
+        if not suggested_by_country:
+            return "Nav atrasti ieteiktie raksti.\n"
+
+        all_ids = set().union(*suggested_by_country.values())
+        written = {qid for qid in all_ids if items.get(qid, {}).get('sitelink')}
+        deleted = {qid for qid in all_ids if items.get(qid, {}).get('missing')}
+        unknown = all_ids - set(items)
+        open_total = len(all_ids) - len(written) - len(deleted) - len(unknown)
+        share = len(written) / len(all_ids) * 100
+
+        report = "== Ieteikto rakstu pārklājums ==\n"
+        report += (f"Ieteikti {len(all_ids)} Vikidatu elementi, no tiem {len(written)} ({share:.1f}%) "
+                   f"jau ir raksts latviešu Vikipēdijā, vēl jāuzraksta {open_total}.\n")
+        if deleted:
+            report += f"''{len(deleted)} ieteiktie elementi Vikidatos ir dzēsti.''\n"
+        if unknown:
+            report += f"''{len(unknown)} ieteiktos elementus neizdevās pārbaudīt.''\n"
+        report += "\n"
+
+        for country, qids in sorted(suggested_by_country.items()):
+            open_ids = sorted((qid for qid in qids if qid in items and not items[qid]['sitelink']
+                               and not items[qid]['missing']), key=qid_number)
+            country_written = len(qids & written)
+            report += f"=== {country} ({country_written}/{len(qids)} uzrakstīti) ===\n"
+            if not open_ids:
+                report += "''Visi ieteiktie raksti ir uzrakstīti.''\n\n"
+                continue
+            report += "Vēl jāuzraksta:\n"
+            for qid in open_ids:
+                label = items[qid].get('label')
+                report += f"* [[d:{qid}|{label}]] ({qid})\n" if label else f"* [[d:{qid}|{qid}]]\n"
+            report += "\n"
+
+        return report
+
     def save_report(self, content: str, filename: str) -> bool:
         """Save report content to a file."""
         try:
@@ -1,36 +1,76 @@
-"""Module for collecting suggested article Wikidata IDs from Meta-Wiki pages."""
+"""Module for collecting suggested article Wikidata IDs from Meta-Wiki."""
 
+import json
+import os
 import requests
 import re
-from typing import Set, List, Dict
-from .config import USER_AGENT, API_RATE_LIMIT, META_WIKI_API_URL, STRUCTURE_PAGE_PREFIX, CONTEST_YEAR
-import time
+from typing import Any, Iterator, Set, List, Dict, Optional
+from .api_transport import ApiRequestError, ApiTransport, get_default_transport
+from .metrics import get_metrics, timed
+from .config import META_WIKI_API_URL, STRUCTURE_PAGE_PREFIX, CONTEST_YEAR
+
+# Start of a suggestion table: {{#invoke:WikimediaCEETable|table or {{#invoke:UCDMtable|table
+_TABLE_START = re.compile(r'\{\{\s*#invoke:\s*(?:WikimediaCEETable|UCDMtable)\s*\|\s*table', re.IGNORECASE)
+# Template braces, and comments matched as a whole so that braces inside them are ignored
+_BRACES = re.compile(r'\{\{|\}\}|<!--.*?(?:-->|$)', re.DOTALL)
+# A table row whose value is a Q-ID, possibly after comments and followed by a
+# note ("|Q123<!--RO-->", "|<!--MD--> Q123", "|Q123 (RO)"). Comments are
+# matched (with an empty group) so that rows inside them are skipped.
+_QID_ROW = re.compile(r'<!--.*?(?:-->|$)|\|\s*(?:<!--.*?(?:-->|$)\s*)*(Q[0-9]+)(?![0-9A-Za-z_])', re.DOTALL)
+
+
+def iter_wikidata_ids(content: str) -> Iterator[str]:
+    """
+    Yield the Q-IDs listed in the suggestion tables of a structure page.
+
+    Braces are matched in a single scan of each table, so templates nested
+    inside a table do not end it early and their own parameters are not read
+    as table rows. The rows between nested templates are matched by one
+    precompiled regex. Q-IDs are yielded in page order and may repeat; an
+    unterminated table yields nothing.
+    """
+    position = 0
+    while True:
+        table = _TABLE_START.search(content, position)
+        if not table:
+            return
+        depth = 1
+        rows_start = table.end()  # start of the current stretch of the table's own rows
+        for token in _BRACES.finditer(content, table.end()):
+            text = token.group()
+            if text == '{{':
+                if depth == 1:
+                    yield from filter(None, _QID_ROW.findall(content, rows_start, token.start()))
+                depth += 1
+            elif text == '}}':
+                depth -= 1
+                if depth == 1:
+                    rows_start = token.end()
+                elif depth == 0:
+                    yield from filter(None, _QID_ROW.findall(content, rows_start, token.start()))
+                    position = token.end()
+                    break
+        else:
+            return
 
 
 class SuggestedArticlesCollector:
     """Collector for suggested article Wikidata IDs from Meta-Wiki."""
 
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({'User-Agent': USER_AGENT})
-        self.last_request_time = 0
+    def __init__(self, transport: Optional[ApiTransport] = None, cache_file: Optional[str] = None):
+        self.transport = transport or get_default_transport()
+        self.session = self.transport.session
         self.meta_api_url = META_WIKI_API_URL
-
-    def _rate_limit(self):
-        """Enforce rate limiting between API requests."""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        min_interval = 1.0 / API_RATE_LIMIT
-
-        if time_since_last < min_interval:
-            time.sleep(min_interval - time_since_last)
-
-        self.last_request_time = time.time()
+        # Q-IDs extracted from each structure page, keyed by the page's revision ID
+        self.cache_file = cache_file
 
     def _make_request(self, params: Dict) -> Dict:
-        """Make a request to the Meta-Wiki API with rate limiting."""
-        self._rate_limit()
+        """
+        Make a request to the Meta-Wiki API through the shared transport.
 
+        Raises:
+            ApiRequestError: If the request still fails after the transport's retries
+        """
         # Add common parameters
         params.update({
             'action': params.get('action', 'query'),
@@ -39,12 +79,9 @@ class SuggestedArticlesCollector:
         })
 
         try:
-            response = self.session.get(self.meta_api_url, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
-            print(f"Meta-Wiki API request failed: {e}")
-            return {}
+            return self.transport.get_json(self.meta_api_url, params)
+        except (requests.RequestException, ValueError) as e:
+            raise ApiRequestError(f"Meta-Wiki API request failed: {e}") from e
 
     def get_page_content(self, title: str) -> str:
         """Get the content of a Meta-Wiki page."""
@@ -75,30 +112,10 @@ class SuggestedArticlesCollector:
 
         return ""
 
+    @timed('wikidata_id_extraction_seconds')
     def extract_wikidata_ids_from_content(self, content: str) -> Set[str]:
-        """Extract Wikidata IDs from page content."""
-        wikidata_ids = set()
-
-        # Pattern to match both {{#invoke:WikimediaCEETable|table...}} and {{#invoke:UCDMtable|table...}} with multiline content
-        pattern = r'\{\{#invoke:(?:WikimediaCEETable|UCDMtable)\|table[^}]*?\}\}'
-
-        matches = re.findall(pattern, content, re.IGNORECASE | re.DOTALL)
-
-        for match in matches:
-            # Remove HTML comments and extract Q-IDs
-            # First remove HTML comments like <!--RO--> or <!--MD-->
-            clean_match = re.sub(r'<!--[^>]*?-->', '', match)
-
-            # Split by | and extract Q-IDs
-            parts = clean_match.split('|')
-            for part in parts:
-                part = part.strip()
-                # Remove any trailing }} or other non-alphanumeric characters
-                part = re.sub(r'[^Q0-9]', '', part)
-                if part.startswith('Q') and len(part) > 1 and part[1:].isdigit():
-                    wikidata_ids.add(part)
-
-        return wikidata_ids
+        """Extract Wikidata IDs from the {{#invoke:WikimediaCEETable|table...}} and UCDMtable blocks of a page."""
+        return set(iter_wikidata_ids(content))
 
     def get_suggested_countries(self) -> List[str]:
         """Get list of countries that have structure pages from Meta-Wiki API, excluding redirects."""
@@ -138,6 +155,54 @@ class SuggestedArticlesCollector:
         print(f"Found {len(countries)} non-redirect structure pages on Meta-Wiki")
         return countries
 
+    def get_structure_page_revisions(self) -> Dict[str, int]:
+        """Get the latest revision ID of every non-redirect structure page, without content."""
+        params = {
+            'action': 'query',
+            'generator': 'allpages',
+            'gapprefix': STRUCTURE_PAGE_PREFIX,
+            'gaplimit': '500',
+            'gapfilterredir': 'nonredirects',
+            'prop': 'info'
+        }
+
+        revisions: Dict[str, int] = {}
+        while True:
+            data = self._make_request(dict(params))
+            for page in data.get('query', {}).get('pages', []):
+                if 'missing' not in page and 'redirect' not in page:
+                    revisions[page['title']] = page['lastrevid']
+            if 'continue' not in data:
+                break
+            params.update(data['continue'])
+
+        return dict(sorted(revisions.items()))
+
+    def _load_page_cache(self) -> Dict[str, Dict[str, Any]]:
+        """Return the cached {title: {'revid': ..., 'ids': [...]}} of structure pages."""
+        if not self.cache_file:
+            return {}
+        try:
+            with open(self.cache_file, encoding='utf-8') as f:
+                return json.load(f).get('pages', {})
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def _save_page_cache(self, pages: Dict[str, Dict[str, Any]]) -> None:
+        """Write the structure page cache atomically."""
+        if not self.cache_file:
+            return
+        try:
+            parent = os.path.dirname(self.cache_file)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            tmp_path = f"{self.cache_file}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'pages': pages}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_file)
+        except OSError as e:
+            print(f"Error saving structure page cache: {e}")
+
     def get_pages_content(self, titles: List[str]) -> Dict[str, str]:
         """Get content of multiple Meta-Wiki pages in batches of 50."""
         if not titles:
@@ -171,30 +236,52 @@ class SuggestedArticlesCollector:
         return results
 
     def collect_all_suggested_wikidata_ids(self) -> Dict[str, Set[str]]:
-        """Collect all suggested Wikidata IDs from all country structure pages."""
-        countries = self.get_suggested_countries()
+        """
+        Collect all suggested Wikidata IDs from all country structure pages.
+
+        With a cache_file, only the revision IDs of the structure pages are
+        fetched on every run; pages are downloaded and extracted again only
+        when their revision differs from the cached one.
+        """
+        revisions = self.get_structure_page_revisions()
+        print(f"Found {len(revisions)} non-redirect structure pages on Meta-Wiki")
         all_suggested_ids = {}
         total_ids = set()
 
         print("Collecting suggested article Wikidata IDs from Meta-Wiki...")
 
-        page_titles = [f"{STRUCTURE_PAGE_PREFIX}{country}" for country in countries]
-        all_contents = self.get_pages_content(page_titles)
-
-        for country in countries:
-            page_title = f"{STRUCTURE_PAGE_PREFIX}{country}"
-            content = all_contents.get(page_title, "")
+        cached_pages = self._load_page_cache()
+        changed_titles = {title for title, revid in revisions.items()
+                          if cached_pages.get(title, {}).get('revid') != revid}
+        if self.cache_file:
+            metrics = get_metrics()
+            for title in revisions:
+                metrics.cache_lookup('structure_page', title not in changed_titles)
+            print(f"  {len(changed_titles)} structure pages changed, "
+                  f"{len(revisions) - len(changed_titles)} unchanged since the last run")
+        all_contents = self.get_pages_content([t for t in revisions if t in changed_titles])
+
+        pages = {}
+        for page_title, revid in revisions.items():
+            country = page_title[len(STRUCTURE_PAGE_PREFIX):]
+            if page_title in all_contents:
+                wikidata_ids = self.extract_wikidata_ids_from_content(all_contents[page_title])
+                # The content may be slightly newer than revid; that only costs a refetch next time
+                pages[page_title] = {'revid': revid, 'ids': sorted(wikidata_ids)}
+            elif page_title in changed_titles:
+                print(f"  Could not fetch content for {country}")
+                continue
+            else:
+                pages[page_title] = cached_pages[page_title]
+                wikidata_ids = set(pages[page_title]['ids'])
 
-            if content:
-                wikidata_ids = self.extract_wikidata_ids_from_content(content)
-                if wikidata_ids:
-                    all_suggested_ids[country] = wikidata_ids
-                    total_ids.update(wikidata_ids)
-                else:
-                    print(f"  ⚠️  WARNING: No Wikidata IDs found for {country} - page may be empty or have formatting issues")
+            if wikidata_ids:
+                all_suggested_ids[country] = wikidata_ids
+                total_ids.update(wikidata_ids)
             else:
-                print(f"  Could not fetch content for {country}")
+                print(f"  ⚠️  WARNING: No Wikidata IDs found for {country} - page may be empty or have formatting issues")
 
+        self._save_page_cache(pages)
         print(f"\nTotal suggested articles collected: {len(total_ids)}")
         print(f"Countries with suggested articles: {len(all_suggested_ids)}")
 
@@ -0,0 +1,179 @@
+"""Compact index of the suggested Wikidata items and the countries suggesting them."""
+
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Binary file layout: magic, item count, country link count, country names
+# length in bytes, then the arrays and the newline-separated country names.
+# Arrays are stored in native byte order; the file is a local cache.
+_MAGIC = b'CEESIDX1'
+_HEADER = struct.Struct('<8sIII')
+
+# Q-numbers go up to about 130 million and fit in 32 bits ('I' is 4 bytes
+# on all supported platforms); at most 65535 countries
+_ID_TYPE = 'I'
+_COUNTRY_TYPE = 'H'
+
+
+def qid_number(wikidata_id: Optional[str]) -> Optional[int]:
+    """Return the number of a Q-ID ("Q42" -> 42), or None if it is not one."""
+    if not wikidata_id or wikidata_id[0] not in 'Qq' or not wikidata_id[1:].isdigit():
+        return None
+    return int(wikidata_id[1:])
+
+
+class SuggestedIndex:
+    """Suggested Wikidata items as a sorted integer array.
+
+    ids holds the Q-numbers of all suggested items in ascending order. The
+    countries suggesting ids[i] are country_links[offsets[i]:offsets[i + 1]],
+    as indices into the sorted list of country names. Tens of thousands of
+    items take a few hundred kilobytes instead of several megabytes of
+    strings, sets and lists, and the arrays pickle or save as plain bytes.
+    """
+
+    def __init__(self, ids: Optional[array] = None, offsets: Optional[array] = None,
+                 country_links: Optional[array] = None, countries: Optional[List[str]] = None):
+        self.ids = ids if ids is not None else array(_ID_TYPE)
+        self.offsets = offsets if offsets is not None else array(_ID_TYPE, [0])
+        self.country_links = country_links if country_links is not None else array(_COUNTRY_TYPE)
+        self.countries = countries or []
+
+    @classmethod
+    def from_countries(cls, suggested_by_country: Dict[str, Iterable[str]]) -> 'SuggestedIndex':
+        """Build the index from Q-ID strings per country, skipping anything that is not a Q-ID."""
+        countries = sorted(suggested_by_country)
+        pairs: Set[Tuple[int, int]] = set()
+        for country_index, country in enumerate(countries):
+            for wikidata_id in suggested_by_country[country]:
+                number = qid_number(wikidata_id)
+                if number is not None:
+                    pairs.add((number, country_index))
+
+        ids = array(_ID_TYPE)
+        offsets = array(_ID_TYPE)
+        country_links = array(_COUNTRY_TYPE)
+        for number, country_index in sorted(pairs):
+            if not ids or ids[-1] != number:
+                ids.append(number)
+                offsets.append(len(country_links))
+            country_links.append(country_index)
+        offsets.append(len(country_links))
+        return cls(ids, offsets, country_links, countries)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, wikidata_id: Optional[str]) -> bool:
+        return self._position(qid_number(wikidata_id)) >= 0
+
+    def _position(self, number: Optional[int], lo: int = 0) -> int:
+        """Position of a Q-number in ids, or -1."""
+        if number is None:
+            return -1
+        i = bisect_left(self.ids, number, lo)
+        return i if i < len(self.ids) and self.ids[i] == number else -1
+
+    def positions(self, wikidata_ids: Iterable[Optional[str]]) -> List[int]:
+        """
+        Look up a batch of Q-IDs at once.
+
+        The batch is sorted and looked up in a single forward pass over the
+        index, each search starting where the previous one ended.
+
+        Returns:
+            The position of each Q-ID in ids, or -1 where it is not suggested
+        """
+        numbers = [qid_number(wikidata_id) for wikidata_id in wikidata_ids]
+        result = [-1] * len(numbers)
+        lo = 0
+        for number, i in sorted((n, i) for i, n in enumerate(numbers) if n is not None):
+            lo = bisect_left(self.ids, number, lo)
+            if lo == len(self.ids):
+                break
+            if self.ids[lo] == number:
+                result[i] = lo
+        return result
+
+    def contains_many(self, wikidata_ids: Iterable[Optional[str]]) -> List[bool]:
+        """Whether each of a batch of Q-IDs is suggested."""
+        return [position >= 0 for position in self.positions(wikidata_ids)]
+
+    def countries_at(self, position: int) -> List[str]:
+        """Countries suggesting the item at a position returned by positions()."""
+        if position < 0:
+            return []
+        start, end = self.offsets[position], self.offsets[position + 1]
+        return [self.countries[c] for c in self.country_links[start:end]]
+
+    def countries_for(self, wikidata_id: Optional[str]) -> List[str]:
+        """Countries suggesting a Q-ID (empty if it is not suggested)."""
+        return self.countries_at(self._position(qid_number(wikidata_id)))
+
+    def by_country(self) -> Dict[str, Set[str]]:
+        """Return the Q-ID strings per country, as SuggestedArticlesCollector collects them."""
+        result: Dict[str, Set[str]] = {}
+        for position, number in enumerate(self.ids):
+            for country in self.countries_at(position):
+                result.setdefault(country, set()).add(f"Q{number}")
+        return result
+
+    def to_bytes(self) -> bytes:
+        names = '\n'.join(self.countries).encode('utf-8')
+        return b''.join([
+            _HEADER.pack(_MAGIC, len(self.ids), len(self.country_links), len(names)),
+            self.ids.tobytes(), self.offsets.tobytes(), self.country_links.tobytes(), names,
+        ])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'SuggestedIndex':
+        """
+        Load an index written by to_bytes().
+
+        Raises:
+            ValueError: If data is not a valid index
+        """
+        if len(data) < _HEADER.size:
+            raise ValueError("Suggested index is truncated")
+        magic, n_ids, n_links, names_length = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("Not a suggested index")
+
+        def take(typecode: str, count: int, start: int) -> Tuple[array, int]:
+            values = array(typecode)
+            end = start + count * values.itemsize
+            values.frombytes(data[start:end])
+            return values, end
+
+        ids, pos = take(_ID_TYPE, n_ids, _HEADER.size)
+        offsets, pos = take(_ID_TYPE, n_ids + 1, pos)
+        country_links, pos = take(_COUNTRY_TYPE, n_links, pos)
+        if len(data) != pos + names_length:
+            raise ValueError("Suggested index is truncated")
+        names = data[pos:].decode('utf-8')
+        return cls(ids, offsets, country_links, names.split('\n') if names else [])
+
+    def save(self, path: str) -> None:
+        """Write the index to a file, replacing it atomically."""
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(self.to_bytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'SuggestedIndex':
+        """
+        Read an index written by save().
+
+        Raises:
+            OSError: If the file cannot be read
+            ValueError: If the file is not a valid index
+        """
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
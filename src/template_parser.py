@@ -4,6 +4,7 @@ import re
 import mwparserfromhell
 from typing import Dict, List, Optional, Any
 from .config import CONTEST_TEMPLATE
+from .metrics import timed
 
 
 class TemplateParser:
@@ -12,6 +13,7 @@ class TemplateParser:
     def __init__(self):
         pass
 
+    @timed('template_parse_seconds')
     def parse_cee_spring_template(self, wikitext: str, template_name: str = None) -> Optional[Dict[str, Any]]:
         """
         Parse CEE Spring template from wikitext and extract data.
@@ -202,6 +204,23 @@ class TemplateParser:
         if not template_data:
             return None
 
+        return self.build_article_data(article_title, template_data, article_content, page_info)
+
+    @timed('article_parse_seconds')
+    def build_article_data(self, article_title: str, template_data: Dict[str, Any],
+                           article_content: Optional[str], page_info: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Combine already parsed template data with article metrics.
+
+        Args:
+            article_title: Title of the article
+            template_data: Result of parse_cee_spring_template() for the talk page
+            article_content: Content of the article (None or empty skips the readable length)
+            page_info: Page information from MediaWiki API
+
+        Returns:
+            Dictionary with all extracted article data
+        """
         # Calculate readable text length
         readable_length = 0
         if article_content:
@@ -0,0 +1,346 @@
+"""Batched Wikidata entity lookups with a persistent per-item cache."""
+
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+from .api_transport import ApiRequestError, ApiTransport, get_default_transport
+from .config import (WIKIDATA_API_URL, WIKIDATA_BATCH_SIZE, WIKIDATA_SITE, WIKIDATA_INSTANCE_OF,
+                     WIKIDATA_SEX_OR_GENDER, WIKIDATA_HUMAN, WIKIDATA_FEMALE)
+from .metrics import get_metrics
+from .suggested_index import qid_number
+
+
+class EntityCache:
+    """JSON file of per-item data, each entry stored with the item's revision ID.
+
+    Entries are dicts with at least 'revid'. The file is written atomically
+    by save().
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.items: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        """Read the cache file, starting empty if it is missing or unreadable."""
+        if not self.path:
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                items = json.load(f).get('items', {})
+        except (OSError, ValueError, AttributeError):
+            items = {}
+        with self._lock:
+            self.items = items
+
+    def get(self, qid: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self.items.get(qid)
+
+    def put(self, qid: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self.items[qid] = entry
+
+    def retain(self, keys: Iterable[str]) -> None:
+        """Drop every entry whose key is not in keys."""
+        keys = set(keys)
+        with self._lock:
+            self.items = {key: entry for key, entry in self.items.items() if key in keys}
+
+    def save(self) -> None:
+        """Write the cache file atomically."""
+        if not self.path:
+            return
+        try:
+            parent = os.path.dirname(self.path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with self._lock:
+                data = json.dumps({'items': self.items}, ensure_ascii=False)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Error saving Wikidata cache {self.path}: {e}")
+
+
+def _claim_values(claims: Dict[str, Any], prop: str) -> List[str]:
+    """Item IDs that are values of a property, skipping deprecated and unknown values."""
+    values = []
+    for claim in claims.get(prop, []):
+        snak = claim.get('mainsnak', {})
+        if claim.get('rank') == 'deprecated' or snak.get('snaktype') != 'value':
+            continue
+        value = snak.get('datavalue', {}).get('value')
+        if isinstance(value, dict) and 'id' in value:
+            values.append(value['id'])
+    return values
+
+
+def _label(entity: Dict[str, Any], languages: List[str]) -> Tuple[Optional[str], Optional[str]]:
+    """The label in the first of languages that has one, and its language."""
+    labels = entity.get('labels', {})
+    for language in languages:
+        if language in labels:
+            return labels[language]['value'], language
+    return None, None
+
+
+class WikidataClient:
+    """Client for the Wikidata API, fetching entities WIKIDATA_BATCH_SIZE at a time."""
+
+    def __init__(self, transport: Optional[ApiTransport] = None, api_url: str = WIKIDATA_API_URL,
+                 sitelinks_cache_file: Optional[str] = None, claims_cache_file: Optional[str] = None,
+                 titles_cache_file: Optional[str] = None):
+        self.transport = transport or get_default_transport()
+        self.api_url = api_url
+        self.site = WIKIDATA_SITE
+        self.label_languages = ['lv', 'en']
+        self.sitelinks_cache = EntityCache(sitelinks_cache_file)
+        self.claims_cache = EntityCache(claims_cache_file)
+        self.titles_cache = EntityCache(titles_cache_file)
+
+    def _make_request(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Make a request to the Wikidata API through the shared transport.
+
+        Raises:
+            ApiRequestError: If the request fails or the API answers with an error
+        """
+        params.update({'format': 'json'})
+        try:
+            data = self.transport.get_json(self.api_url, params)
+        except (requests.RequestException, ValueError) as e:
+            raise ApiRequestError(f"Wikidata API request failed: {e}") from e
+        if 'error' in data:
+            error = data['error']
+            raise ApiRequestError(f"Wikidata API error: {error.get('code')}: {error.get('info')}")
+        return data
+
+    def get_entities(self, qids: Iterable[str], props: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch entities with wbgetentities, WIKIDATA_BATCH_SIZE per request.
+
+        Args:
+            qids: Item IDs; anything that is not a Q-ID is skipped
+            props: wbgetentities props, e.g. "info|sitelinks|labels"
+
+        Returns:
+            Entity data keyed by the requested Q-ID. Redirected items are
+            returned under the requested ID; deleted items have a 'missing' key.
+        """
+        wanted = sorted({qid for qid in qids if qid_number(qid) is not None}, key=qid_number)
+        entities: Dict[str, Dict[str, Any]] = {}
+        for i in range(0, len(wanted), WIKIDATA_BATCH_SIZE):
+            batch = wanted[i:i + WIKIDATA_BATCH_SIZE]
+            params = {
+                'action': 'wbgetentities',
+                'ids': '|'.join(batch),
+                'props': props,
+            }
+            if 'sitelinks' in props:
+                params['sitefilter'] = self.site
+            if 'labels' in props:
+                params['languages'] = '|'.join(self.label_languages)
+            data = self._make_request(params)
+            for qid, entity in data.get('entities', {}).items():
+                redirect = entity.get('redirects')
+                entities[redirect['from'] if redirect else qid] = entity
+        return entities
+
+    def _resolve(self, cache: EntityCache, qids: Iterable[str], props: str,
+                 make_entry: Callable[[Dict[str, Any]], Dict[str, Any]],
+                 reusable: Callable[[Dict[str, Any]], bool], what: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up items through a cache, fetching only those not reusable from it.
+
+        Args:
+            cache: Cache of the entries made by make_entry
+            props: wbgetentities props of the fetched items
+            make_entry: Cache entry for a fetched entity
+            reusable: Whether a cached entry can be used without fetching the item
+            what: Name of the looked up data, for metrics and the summary line
+        """
+        qids = {qid for qid in qids if qid_number(qid) is not None}
+        cache.load()
+        metrics = get_metrics()
+
+        resolved: Dict[str, Dict[str, Any]] = {}
+        to_fetch = []
+        for qid in qids:
+            entry = cache.get(qid)
+            if entry and reusable(entry):
+                resolved[qid] = entry
+            else:
+                to_fetch.append(qid)
+            metrics.cache_lookup(f"wikidata_{what}", qid in resolved)
+
+        for qid, entity in self.get_entities(to_fetch, props).items():
+            entry = make_entry(entity)
+            entry.update(revid=entity.get('lastrevid'), missing='missing' in entity)
+            resolved[qid] = entry
+            cache.put(qid, entry)
+        cache.save()
+
+        print(f"Resolved {what} of {len(qids)} Wikidata items ({len(to_fetch)} fetched, "
+              f"{len(qids) - len(to_fetch)} from cache)")
+        return resolved
+
+    def resolve_sitelinks(self, qids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Find which items have an article on WIKIDATA_SITE.
+
+        Items cached with an article are reused with the revision they were
+        seen at: Wikidata has no cheaper bulk revision check than fetching
+        the items themselves, and an article link is rarely removed. Items
+        without an article (the ones participants may be writing right now)
+        and items not in the cache are fetched on every run, and a newer
+        revision replaces the cached entry.
+
+        Returns:
+            {qid: {'revid': ..., 'sitelink': title or None, 'label': ...,
+            'label_language': ..., 'missing': bool}} for every Q-ID in qids
+        """
+        def make_entry(entity: Dict[str, Any]) -> Dict[str, Any]:
+            sitelink = entity.get('sitelinks', {}).get(self.site)
+            label, label_language = _label(entity, self.label_languages)
+            return {
+                'sitelink': sitelink['title'] if sitelink else None,
+                'label': label,
+                'label_language': label_language,
+            }
+
+        return self._resolve(self.sitelinks_cache, qids, 'info|sitelinks|labels', make_entry,
+                             lambda entry: bool(entry['sitelink'] or entry['missing']), 'sitelinks')
+
+    def resolve_claims(self, qids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Find what the items are: instance of (P31) and, for people, sex or gender (P21).
+
+        As in resolve_sitelinks, complete entries are reused with the
+        revision they were seen at. Items not classified yet (no P31, or a
+        human without P21) are usually new items still being filled in, so
+        they are fetched again on every run along with uncached items.
+
+        Returns:
+            {qid: {'revid': ..., 'instance_of': [Q-IDs], 'sex': [Q-IDs],
+            'missing': bool}} for every Q-ID in qids
+        """
+        def make_entry(entity: Dict[str, Any]) -> Dict[str, Any]:
+            claims = entity.get('claims', {})
+            return {
+                'instance_of': _claim_values(claims, WIKIDATA_INSTANCE_OF),
+                'sex': _claim_values(claims, WIKIDATA_SEX_OR_GENDER),
+            }
+
+        def reusable(entry: Dict[str, Any]) -> bool:
+            if entry['missing']:
+                return True
+            return bool(entry['instance_of']) and (WIKIDATA_HUMAN not in entry['instance_of'] or bool(entry['sex']))
+
+        return self._resolve(self.claims_cache, qids, 'info|claims', make_entry, reusable, 'claims')
+
+    def resolve_titles(self, titles: Iterable[str]) -> Dict[str, str]:
+        """
+        Find the items of articles on WIKIDATA_SITE by their titles.
+
+        Meant for the articles whose page props do not name an item yet:
+        wbgetentities looks up sitelinks directly, WIKIDATA_BATCH_SIZE
+        titles per request. Found items are cached, and the cache keeps only
+        the titles of the last call, so an entry is dropped once its article
+        is linked. Titles without an item are looked up again on every run.
+
+        Returns:
+            {title: qid} for the titles that have an item
+        """
+        titles = sorted(set(titles))
+        cache = self.titles_cache
+        cache.load()
+        metrics = get_metrics()
+
+        found: Dict[str, str] = {}
+        to_fetch = []
+        for title in titles:
+            entry = cache.get(title)
+            if entry:
+                found[title] = entry['id']
+            else:
+                to_fetch.append(title)
+            metrics.cache_lookup('wikidata_titles', entry is not None)
+
+        for i in range(0, len(to_fetch), WIKIDATA_BATCH_SIZE):
+            data = self._make_request({
+                'action': 'wbgetentities',
+                'sites': self.site,
+                'titles': '|'.join(to_fetch[i:i + WIKIDATA_BATCH_SIZE]),
+                'props': 'info|sitelinks',
+                'sitefilter': self.site,
+            })
+            for qid, entity in data.get('entities', {}).items():
+                sitelink = entity.get('sitelinks', {}).get(self.site)
+                if 'missing' in entity or not sitelink:
+                    continue
+                found[sitelink['title']] = qid
+                cache.put(sitelink['title'], {'id': qid, 'revid': entity.get('lastrevid')})
+        cache.retain(titles)
+        cache.save()
+
+        if titles:
+            print(f"Found Wikidata items of {len(found)} of {len(titles)} unlinked articles "
+                  f"({len(to_fetch)} titles looked up, {len(titles) - len(to_fetch)} from cache)")
+        return found
+
+
+def match_labels(titles: Iterable[str], items: Dict[str, Dict[str, Any]], language: str = 'lv') -> Dict[str, str]:
+    """
+    Match article titles to the labels of items that have no article yet.
+
+    A new article may not be linked on Wikidata at all. If its title equals
+    the label in language of exactly one such item (up to the case of the
+    first letter, which MediaWiki titles always capitalise), the article is
+    probably about it. The match is a guess for the jury to confirm, not a
+    link.
+
+    Args:
+        titles: Titles of articles without an item
+        items: resolve_sitelinks() entries, e.g. of the suggested items
+        language: Language of the labels to match, that of the wiki
+
+    Returns:
+        {title: qid} for the matched titles
+    """
+    by_label: Dict[str, Optional[str]] = {}
+    for qid, entry in items.items():
+        if (entry['label'] and entry.get('label_language') == language
+                and not entry['sitelink'] and not entry['missing']):
+            label = entry['label'][:1].upper() + entry['label'][1:]
+            by_label[label] = None if label in by_label else qid  # ambiguous labels match nothing
+
+    matched = {}
+    for title in titles:
+        qid = by_label.get(title)
+        if qid:
+            matched[title] = qid
+    return matched
+
+
+def is_woman(entry: Optional[Dict[str, Any]]) -> Optional[bool]:
+    """
+    Whether a resolve_claims() entry describes a woman.
+
+    Returns:
+        None if the item is unknown or not classified yet
+    """
+    if not entry or entry['missing'] or not entry['instance_of']:
+        return None
+    if WIKIDATA_HUMAN not in entry['instance_of']:
+        return False
+    if not entry['sex']:
+        return None
+    return any(sex in WIKIDATA_FEMALE for sex in entry['sex'])
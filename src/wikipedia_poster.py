@@ -1,43 +1,201 @@
 """Wikipedia page editor for posting CEE Spring stats between marker comments."""
 
+import hashlib
+import json
+import os
+import mwparserfromhell
 import requests
-from typing import Optional
-from .config import MEDIAWIKI_API_URL, USER_AGENT
+from typing import Any, Dict, List, Optional, Tuple
+from .api_transport import ApiTransport, get_default_transport
+from .metrics import get_metrics
+from .config import MEDIAWIKI_API_URL, SESSION_FILE
+
+
+def content_hash(text: str) -> str:
+    """Return a stable hash of wikitext, ignoring surrounding whitespace."""
+    return hashlib.sha256(text.strip().encode('utf-8')).hexdigest()
+
+
+def locate_marker_section(text: str, begin_marker: str, end_marker: str) -> Optional[Tuple[int, int, int]]:
+    """
+    Find the smallest editable section that contains both markers.
+
+    Sections are numbered the way MediaWiki numbers them for section=N edits:
+    0 is the lead, and each section includes its subsections.
+
+    Returns:
+        Tuple of (section index, start offset, end offset), or None if the
+        markers are missing or not inside a single section
+    """
+    begin_pos = text.find(begin_marker)
+    end_pos = text.find(end_marker)
+    if begin_pos == -1 or end_pos == -1:
+        return None
+    end_pos += len(end_marker)
+
+    starts, levels = [], []
+    offset = 0
+    sections = mwparserfromhell.parse(text).get_sections(include_lead=True, flat=True)
+    for i, section in enumerate(sections):
+        headings = section.filter_headings(recursive=False)
+        starts.append(offset)
+        levels.append(headings[0].level if i > 0 and headings else 0)
+        offset += len(str(section))
+    starts.append(len(text))
+
+    found = None
+    for i in range(len(levels)):
+        end = starts[i + 1]
+        if i > 0:
+            j = i + 1
+            while j < len(levels) and levels[j] > levels[i]:
+                j += 1
+            end = starts[j]
+        if starts[i] <= begin_pos and end_pos <= end:
+            found = (i, starts[i], end)
+    return found
 
 
 class WikipediaPoster:
     """Handles authentication and section editing of Wikipedia pages."""
 
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({'User-Agent': USER_AGENT})
+    def __init__(self, session_file: Optional[str] = SESSION_FILE, transport: Optional[ApiTransport] = None):
+        self.transport = transport or get_default_transport()
+        self.session = self.transport.session
+        self.api_url = MEDIAWIKI_API_URL
         self.logged_in = False
+        self.session_file = session_file
+        self.csrf_token: Optional[str] = None
+        self._login_token: Optional[str] = None
+        self._page_cache: Dict[str, str] = {}
 
-    def login(self, username: str, password: str) -> bool:
+    def _load_session(self) -> bool:
+        """Load saved session cookies. Returns True if any cookies were loaded."""
+        if not self.session_file or not os.path.exists(self.session_file):
+            return False
+        try:
+            with open(self.session_file, encoding='utf-8') as f:
+                cookies = json.load(f)
+            for cookie in cookies:
+                self.session.cookies.set(
+                    cookie['name'], cookie['value'],
+                    domain=cookie.get('domain', ''), path=cookie.get('path', '/'),
+                    expires=cookie.get('expires'), secure=cookie.get('secure', False),
+                )
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            print(f"Ignoring unreadable session file: {exc}")
+            return False
+        return bool(cookies)
+
+    def _save_session(self) -> None:
+        """Save session cookies to a file readable only by the current user."""
+        if not self.session_file:
+            return
+        cookies = [
+            {
+                'name': c.name, 'value': c.value, 'domain': c.domain,
+                'path': c.path, 'expires': c.expires, 'secure': c.secure,
+            }
+            for c in self.session.cookies
+        ]
+        try:
+            parent = os.path.dirname(self.session_file)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            fd = os.open(self.session_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(cookies, f)
+            os.chmod(self.session_file, 0o600)
+        except OSError as exc:
+            print(f"Could not save session: {exc}")
+
+    def prefetch(self, titles: Optional[List[str]] = None) -> Optional[str]:
         """
-        Log in to Wikipedia using a bot password.
+        Fetch tokens, the current user and page contents in a single query.
+
+        The CSRF token and page contents are kept for the following edits, so
+        update_between_markers() needs no extra read requests.
 
         Args:
-            username: Bot username (format: Username@BotName for BotPasswords)
-            password: Bot password
+            titles: Page titles whose wikitext should be fetched along with the tokens
 
         Returns:
-            True if login succeeded, False otherwise
+            Name of the logged-in user, or None for an anonymous session or on error
         """
-        # Step 1: get login token
         params = {
             'action': 'query',
-            'meta': 'tokens',
-            'type': 'login',
+            'meta': 'tokens|userinfo',
+            'type': 'csrf|login',
             'format': 'json',
+            'formatversion': '2',
         }
+        if titles:
+            params.update({
+                'prop': 'revisions',
+                'rvprop': 'content|ids|timestamp',
+                'rvslots': 'main',
+                'curtimestamp': '1',
+                'titles': '|'.join(titles),
+            })
         try:
-            resp = self.session.get(MEDIAWIKI_API_URL, params=params, timeout=30)
-            resp.raise_for_status()
-            login_token = resp.json()['query']['tokens']['logintoken']
-        except (requests.RequestException, KeyError) as exc:
-            print(f"Failed to get login token: {exc}")
-            return False
+            resp = self.transport.request(self.api_url, params=params)
+            data = resp.json()
+            query = data['query']
+        except (requests.RequestException, KeyError, ValueError) as exc:
+            print(f"Failed to fetch tokens: {exc}")
+            return None
+
+        tokens = query.get('tokens', {})
+        self._login_token = tokens.get('logintoken')
+
+        normalized = {n['to']: n['from'] for n in query.get('normalized', [])}
+        for page in query.get('pages', []):
+            revision = self._parse_revision(page, data.get('curtimestamp'))
+            if revision:
+                self._page_cache[normalized.get(page['title'], page['title'])] = revision
+
+        userinfo = query.get('userinfo', {})
+        if userinfo.get('anon') or not userinfo.get('id'):
+            self.csrf_token = None
+            return None
+        self.csrf_token = tokens.get('csrftoken')
+        return userinfo.get('name')
+
+    def login(self, username: str, password: str, prefetch_titles: Optional[List[str]] = None) -> bool:
+        """
+        Log in to Wikipedia using a bot password, reusing a saved session if still valid.
+
+        Args:
+            username: Bot username (format: Username@BotName for BotPasswords)
+            password: Bot password
+            prefetch_titles: Pages to fetch together with the CSRF token
+
+        Returns:
+            True if login succeeded, False otherwise
+        """
+        account = username.split('@')[0]
+        if self._load_session():
+            if self.prefetch(prefetch_titles) == account:
+                self.logged_in = True
+                self._save_session()
+                print(f"Reusing saved session for {account}")
+                return True
+
+        # Step 1: get login token (already fetched if a saved session was checked)
+        login_token = self._login_token
+        if not login_token:
+            params = {
+                'action': 'query',
+                'meta': 'tokens',
+                'type': 'login',
+                'format': 'json',
+            }
+            try:
+                resp = self.transport.request(self.api_url, params=params)
+                login_token = resp.json()['query']['tokens']['logintoken']
+            except (requests.RequestException, KeyError) as exc:
+                print(f"Failed to get login token: {exc}")
+                return False
 
         # Step 2: log in
         login_data = {
@@ -48,8 +206,7 @@ class WikipediaPoster:
             'format': 'json',
         }
         try:
-            resp = self.session.post(MEDIAWIKI_API_URL, data=login_data, timeout=30)
-            resp.raise_for_status()
+            resp = self.transport.request(self.api_url, data=login_data)
             result = resp.json()
         except (requests.RequestException, KeyError) as exc:
             print(f"Login request failed: {exc}")
@@ -57,7 +214,10 @@ class WikipediaPoster:
 
         if result.get('login', {}).get('result') == 'Success':
             self.logged_in = True
+            self._login_token = None
+            self._save_session()
             print(f"Logged in as {result['login'].get('lgusername', username)}")
+            self.prefetch(prefetch_titles)
             return True
 
         reason = result.get('login', {}).get('reason', 'unknown error')
@@ -65,36 +225,63 @@ class WikipediaPoster:
         return False
 
     def _get_csrf_token(self) -> Optional[str]:
-        """Get a CSRF (edit) token from the current session."""
+        """Get a CSRF (edit) token, reusing the one fetched earlier in this session."""
+        if self.csrf_token:
+            return self.csrf_token
         params = {
             'action': 'query',
             'meta': 'tokens',
             'format': 'json',
         }
         try:
-            resp = self.session.get(MEDIAWIKI_API_URL, params=params, timeout=30)
-            resp.raise_for_status()
-            return resp.json()['query']['tokens']['csrftoken']
+            resp = self.transport.request(self.api_url, params=params)
+            self.csrf_token = resp.json()['query']['tokens']['csrftoken']
+            return self.csrf_token
         except (requests.RequestException, KeyError) as exc:
             print(f"Failed to get CSRF token: {exc}")
             return None
 
-    def get_page_content(self, title: str) -> Optional[str]:
-        """Fetch the raw wikitext of a page."""
+    @staticmethod
+    def _parse_revision(page: Dict[str, Any], curtimestamp: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Extract content and edit-conflict metadata from a revisions query page."""
+        try:
+            revision = page['revisions'][0]
+            return {
+                'content': revision['slots']['main']['content'],
+                'revid': revision.get('revid'),
+                'timestamp': revision.get('timestamp'),
+                'starttimestamp': curtimestamp,
+            }
+        except (KeyError, IndexError):
+            return None
+
+    def get_page_revision(self, title: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch the latest revision of a page, using prefetched data when available.
+
+        Returns:
+            Dictionary with 'content', 'revid', 'timestamp' and 'starttimestamp',
+            or None if the page could not be fetched
+        """
+        get_metrics().cache_lookup('prefetched_page', title in self._page_cache)
+        if title in self._page_cache:
+            return self._page_cache.pop(title)
+
         params = {
             'action': 'query',
             'prop': 'revisions',
-            'rvprop': 'content',
+            'rvprop': 'content|ids|timestamp',
             'rvslots': 'main',
+            'curtimestamp': '1',
             'titles': title,
             'format': 'json',
             'formatversion': '2',
         }
         try:
-            resp = self.session.get(MEDIAWIKI_API_URL, params=params, timeout=30)
-            resp.raise_for_status()
-            pages = resp.json()['query']['pages']
-        except (requests.RequestException, KeyError) as exc:
+            resp = self.transport.request(self.api_url, params=params)
+            data = resp.json()
+            pages = data['query']['pages']
+        except (requests.RequestException, KeyError, ValueError) as exc:
             print(f"Failed to fetch page '{title}': {exc}")
             return None
 
@@ -106,11 +293,15 @@ class WikipediaPoster:
             print(f"Page not found: {title}")
             return None
 
-        try:
-            return page['revisions'][0]['slots']['main']['content']
-        except (KeyError, IndexError) as exc:
-            print(f"Unexpected page structure: {exc}")
-            return None
+        revision = self._parse_revision(page, data.get('curtimestamp'))
+        if revision is None:
+            print(f"Unexpected page structure for '{title}'")
+        return revision
+
+    def get_page_content(self, title: str) -> Optional[str]:
+        """Fetch the raw wikitext of a page, using prefetched content when available."""
+        revision = self.get_page_revision(title)
+        return revision['content'] if revision else None
 
     def update_between_markers(
         self,
@@ -123,6 +314,10 @@ class WikipediaPoster:
         """
         Replace the text between begin_marker and end_marker on a Wikipedia page.
 
+        Only the section holding the markers is resubmitted, and the edit carries
+        the base revision and start timestamp so that a concurrent edit is
+        reported as a conflict instead of being overwritten.
+
         Args:
             title: Full page title (e.g. "Vikipēdija:CEE_Spring_2026/Statistika")
             new_content: New wikitext to place between the markers
@@ -137,10 +332,16 @@ class WikipediaPoster:
             print("Not logged in — call login() first")
             return False
 
-        current = self.get_page_content(title)
-        if current is None:
+        revision = self.get_page_revision(title)
+        if revision is None:
             return False
 
+        # Narrow the edit to the section that holds the markers
+        current = revision['content']
+        section = locate_marker_section(current, begin_marker, end_marker)
+        if section is not None:
+            current = current[section[1]:section[2]]
+
         begin_pos = current.find(begin_marker)
         end_pos = current.find(end_marker)
 
@@ -155,6 +356,12 @@ class WikipediaPoster:
             return False
 
         after_begin = begin_pos + len(begin_marker)
+
+        # Skip the token and edit round-trips when the block is already current
+        if content_hash(current[after_begin:end_pos]) == content_hash(new_content):
+            print("No change — page content was already up to date")
+            return True
+
         updated = (
             current[:after_begin]
             + "\n"
@@ -163,24 +370,29 @@ class WikipediaPoster:
             + current[end_pos:]
         )
 
-        csrf_token = self._get_csrf_token()
-        if not csrf_token:
-            return False
-
         edit_data = {
             'action': 'edit',
             'title': title,
             'text': updated,
             'summary': summary,
-            'token': csrf_token,
+            'nocreate': '1',
             'format': 'json',
         }
-        try:
-            resp = self.session.post(MEDIAWIKI_API_URL, data=edit_data, timeout=60)
-            resp.raise_for_status()
-            result = resp.json()
-        except (requests.RequestException, KeyError) as exc:
-            print(f"Edit request failed: {exc}")
+        if section is not None:
+            edit_data['section'] = str(section[0])
+        if revision.get('revid'):
+            edit_data['baserevid'] = str(revision['revid'])
+        if revision.get('timestamp'):
+            edit_data['basetimestamp'] = revision['timestamp']
+        if revision.get('starttimestamp'):
+            edit_data['starttimestamp'] = revision['starttimestamp']
+
+        result = self._post_edit(edit_data)
+        if result is None:
+            return False
+
+        if result.get('error', {}).get('code') == 'editconflict':
+            print(f"Edit conflict on '{title}' — page changed since it was read, not overwriting")
             return False
 
         if result.get('edit', {}).get('result') == 'Success':
@@ -194,3 +406,22 @@ class WikipediaPoster:
 
         print(f"Edit failed: {result}")
         return False
+
+    def _post_edit(self, edit_data: Dict[str, str]) -> Optional[Dict]:
+        """POST an edit, refreshing the CSRF token once if the cached one was rejected."""
+        for attempt in range(2):
+            csrf_token = self._get_csrf_token()
+            if not csrf_token:
+                return None
+            try:
+                resp = self.transport.request(self.api_url, data={**edit_data, 'token': csrf_token})
+                result = resp.json()
+            except (requests.RequestException, ValueError) as exc:
+                print(f"Edit request failed: {exc}")
+                return None
+
+            if result.get('error', {}).get('code') == 'badtoken' and attempt == 0:
+                self.csrf_token = None
+                continue
+            return result
+        return None
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""End-to-end benchmarks with performance budgets.
+
+Times Wikidata ID extraction from the structure pages, template parsing,
+readable-length computation, validation, each report generator and a whole
+offline run (against the fake MediaWiki API in tests/fake_mediawiki.py) on
+synthetic contests of 1k, 10k and 100k articles,
+and records the peak traced memory of each and the API requests of the crawl.
+
+Results are written as JSON. Given the results of an earlier run as a
+baseline, the benchmark fails when time, memory or request count regressed
+by more than the tolerances in TOLERANCES:
+
+    python tests/benchmark.py --sizes 1000 10000 --output output/benchmarks/baseline.json
+    # ... change the code ...
+    python tests/benchmark.py --sizes 1000 10000 --baseline output/benchmarks/baseline.json
+"""
+
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.config import NEW_USER_EDIT_THRESHOLD  # noqa: E402
+from src.data_validator import DataValidator  # noqa: E402
+from src.metrics import get_metrics  # noqa: E402
+from src.report_generator import ReportGenerator  # noqa: E402
+from src.suggested_articles import SuggestedArticlesCollector  # noqa: E402
+from src.template_parser import TemplateParser  # noqa: E402
+from tests.fake_mediawiki import FakeMediaWikiServer, SyntheticContest, offline_stats  # noqa: E402
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_OUTPUT = "output/benchmarks/benchmark_{timestamp}.json"
+
+# Allowed growth over the baseline, as a share of the baseline value. Any
+# extra API request is a regression, since the crawl is deterministic.
+TOLERANCES = {'seconds': 0.25, 'peak_bytes': 0.10, 'requests_total': 0.0}
+# Timings shorter than this are mostly noise; differences below it never fail
+MIN_SECONDS_DELTA = 0.05
+
+
+def _measure(func: Callable[[], Any], repeat: int, memory: bool) -> Dict[str, Any]:
+    """
+    Best wall time of repeat calls of func, and the peak traced memory of one more call.
+
+    Memory is measured in a separate call because tracemalloc slows the
+    traced code down several times.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    result: Dict[str, Any] = {'seconds': round(best, 4)}
+    if memory:
+        result['peak_bytes'] = _peak_memory(func)
+    return result
+
+
+def _peak_memory(func: Callable[[], Any]) -> int:
+    """Peak memory in bytes allocated by Python during a call of func."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _build_articles(contest: SyntheticContest, readable_lengths: List[int]) -> List[Dict[str, Any]]:
+    """Enriched article data as the validation and report stages get it."""
+    parser = TemplateParser()
+    articles = []
+    for i, readable_length in enumerate(readable_lengths):
+        data = contest.article(i)
+        template_data = {'participant': data['participant'], 'topics': data['topics'],
+                         'countries': data['countries']}
+        page_info = {'pageid': i + 1, 'size': readable_length * 2, 'wikidata_id': data['wikidata_id']}
+        article = parser.build_article_data(data['title'], template_data, None, page_info)
+        article['readable_length'] = readable_length
+        article['from_suggested_list'] = data['suggested']
+        article['suggested_countries'] = data['countries'][:1] if data['suggested'] else []
+        article['edit_count'] = contest.edit_count(data['participant'])
+        article['is_new_user'] = article['edit_count'] < NEW_USER_EDIT_THRESHOLD
+        articles.append(article)
+    return articles
+
+
+def benchmark_components(contest: SyntheticContest, repeat: int = 3, memory: bool = True) -> Dict[str, Any]:
+    """Benchmark the parsing, validation and report steps on the articles of a contest."""
+    parser = TemplateParser()
+    reporter = ReportGenerator()
+    n = contest.n_articles
+    talk_texts = [contest.talk_text(i) for i in range(n)]
+    results: Dict[str, Any] = {}
+
+    # Structure pages list 30% of the articles between them, so the largest
+    # ones grow with the contest size
+    collector = SuggestedArticlesCollector()
+    structure_pages = [contest.structure_page_text(country) for country in contest.structure_countries]
+    results['wikidata_id_extraction'] = _measure(
+        lambda: [collector.extract_wikidata_ids_from_content(text) for text in structure_pages], repeat, memory)
+
+    results['template_parsing'] = _measure(
+        lambda: [parser.parse_cee_spring_template(text) for text in talk_texts], repeat, memory)
+
+    # Article texts are generated one at a time (keeping 100k of them would
+    # take gigabytes), so only the calls themselves are timed
+    readable_lengths: List[int] = []
+
+    def readable_length() -> float:
+        readable_lengths.clear()
+        busy = 0.0
+        for i in range(n):
+            text = contest.article_text(i)
+            start = time.perf_counter()
+            readable_lengths.append(parser.calculate_readable_text_length(text))
+            busy += time.perf_counter() - start
+        return busy
+
+    busy = min(readable_length() for _ in range(repeat))
+    results['readable_length'] = {'seconds': round(busy, 4)}
+    if memory:
+        results['readable_length']['peak_bytes'] = _peak_memory(readable_length)
+
+    articles = _build_articles(contest, readable_lengths)
+    results['validation'] = _measure(lambda: DataValidator().validate_articles_data(articles), repeat, memory)
+    validated = DataValidator().validate_articles_data(articles)[0]
+    for name, generate in (('report_wikitext_table', reporter.generate_wikitext_table),
+                           ('report_participants', reporter.generate_participant_report),
+                           ('report_contest_categories', reporter.generate_contest_categories_report)):
+        results[name] = _measure(lambda: generate(validated), repeat, memory)
+    return results
+
+
+def _serve(n_articles: int, urls: Any) -> None:
+    """Serve a synthetic contest until the process is terminated."""
+    server = FakeMediaWikiServer(SyntheticContest(n_articles)).start()
+    urls.put(server.url)
+    threading.Event().wait()
+
+
+def benchmark_offline_run(n_articles: int, memory: bool = True) -> Dict[str, Any]:
+    """
+    Time a whole run against the fake API and count the API requests it makes.
+
+    The fake API runs in its own process, so its work and memory are not
+    counted. The run is made once for timing and once more for memory.
+    """
+    context = multiprocessing.get_context('spawn')
+    urls = context.Queue()
+    process = context.Process(target=_serve, args=(n_articles, urls), daemon=True)
+    process.start()
+    try:
+        api_url = urls.get(timeout=60)
+
+        def run() -> None:
+            with tempfile.TemporaryDirectory() as out_dir, contextlib.redirect_stdout(io.StringIO()):
+                if not offline_stats(api_url, out_dir).run(use_cache=False, save_cache=False):
+                    raise RuntimeError("Offline run failed")
+
+        result = _measure(run, 1, memory)
+    finally:
+        process.terminate()
+        process.join()
+
+    # Requests of the last run, as counted by the API transport
+    requests: Dict[str, int] = {}
+    for labels, value in get_metrics().counters.get('api_requests_total', {}).items():
+        label_dict = dict(labels)
+        key = f"{label_dict.get('action', '')}:{label_dict.get('module', '')}"
+        requests[key] = requests.get(key, 0) + int(value)
+    result['requests'] = dict(sorted(requests.items()))
+    result['requests_total'] = sum(requests.values())
+    return result
+
+
+def run_benchmarks(sizes: Sequence[int] = DEFAULT_SIZES, repeat: int = 3, memory: bool = True,
+                   offline_run: bool = True) -> Dict[str, Any]:
+    """Run all benchmarks for each contest size and return the results."""
+    results: Dict[str, Any] = {}
+    for n in sizes:
+        print(f"Benchmarking {n} articles...")
+        size_results = benchmark_components(SyntheticContest(n), repeat, memory)
+        if offline_run:
+            size_results['offline_run'] = benchmark_offline_run(n, memory)
+        for name, result in size_results.items():
+            peak = f", peak {result['peak_bytes'] / 2**20:.1f} MiB" if 'peak_bytes' in result else ""
+            requests = f", {result['requests_total']} API requests" if 'requests_total' in result else ""
+            print(f"  {name}: {result['seconds']:.3f}s{peak}{requests}")
+        results[str(n)] = size_results
+    return {
+        'created': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any],
+                    tolerances: Optional[Dict[str, float]] = None) -> List[str]:
+    """
+    Compare benchmark results with a baseline.
+
+    Only benchmarks and metrics present in both are compared.
+
+    Returns:
+        Descriptions of the regressions beyond the tolerances (empty if none)
+    """
+    tolerances = tolerances or TOLERANCES
+    regressions = []
+    for size, benchmarks in current['results'].items():
+        for name, result in benchmarks.items():
+            base = baseline['results'].get(size, {}).get(name)
+            if not base:
+                continue
+            for metric, tolerance in tolerances.items():
+                if metric not in result or metric not in base:
+                    continue
+                limit = base[metric] * (1 + tolerance)
+                if metric == 'seconds':
+                    limit = max(limit, base[metric] + MIN_SECONDS_DELTA)
+                if result[metric] > limit:
+                    regressions.append(f"{name} ({size} articles): {metric} {result[metric]} > "
+                                       f"{base[metric]} + {tolerance:.0%}")
+    return regressions
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark CEE Spring statistics on synthetic contests')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help='Contest sizes in articles (default: 1000 10000 100000)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed repetitions of each step; the best counts')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the memory measurements')
+    parser.add_argument('--no-offline-run', action='store_true', help='Skip the whole run against the fake API')
+    parser.add_argument('--output', help=f'Results file (default: {DEFAULT_OUTPUT})')
+    parser.add_argument('--baseline', help='Results of an earlier run; exit with status 1 on regressions')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.repeat, not args.no_memory, not args.no_offline_run)
+
+    output = args.output or DEFAULT_OUTPUT.format(timestamp=datetime.now().strftime('%Y%m%d_%H%M%S'))
+    parent = os.path.dirname(output)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to: {output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, results)
+        if regressions:
+            print("Performance regressions:")
+            for regression in regressions:
+                print(f"  ❌ {regression}")
+            sys.exit(1)
+        print(f"✅ No regressions against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
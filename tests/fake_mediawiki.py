@@ -0,0 +1,661 @@
+#!/usr/bin/env python3
+"""Local stand-in for the MediaWiki API, backed by a synthetic CEE Spring contest.
+
+Implements the subset of the API the tool uses (embeddedin, revisions,
+info|pageprops, categories, usercontribs, users, allpages, tokens, userinfo,
+login, edit and Wikidata's wbgetentities) over real HTTP, so the API clients can be run, load-tested
+and benchmarked offline. Latency, HTTP 503 errors and maxlag answers can be
+injected.
+
+Usage in tests:
+
+    with FakeMediaWikiServer(SyntheticContest(n_articles=1000)) as server:
+        client = MediaWikiClient(api_url=server.url)
+
+Standalone:
+
+    python tests/fake_mediawiki.py --articles 10000 --port 8080
+"""
+
+import functools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import mwparserfromhell
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.config import (  # noqa: E402
+    CONTEST_TEMPLATE, STRUCTURE_PAGE_PREFIX, ALLOWED_CONTEST_COUNTRIES, NEW_USER_EDIT_THRESHOLD,
+)
+
+TALK_PREFIX = 'Diskusija:'
+TIMESTAMP = '2026-04-01T12:00:00Z'
+# MediaWiki's default $wgAPIMaxResultSize
+MAX_RESULT_BYTES = 8 * 1024 * 1024
+
+TOPICS = ['Vēsture', 'Sievietes', 'Kultūra', 'Ģeogrāfija', 'Sports', 'Māksla', 'Zinātne', 'Politika']
+WORDS = (
+    'pilsēta upe gads karalis valsts baznīca vēsture kultūra iedzīvotāji teritorija karš '
+    'miers zinātne māksla mūzika rakstnieks gleznotājs universitāte parks ezers kalns ciems '
+    'tirgus osta ceļš tilts pils muzejs teātris valoda tauta reģions likums vara ekonomika'
+).split()
+LINK_TARGETS = ['Eiropa', 'Rīga', 'Viduslaiki', 'Otrais pasaules karš', 'Padomju Savienība', 'Baltijas jūra']
+
+
+class SyntheticContest:
+    """Deterministic synthetic contest: tagged articles with talk pages, participants and suggestion lists.
+
+    Page text is generated on demand from the seed and the article number,
+    so even 100k articles take little memory.
+    """
+
+    def __init__(self, n_articles: int = 1000, seed: int = 0, n_participants: Optional[int] = None,
+                 suggested_share: float = 0.3, n_structure_countries: int = 8):
+        self.n_articles = n_articles
+        self.seed = seed
+        self.suggested_share = suggested_share
+        self.titles = [f"Sintētisks raksts {i}" for i in range(n_articles)]
+        self._index = {title: i for i, title in enumerate(self.titles)}
+        n_participants = n_participants or max(5, n_articles // 20)
+        self.participants = [f"Dalībnieks {k}" for k in range(n_participants)]
+        self._participant_set = set(self.participants)
+        self.structure_countries = ALLOWED_CONTEST_COUNTRIES[:n_structure_countries]
+
+    def _rng(self, *key: Any) -> random.Random:
+        return random.Random(':'.join(str(k) for k in (self.seed,) + key))
+
+    def index(self, title: str) -> Optional[int]:
+        """Article number of a title, or None."""
+        return self._index.get(title)
+
+    @functools.lru_cache(maxsize=4096)
+    def article(self, i: int) -> Dict[str, Any]:
+        """Template fields and Wikidata item of article i."""
+        rng = self._rng('article', i)
+        countries = rng.sample(self.structure_countries, rng.choice([1, 1, 1, 2]))
+        if rng.random() < 0.05:
+            countries.append('Latvija')  # not a contest country
+        return {
+            'title': self.titles[i],
+            'participant': rng.choice(self.participants),
+            'topics': rng.sample(TOPICS, rng.choice([1, 1, 2, 3])),
+            'countries': countries,
+            'wikidata_id': f"Q{100000 + i}",
+            'suggested': rng.random() < self.suggested_share,
+        }
+
+    def talk_text(self, i: int) -> str:
+        """Talk page with the contest template."""
+        data = self.article(i)
+        lines = [f"{{{{{CONTEST_TEMPLATE}", f"|dalībnieks = {data['participant']}"]
+        for n, topic in enumerate(data['topics'], 1):
+            lines.append(f"|tēma{n if n > 1 else ''} = {topic}")
+        for n, country in enumerate(data['countries'], 1):
+            lines.append(f"|valsts{n if n > 1 else ''} = {country}")
+        return '\n'.join(lines) + '\n}}\n'
+
+    def _sentence(self, rng: random.Random) -> str:
+        words = [rng.choice(WORDS) for _ in range(rng.randint(6, 18))]
+        if rng.random() < 0.3:
+            words[rng.randrange(len(words))] = f"[[{rng.choice(LINK_TARGETS)}]]"
+        sentence = ' '.join(words).capitalize() + '.'
+        if rng.random() < 0.2:
+            sentence += f"<ref>{{{{Tīmekļa atsauce|url=https://example.org/{rng.randint(1, 10**6)}|title=Avots}}}}</ref>"
+        return sentence
+
+    @functools.lru_cache(maxsize=4096)
+    def article_text(self, i: int) -> str:
+        """Article wikitext: infobox, lead, sections with links and references, categories."""
+        rng = self._rng('text', i)
+        data = self.article(i)
+        # Mostly short articles, with a long tail of very long ones
+        n_sections = min(60, int(rng.lognormvariate(1.2, 0.8)) + 1)
+        parts = [
+            f"{{{{Infokaste vieta\n| nosaukums = {data['title']}\n| valsts = {data['countries'][0]}\n}}}}",
+            f"'''{data['title']}''' " + ' '.join(self._sentence(rng) for _ in range(rng.randint(2, 5))),
+        ]
+        for s in range(n_sections):
+            parts.append(f"== {rng.choice(WORDS).capitalize()} {s + 1} ==")
+            for _ in range(rng.randint(1, 4)):
+                parts.append(' '.join(self._sentence(rng) for _ in range(rng.randint(3, 8))))
+        parts.append("== Atsauces ==\n{{atsauces}}")
+        parts.extend(f"[[Kategorija:{topic}]]" for topic in data['topics'])
+        return '\n\n'.join(parts) + '\n'
+
+    @functools.cached_property
+    def _suggested_lists(self) -> Dict[str, List[str]]:
+        lists: Dict[str, List[str]] = {country: [] for country in self.structure_countries}
+        for i in range(self.n_articles):
+            data = self.article(i)
+            if data['suggested']:
+                lists[data['countries'][0]].append(data['wikidata_id'])
+        for country, ids in lists.items():
+            rng = self._rng('structure', country)
+            ids.extend(f"Q{rng.randint(1, 99999)}" for _ in range(20))  # items nobody wrote about
+        return lists
+
+    def structure_page_text(self, country: str) -> str:
+        """Meta-Wiki structure page listing the suggested Wikidata items of a country."""
+        rng = self._rng('structure_text', country)
+        rows = '\n'.join(f"|{qid}<!--{rng.choice(TOPICS)}-->" if rng.random() < 0.3 else f"|{qid}"
+                         for qid in self._suggested_lists[country])
+        # Real tables have headers with nested templates, which must not end the table early
+        header = f"|caption = {{{{lang|lv|{country}}}}} {{{{small|Q0}}}}"
+        return f"== {country} ==\n{{{{#invoke:WikimediaCEETable|table\n{header}\n{rows}\n}}}}\n"
+
+    def suggested_ids(self) -> Dict[str, set]:
+        """Expected result of collecting the suggestion lists."""
+        return {country: set(ids) for country, ids in self._suggested_lists.items()}
+
+    def item(self, qid: str) -> Optional[Dict[str, Any]]:
+        """Wikidata item: revision, lvwiki article, label, instance of (P31) and
+        sex (P21), or None if it does not exist."""
+        number = int(qid[1:]) if qid[:1] == 'Q' and qid[1:].isdigit() else 0
+        if 100000 <= number < 100000 + self.n_articles:
+            i = number - 100000
+            title = self.titles[i]
+            # Articles on the women topic are mostly women's biographies, the
+            # rest partly biographies of men; a few items are not classified yet
+            rng = self._rng('item', i)
+            if rng.random() < 0.05:
+                instance_of, sex = [], []
+            elif 'Sievietes' in self.article(i)['topics'] and rng.random() < 0.9:
+                instance_of, sex = ['Q5'], ['Q6581072']
+            elif rng.random() < 0.3:
+                instance_of, sex = ['Q5'], ['Q6581097']
+            else:
+                instance_of, sex = ['Q515'], []
+            return {'revid': 3 * 10 ** 6 + number, 'sitelink': title, 'label': title,
+                    'instance_of': instance_of, 'sex': sex}
+        if 0 < number < 100000:
+            # Suggested items nobody has written about yet
+            return {'revid': number, 'sitelink': None, 'label': f"Elements {number}",
+                    'instance_of': ['Q515'], 'sex': []}
+        return None
+
+    def edit_count(self, user: str) -> Optional[int]:
+        """Edits a participant made before the contest, or None for unknown users."""
+        if user not in self._participant_set:
+            return None
+        rng = self._rng('user', user)
+        if rng.random() < 0.2:
+            return rng.randint(0, NEW_USER_EDIT_THRESHOLD - 1)
+        return rng.randint(NEW_USER_EDIT_THRESHOLD, 50000)
+
+
+class FakeMediaWikiApi:
+    """Answers API requests from a SyntheticContest plus pages created by edits."""
+
+    def __init__(self, contest: SyntheticContest, latency: float = 0.0, error_rate: float = 0.0,
+                 maxlag_rate: float = 0.0, seed: int = 0, max_result_bytes: int = MAX_RESULT_BYTES):
+        self.contest = contest
+        self.latency = latency
+        self.error_rate = error_rate
+        self.maxlag_rate = maxlag_rate
+        self.max_result_bytes = max_result_bytes
+        self.pages: Dict[str, Dict[str, Any]] = {}  # pages created or changed by edits
+        self.items: Dict[str, Dict[str, Any]] = {}  # Wikidata items changed by set_sitelink
+        self.unlinked: Set[str] = set()  # articles served without page props, as before they are updated
+        self.sessions: Dict[str, str] = {}  # session cookie -> user name
+        self.requests: List[Dict[str, str]] = []
+        self.edits: List[Dict[str, str]] = []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._next_revid = 10 ** 7
+
+    # -- Pages ---------------------------------------------------------------
+
+    def set_page(self, title: str, text: str) -> int:
+        """Create or replace a page, returning its new revision ID."""
+        with self._lock:
+            self._next_revid += 1
+            self.pages[title] = {'text': text, 'revid': self._next_revid, 'timestamp': TIMESTAMP,
+                                 'pageid': 5 * 10 ** 6 + len(self.pages)}
+            return self._next_revid
+
+    def set_sitelink(self, qid: str, title: str) -> None:
+        """Link a Wikidata item to an lvwiki article, as when someone writes it."""
+        with self._lock:
+            self._next_revid += 1
+            item = dict(self.items.get(qid) or self.contest.item(qid) or {'label': None})
+            item.update(sitelink=title, revid=self._next_revid)
+            self.items[qid] = item
+
+    def set_claims(self, qid: str, instance_of: List[str], sex: List[str]) -> None:
+        """Set instance of (P31) and sex (P21) of a Wikidata item, as when someone classifies it."""
+        with self._lock:
+            self._next_revid += 1
+            item = dict(self.items.get(qid) or self.contest.item(qid) or {'label': None, 'sitelink': None})
+            item.update(instance_of=instance_of, sex=sex, revid=self._next_revid)
+            self.items[qid] = item
+
+    def get_page(self, title: str) -> Optional[Dict[str, Any]]:
+        """Return text, revid, timestamp and pageid of a page, or None if it does not exist."""
+        if title in self.pages:
+            return self.pages[title]
+        talk = title.startswith(TALK_PREFIX)
+        i = self.contest.index(title[len(TALK_PREFIX):] if talk else title)
+        if i is not None:
+            text = self.contest.talk_text(i) if talk else self.contest.article_text(i)
+            return {'text': text, 'revid': 2 * i + 1 + talk, 'timestamp': TIMESTAMP,
+                    'pageid': 2 * i + 1 + talk, 'i': i}
+        if title.startswith(STRUCTURE_PAGE_PREFIX):
+            country = title[len(STRUCTURE_PAGE_PREFIX):]
+            if country in self.contest.structure_countries:
+                return {'text': self.contest.structure_page_text(country), 'revid': 1, 'timestamp': TIMESTAMP,
+                        'pageid': 9 * 10 ** 6 + self.contest.structure_countries.index(country)}
+        return None
+
+    # -- Request handling ----------------------------------------------------
+
+    def handle(self, params: Dict[str, str], session: Optional[str]) -> Tuple[int, Dict[str, str], Dict[str, Any]]:
+        """Answer one request. Returns the HTTP status, extra headers and the JSON body."""
+        with self._lock:
+            self.requests.append(dict(params))
+            fail = self._rng.random() < self.error_rate
+            lagged = self._rng.random() < self.maxlag_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            return 503, {'Retry-After': '0'}, {'error': {'code': 'internal_api_error', 'info': 'Injected error'}}
+        if lagged and 'maxlag' in params:
+            return 200, {'MediaWiki-API-Error': 'maxlag', 'Retry-After': '0', 'X-Database-Lag': '7'}, {
+                'error': {'code': 'maxlag', 'info': 'Waiting for a database server: 7 seconds lagged.'}
+            }
+
+        action = params.get('action', '')
+        user = self.sessions.get(session or '')
+        try:
+            if action == 'query':
+                return 200, {}, self._query(params, user)
+            if action == 'login':
+                return self._login(params)
+            if action == 'edit':
+                return 200, {}, self._edit(params, user)
+            if action == 'wbgetentities':
+                return 200, {}, self._wbgetentities(params)
+        except (KeyError, ValueError) as e:
+            return 200, {'MediaWiki-API-Error': 'badparams'}, {'error': {'code': 'badparams', 'info': str(e)}}
+        return 200, {'MediaWiki-API-Error': 'badvalue'}, {'error': {'code': 'badvalue', 'info': f'action={action}'}}
+
+    def _query(self, params: Dict[str, str], user: Optional[str]) -> Dict[str, Any]:
+        result: Dict[str, Any] = {'batchcomplete': True}
+        query: Dict[str, Any] = {}
+        continue_params: Dict[str, str] = {}
+
+        for module in filter(None, params.get('meta', '').split('|')):
+            if module == 'tokens':
+                types = params.get('type', 'csrf').split('|')
+                query['tokens'] = {f"{t}token": f"{t}-{user or 'anon'}+\\" for t in types}
+            elif module == 'userinfo':
+                query['userinfo'] = {'id': 1, 'name': user} if user else {'id': 0, 'name': '127.0.0.1', 'anon': True}
+
+        list_module = params.get('list')
+        if list_module == 'embeddedin':
+            query['embeddedin'], more = self._embeddedin(params)
+            if more:
+                continue_params['eicontinue'] = more
+        elif list_module == 'usercontribs':
+            count = self.contest.edit_count(params['ucuser'])
+            if count is None:
+                return {'error': {'code': 'baduser_ucuser', 'info': 'Invalid value for user parameter ucuser'}}
+            offset = int(params.get('uccontinue', '0'))
+            limit = int(params.get('uclimit', '10'))
+            batch = range(offset, min(count, offset + limit))
+            query['usercontribs'] = [{'userid': 1, 'user': params['ucuser'], 'revid': n} for n in batch]
+            if offset + limit < count:
+                continue_params['uccontinue'] = str(offset + limit)
+        elif list_module == 'users':
+            query['users'] = []
+            for name in params.get('ususers', '').split('|'):
+                count = self.contest.edit_count(name)
+                query['users'].append({'name': name, 'missing': True} if count is None
+                                      else {'userid': 1, 'name': name, 'editcount': count})
+        elif list_module == 'allpages':
+            query['allpages'], more = self._allpages(params)
+            if more:
+                continue_params['apcontinue'] = more
+
+        if params.get('generator') == 'allpages':
+            # gapprefix, gaplimit, ... are the allpages parameters with a "g" prefix
+            listed, more_pages = self._allpages({k[1:]: v for k, v in params.items() if k.startswith('gap')})
+            if more_pages:
+                continue_params['gapcontinue'] = more_pages
+            params = dict(params, titles='|'.join(page['title'] for page in listed))
+
+        if params.get('titles'):
+            pages, normalized, more = self._pages(params, max_titles=500 if 'generator' in params else 50)
+            # MediaWiki lists normalized titles before the pages
+            if normalized:
+                query['normalized'] = normalized
+            query['pages'] = pages
+            continue_params.update(more)
+        if 'curtimestamp' in params:
+            result['curtimestamp'] = TIMESTAMP
+
+        if continue_params:
+            continue_params['continue'] = '||'
+            result['continue'] = continue_params
+            del result['batchcomplete']
+        result['query'] = query
+        return result
+
+    def _embeddedin(self, params: Dict[str, str]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        if params.get('eititle') != f"Template:{CONTEST_TEMPLATE}":
+            return [], None
+        offset = int(params.get('eicontinue', '1|0').split('|')[1])
+        limit = min(500, int(params.get('eilimit', '10')))
+        titles = self.contest.titles[offset:offset + limit]
+        pages = [{'pageid': 2 * (offset + n) + 2, 'ns': 1, 'title': f"{TALK_PREFIX}{t}"} for n, t in enumerate(titles)]
+        more = f"1|{offset + limit}" if offset + limit < len(self.contest.titles) else None
+        return pages, more
+
+    def _allpages(self, params: Dict[str, str]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        prefix = params.get('apprefix', '')
+        titles = sorted(
+            [f"{STRUCTURE_PAGE_PREFIX}{c}" for c in self.contest.structure_countries] + self.contest.titles
+            + [t for t in self.pages if ':' not in t]
+        )
+        titles = [t for t in titles if t.startswith(prefix) and t >= params.get('apcontinue', '')]
+        limit = min(500, int(params.get('aplimit', '10')))
+        more = titles[limit] if len(titles) > limit else None
+        return [{'pageid': self.get_page(t)['pageid'], 'ns': 0, 'title': t} for t in titles[:limit]], more
+
+    def _pages(self, params: Dict[str, str],
+               max_titles: int = 50) -> Tuple[List[Dict[str, Any]], List[Dict[str, str]], Dict[str, str]]:
+        requested = params['titles'].split('|')
+        if len(requested) > max_titles:
+            raise ValueError('Too many values supplied for parameter "titles". The limit is 50.')
+        props = params.get('prop', '').split('|')
+        normalized = []
+        pages = []
+        more: Dict[str, str] = {}
+        budget = self.max_result_bytes
+        rv_start = int(params.get('rvcontinue', '0'))
+
+        for position, title in enumerate(requested):
+            canonical = title.replace('_', ' ')
+            if canonical != title:
+                normalized.append({'fromencoded': False, 'from': title, 'to': canonical})
+            page = self.get_page(canonical)
+            ns = 1 if canonical.startswith(TALK_PREFIX) else 0
+            if page is None:
+                pages.append({'ns': ns, 'title': canonical, 'missing': True})
+                continue
+
+            entry: Dict[str, Any] = {'pageid': page['pageid'], 'ns': ns, 'title': canonical}
+            if 'info' in props:
+                entry.update({'contentmodel': 'wikitext', 'touched': page['timestamp'],
+                              'lastrevid': page['revid'], 'length': len(page['text'].encode('utf-8'))})
+            if 'pageprops' in props and 'i' in page and ns == 0 and canonical not in self.unlinked:
+                entry['pageprops'] = {'wikibase_item': self.contest.article(page['i'])['wikidata_id']}
+            if 'categories' in props and 'i' in page and ns == 0:
+                entry['categories'] = [{'ns': 14, 'title': f"Kategorija:{topic}"}
+                                       for topic in self.contest.article(page['i'])['topics']]
+            if 'revisions' in props and position >= rv_start and 'rvcontinue' not in more:
+                size = len(page['text'].encode('utf-8'))
+                if size > budget and position > rv_start:
+                    # Result size limit reached: the rest comes in a continuation
+                    more['rvcontinue'] = str(position)
+                else:
+                    budget -= size
+                    revision: Dict[str, Any] = {'revid': page['revid'], 'parentid': 0, 'timestamp': page['timestamp']}
+                    if 'content' in params.get('rvprop', 'ids|timestamp|flags|comment|user'):
+                        revision['slots'] = {'main': {'contentmodel': 'wikitext', 'contentformat': 'text/x-wiki',
+                                                      'content': page['text']}}
+                    entry['revisions'] = [revision]
+            pages.append(entry)
+        return pages, normalized, more
+
+    def _item_for_title(self, title: str) -> Optional[str]:
+        """Q-ID of the item linked to an lvwiki article, or None."""
+        for qid, item in self.items.items():
+            if item.get('sitelink') == title:
+                return qid
+        i = self.contest.index(title)
+        if i is None:
+            return None
+        qid = self.contest.article(i)['wikidata_id']
+        return qid if (self.items.get(qid) or self.contest.item(qid))['sitelink'] == title else None
+
+    def _wbgetentities(self, params: Dict[str, str]) -> Dict[str, Any]:
+        entities = {}
+        if 'titles' in params:
+            titles = params['titles'].split('|')
+            if len(titles) > 50:
+                return {'error': {'code': 'toomanyvalues', 'info': 'Too many values supplied for parameter "titles".'}}
+            ids = []
+            for n, title in enumerate(titles, 1):
+                qid = self._item_for_title(title) if params.get('sites') == 'lvwiki' else None
+                if qid:
+                    ids.append(qid)
+                else:
+                    entities[str(-n)] = {'site': params.get('sites'), 'title': title, 'missing': ''}
+        else:
+            ids = params['ids'].split('|')
+        if len(ids) > 50:
+            return {'error': {'code': 'toomanyvalues', 'info': 'Too many values supplied for parameter "ids".'}}
+        props = params.get('props', 'info|sitelinks|aliases|labels|descriptions|claims|datatype').split('|')
+        languages = params.get('languages', '').split('|')
+        for qid in ids:
+            item = self.items.get(qid) or self.contest.item(qid)
+            if item is None:
+                entities[qid] = {'id': qid, 'missing': ''}
+                continue
+            entity: Dict[str, Any] = {'type': 'item', 'id': qid}
+            if 'info' in props:
+                entity.update({'pageid': item['revid'], 'ns': 0, 'title': qid, 'lastrevid': item['revid'],
+                               'modified': TIMESTAMP})
+            if 'sitelinks' in props:
+                sites = params.get('sitefilter', 'lvwiki').split('|')
+                entity['sitelinks'] = ({'lvwiki': {'site': 'lvwiki', 'title': item['sitelink'], 'badges': []}}
+                                       if item['sitelink'] and 'lvwiki' in sites else {})
+            if 'labels' in props:
+                entity['labels'] = ({lang: {'language': lang, 'value': item['label']} for lang in languages[:1]}
+                                    if item['label'] else {})
+            if 'claims' in props:
+                entity['claims'] = {
+                    prop: [{'mainsnak': {'snaktype': 'value', 'property': prop, 'datatype': 'wikibase-item',
+                                         'datavalue': {'value': {'entity-type': 'item', 'id': value},
+                                                       'type': 'wikibase-entityid'}},
+                            'type': 'statement', 'rank': 'normal'} for value in item.get(key, [])]
+                    for prop, key in (('P31', 'instance_of'), ('P21', 'sex')) if item.get(key)
+                }
+            entities[qid] = entity
+        return {'entities': entities, 'success': 1}
+
+    def _login(self, params: Dict[str, str]) -> Tuple[int, Dict[str, str], Dict[str, Any]]:
+        if params.get('lgtoken') != 'login-anon+\\':
+            return 200, {}, {'login': {'result': 'Failed', 'reason': 'Unable to continue login. Your session most likely timed out.'}}
+        name = params['lgname'].split('@')[0]
+        session = f"s{random.getrandbits(64):016x}"
+        with self._lock:
+            self.sessions[session] = name
+        headers = {'Set-Cookie': f"fakewikiSession={session}; Path=/; HttpOnly"}
+        return 200, headers, {'login': {'result': 'Success', 'lguserid': 1, 'lgusername': name}}
+
+    def _edit(self, params: Dict[str, str], user: Optional[str]) -> Dict[str, Any]:
+        if not user or params.get('token') != f"csrf-{user}+\\":
+            return {'error': {'code': 'badtoken', 'info': 'Invalid CSRF token.'}}
+        title = params['title']
+        page = self.get_page(title)
+        if page is None:
+            if 'nocreate' in params:
+                return {'error': {'code': 'missingtitle', 'info': "The page you specified doesn't exist."}}
+            page = {'text': '', 'revid': 0}
+        if params.get('baserevid') and int(params['baserevid']) != page['revid']:
+            return {'error': {'code': 'editconflict', 'info': 'Edit conflict.'}}
+
+        text = params['text']
+        if params.get('section') not in (None, ''):
+            sections = mwparserfromhell.parse(page['text']).get_sections(include_lead=True, flat=True)
+            index = int(params['section'])
+            if not text.endswith('\n') and index < len(sections) - 1:
+                text += '\n'
+            sections[index] = text
+            text = ''.join(str(s) for s in sections)
+
+        self.edits.append(dict(params))
+        if text == page['text']:
+            return {'edit': {'result': 'Success', 'pageid': page.get('pageid', 0), 'title': title, 'nochange': True}}
+        old_revid = page['revid']
+        new_revid = self.set_page(title, text)
+        return {'edit': {'result': 'Success', 'pageid': self.pages[title]['pageid'], 'title': title,
+                         'oldrevid': old_revid, 'newrevid': new_revid, 'newtimestamp': TIMESTAMP}}
+
+    def module_counts(self) -> Dict[str, int]:
+        """Number of requests per action and module, e.g. {'query:revisions': 12}."""
+        counts: Dict[str, int] = {}
+        with self._lock:
+            for params in self.requests:
+                module = params.get('prop') or params.get('list') or params.get('meta') or params.get('props') or ''
+                key = f"{params.get('action', '')}:{module}"
+                counts[key] = counts.get(key, 0) + 1
+        return counts
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: '_Server'
+    protocol_version = 'HTTP/1.1'
+    # Send headers and body in one write and without Nagle's delay, which
+    # would otherwise add ~40 ms (delayed ACK) to every keep-alive request
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def _params(self) -> Dict[str, str]:
+        params = dict(parse_qsl(urlsplit(self.path).query, keep_blank_values=True))
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            params.update(parse_qsl(self.rfile.read(length).decode('utf-8'), keep_blank_values=True))
+        return params
+
+    def _session(self) -> Optional[str]:
+        cookie = SimpleCookie(self.headers.get('Cookie', ''))
+        return cookie['fakewikiSession'].value if 'fakewikiSession' in cookie else None
+
+    def _answer(self) -> None:
+        if urlsplit(self.path).path != '/w/api.php':
+            self.send_error(404)
+            return
+        status, headers, body = self.server.api.handle(self._params(), self._session())
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        if 'error' in body and 'MediaWiki-API-Error' not in headers:
+            headers = {**headers, 'MediaWiki-API-Error': body['error']['code']}
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = _answer
+    do_POST = _answer
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        pass  # Keep test output clean
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    api: FakeMediaWikiApi
+
+
+class FakeMediaWikiServer:
+    """HTTP server for a FakeMediaWikiApi on a free local port, run in a background thread."""
+
+    def __init__(self, contest: Optional[SyntheticContest] = None, port: int = 0, **api_options: Any):
+        self.api = FakeMediaWikiApi(contest or SyntheticContest(), **api_options)
+        self._server = _Server(('127.0.0.1', port), _Handler)
+        self._server.api = self.api
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/w/api.php"
+
+    def start(self) -> 'FakeMediaWikiServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.05},
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'FakeMediaWikiServer':
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+def offline_stats(api_url: str, out_dir: str, fixtures: Optional[Any] = None) -> Any:
+    """
+    Return a CEESpringStats that talks to api_url and writes all its files below out_dir.
+
+    The lvwiki, Meta-Wiki and Wikidata clients all use api_url, and the transport
+    is not rate limited. fixtures optionally records or replays the traffic.
+    """
+    from cee_spring_stats import CEESpringStats
+    from src.api_transport import ApiTransport
+    from src.mediawiki_client import MediaWikiClient
+    from src.suggested_articles import SuggestedArticlesCollector
+    from src.wikidata_client import WikidataClient
+
+    transport = ApiTransport(rate_limit=1000, rate_mode='fixed')
+    transport.set_fixtures(fixtures)
+    stats = CEESpringStats()
+    stats.client = MediaWikiClient(transport, api_url=api_url)
+    stats.suggested_collector = SuggestedArticlesCollector(
+        transport, cache_file=os.path.join(out_dir, 'structure_pages.json'))
+    stats.suggested_collector.meta_api_url = api_url
+    stats.wikidata_client = WikidataClient(
+        transport, api_url=api_url, sitelinks_cache_file=os.path.join(out_dir, 'wikidata_sitelinks.json'),
+        claims_cache_file=os.path.join(out_dir, 'wikidata_claims.json'),
+        titles_cache_file=os.path.join(out_dir, 'wikidata_titles.json'))
+
+    stats.cache_file = os.path.join(out_dir, 'cache.json')
+    stats.output_file = os.path.join(out_dir, 'results.txt')
+    stats.report_dir = out_dir
+    stats.checkpoint_file = os.path.join(out_dir, 'checkpoint.json')
+    stats.stage_cache_dir = os.path.join(out_dir, 'stages')
+    stats.run_report_file = os.path.join(out_dir, 'run_report.json')
+    return stats
+
+
+def main():
+    """Run the fake API in the foreground."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Serve a synthetic CEE Spring contest over a fake MediaWiki API')
+    parser.add_argument('--articles', type=int, default=1000, help='Number of tagged articles')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every request')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with HTTP 503')
+    parser.add_argument('--maxlag-rate', type=float, default=0.0, help='Share of requests answered with maxlag')
+    args = parser.parse_args()
+
+    server = FakeMediaWikiServer(SyntheticContest(args.articles, seed=args.seed), port=args.port,
+                                 latency=args.latency, error_rate=args.error_rate, maxlag_rate=args.maxlag_rate)
+    print(f"Serving {args.articles} synthetic articles at {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -23,6 +23,8 @@ class TestCEESpringStats(CEESpringStats):
         # Get page info for all articles
         print("Fetching page information...")
         page_info = self.client.get_page_info(article_titles)
+        talk_contents = self.client.get_pages_content(article_titles, namespace=1)
+        article_contents = self.client.get_pages_content(article_titles, namespace=0)
 
         # Process each article
         articles_data = []
@@ -32,7 +34,10 @@ class TestCEESpringStats(CEESpringStats):
             print(f"Processing article {i}/{total_articles}: {title}")
 
             try:
-                article_data = self._process_single_article(title, page_info.get(title, {}))
+                article_data = self._process_single_article(
+                    title, page_info.get(title, {}),
+                    talk_contents.get(title), article_contents.get(title),
+                )
                 if article_data:
                     articles_data.append(article_data)
                     print(f"  ✓ Processed: {article_data['participant']} - {len(article_data['topics'])} topics")
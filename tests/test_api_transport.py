@@ -0,0 +1,126 @@
+"""Unit tests for the shared API transport."""
+
+import io
+from unittest.mock import patch
+import pytest
+import requests
+from src.api_transport import ApiTransport, get_default_transport
+from src.rate_control import AdaptiveRateController
+from src.mediawiki_client import MediaWikiClient
+from src.suggested_articles import SuggestedArticlesCollector
+from src.wikipedia_poster import WikipediaPoster
+
+API_URL = 'https://lv.wikipedia.org/w/api.php'
+
+
+def test_short_query_uses_get():
+    """Short parameter lists are sent as GET with connect/read timeouts."""
+    transport = ApiTransport(rate_limit=1000)
+
+    with patch.object(transport.session, 'get') as mock_get, \
+            patch.object(transport.session, 'post') as mock_post:
+        transport.request(API_URL, params={'action': 'query', 'titles': 'Rīga'})
+
+    mock_post.assert_not_called()
+    assert mock_get.call_args[1]['timeout'] == transport.timeout
+
+
+def test_long_titles_switch_to_post():
+    """A pipe-joined titles parameter that makes the URL too long is POSTed."""
+    transport = ApiTransport(rate_limit=1000)
+    titles = '|'.join(f'Ļoti garš raksta nosaukums {i}' for i in range(50))
+
+    with patch.object(transport.session, 'get') as mock_get, \
+            patch.object(transport.session, 'post') as mock_post:
+        transport.request(API_URL, params={'action': 'query', 'titles': titles})
+
+    mock_get.assert_not_called()
+    assert mock_post.call_args[1]['data']['titles'] == titles
+
+
+def test_clients_share_default_transport():
+    """All three API clients sit on the same pooled transport by default."""
+    transport = get_default_transport()
+    assert MediaWikiClient().transport is transport
+    assert SuggestedArticlesCollector().transport is transport
+    assert WikipediaPoster().transport is transport
+    assert transport.session.headers['Accept-Encoding'] == 'gzip'
+
+
+def _http_response(status=200, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    response.url = API_URL
+    response.raw = io.BytesIO(b'{}')
+    return response
+
+
+def test_retries_503_honouring_retry_after():
+    """A 503 is retried after at least the wait the server asks for."""
+    transport = ApiTransport(rate_limit=1000)
+
+    with patch.object(transport.session, 'get') as mock_get, \
+            patch.object(transport, '_rate_limit'), \
+            patch('src.api_transport.time.sleep') as mock_sleep:
+        mock_get.side_effect = [_http_response(503, {'Retry-After': '7'}), _http_response(200)]
+        response = transport.request(API_URL, params={'action': 'query'})
+
+    assert response.status_code == 200
+    assert mock_get.call_count == 2
+    assert mock_sleep.call_args[0][0] >= 7
+    assert mock_get.call_args[1]['params']['maxlag'] == transport.maxlag
+
+
+def test_retries_maxlag_and_connection_errors_then_gives_up():
+    """maxlag errors and connection errors are retried until the budget is used up."""
+    transport = ApiTransport(rate_limit=1000, max_retries=2)
+    lagged = _http_response(200, {'MediaWiki-API-Error': 'maxlag', 'Retry-After': '1'})
+
+    with patch.object(transport.session, 'get') as mock_get, \
+            patch.object(transport, '_rate_limit'), \
+            patch('src.api_transport.time.sleep') as mock_sleep:
+        mock_get.side_effect = [lagged, requests.ConnectionError('reset'), lagged]
+        with pytest.raises(requests.HTTPError):
+            transport.request(API_URL, params={'action': 'query'})
+
+    assert mock_get.call_count == 3
+    assert mock_sleep.call_count == 2
+
+
+def test_client_errors_are_not_retried():
+    """A 404 is a permanent error and fails immediately."""
+    transport = ApiTransport(rate_limit=1000)
+
+    with patch.object(transport.session, 'get', return_value=_http_response(404)) as mock_get, \
+            patch.object(transport, '_rate_limit'), \
+            patch('src.api_transport.time.sleep') as mock_sleep:
+        with pytest.raises(requests.HTTPError):
+            transport.request(API_URL, params={'action': 'query'})
+
+    assert mock_get.call_count == 1
+    mock_sleep.assert_not_called()
+
+
+def test_adaptive_rate_increases_and_backs_off():
+    """Fast answers raise the rate up to the ceiling; congestion halves it once per cooldown."""
+    controller = AdaptiveRateController(1.0, min_rate=0.2, max_rate=1.5, latency_target=2.0)
+
+    for _ in range(10):
+        controller.record(0.1, 'ok')
+    assert controller.rate == 1.5
+
+    controller.record(0.1, 'lagged')
+    controller.record(0.1, 'error')
+    assert controller.rate == 0.75
+    assert controller.decreases == 1
+
+
+def test_fixed_mode_keeps_rate():
+    """The conservative fixed mode ignores observations."""
+    transport = ApiTransport(rate_limit=0.5, rate_mode='fixed')
+    controller = transport.controller('lv.wikipedia.org')
+
+    controller.record(30.0, 'lagged')
+    assert controller.rate == 0.5
+    assert transport.controller('lv.wikipedia.org') is controller
@@ -1,6 +1,8 @@
 """Unit tests for batched page content fetching."""
 
 from unittest.mock import patch, MagicMock
+import pytest
+from src.api_transport import ApiRequestError
 from src.mediawiki_client import MediaWikiClient
 from src.suggested_articles import SuggestedArticlesCollector
 
@@ -115,3 +117,133 @@ def test_suggested_articles_batch_fetch():
     assert mock_req.call_count == 1
     assert 'Wikimedia CEE Spring 2026/Structure/Latvia' in result
     assert 'Q100' in result['Wikimedia CEE Spring 2026/Structure/Latvia']
+
+
+def test_get_pages_content_follows_continuation():
+    """Pages left out of a truncated response are filled in from the continuation."""
+    client = MediaWikiClient()
+
+    responses = [
+        {
+            'continue': {'rvcontinue': '123|456', 'continue': '||'},
+            'query': {'pages': [_make_page('Big', 'big content'), {'title': 'Later'}]},
+        },
+        {'query': {'pages': [{'title': 'Big'}, _make_page('Later', 'later content')]}},
+    ]
+
+    with patch.object(client, '_make_request', side_effect=responses) as mock_req:
+        result = client.get_pages_content(['Big', 'Later'], namespace=0)
+
+    assert result == {'Big': 'big content', 'Later': 'later content'}
+    assert mock_req.call_count == 2
+    assert mock_req.call_args[0][0]['rvcontinue'] == '123|456'
+
+
+def test_get_pages_content_batches_by_size():
+    """Known page sizes keep each batch under the byte budget."""
+    client = MediaWikiClient()
+    titles = [f'Article{i}' for i in range(10)]
+    sizes = {t: 1024 * 1024 for t in titles}  # 1 MiB each, 4 MiB budget
+
+    def fake_request(params):
+        batch = params['titles'].split('|')
+        return {'query': {'pages': [_make_page(t, 'x') for t in batch]}}
+
+    with patch.object(client, '_make_request', side_effect=fake_request) as mock_req:
+        result = client.get_pages_content(titles, namespace=0, sizes=sizes)
+
+    assert len(result) == 10
+    assert [len(c[0][0]['titles'].split('|')) for c in mock_req.call_args_list] == [4, 4, 2]
+
+
+def test_get_page_categories_merges_clcontinue():
+    """Categories split across continuation responses are merged per page."""
+    client = MediaWikiClient()
+
+    responses = [
+        {
+            'continue': {'clcontinue': '1|B', 'continue': '||'},
+            'query': {'pages': [{'title': 'Page', 'categories': [{'title': 'Kategorija:A'}]}]},
+        },
+        {'query': {'pages': [{'title': 'Page', 'categories': [{'title': 'Kategorija:B'}]}]}},
+    ]
+
+    with patch.object(client, '_make_request', side_effect=responses):
+        result = client.get_page_categories(['Page'])
+
+    assert result == {'Page': ['Kategorija:A', 'Kategorija:B']}
+
+
+def test_get_pages_content_refetches_failed_batch_in_bulk():
+    """Titles lost to a failed batch are refetched together, not one by one."""
+    client = MediaWikiClient()
+    titles = [f'Article{i}' for i in range(60)]
+    calls = []
+
+    def fake_request(params):
+        batch = params['titles'].split('|')
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise ApiRequestError('HTTP 503')  # first batch of 50 fails
+        return {'query': {'pages': [_make_page(t, f'content-{t}') for t in batch]}}
+
+    with patch.object(client, '_make_request', side_effect=fake_request):
+        result = client.get_pages_content(titles, namespace=0)
+
+    assert len(result) == 60
+    assert calls == [50, 10, 50]
+
+
+@pytest.mark.parametrize('raise_error', [False, True])
+def test_get_pages_content_bisects_poisoned_batch(raise_error):
+    """A title that breaks its whole batch, with an error body or a failed request, is isolated by bisection."""
+    client = MediaWikiClient()
+    titles = [f'Article{i}' for i in range(8)]
+
+    def fake_request(params):
+        batch = params['titles'].split('|')
+        if 'Article5' in batch:
+            if raise_error:
+                raise ApiRequestError('HTTP 500')
+            return {'error': {'code': 'internal_api_error'}}
+        return {'query': {'pages': [_make_page(t, f'content-{t}') for t in batch]}}
+
+    with patch.object(client, '_make_request', side_effect=fake_request) as mock_req:
+        result = client.get_pages_content(titles, namespace=0)
+
+    assert 'Article5' not in result
+    assert len(result) == 7
+    # first pass, retry, then bisection 8 -> 4 -> 2 -> 1
+    assert mock_req.call_count == 2 + 2 + 2 + 2
+
+
+def test_get_pages_content_gives_up_when_api_is_down():
+    """When every request fails the crawl stops once bisection of the first batch gives up."""
+    client = MediaWikiClient()
+    titles = [f'Article{i}' for i in range(100)]
+
+    with patch.object(client, '_make_request', side_effect=ApiRequestError('HTTP 503')) as mock_req:
+        with pytest.raises(ApiRequestError):
+            client.get_pages_content(titles, namespace=0)
+
+    # 2 batches in the first pass, then one retry and two halves of the first
+    assert mock_req.call_count == 2 + 3
+
+
+def test_get_pages_content_refetches_after_failed_continuation():
+    """A page still waiting for its content when the continuation fails is refetched, not left empty."""
+    client = MediaWikiClient()
+    responses = [
+        {
+            'continue': {'rvcontinue': '2|0', 'continue': '||'},
+            'query': {'pages': [_make_page('A', 'aaa'), {'title': 'B'}]},
+        },
+        ApiRequestError('HTTP 503'),
+        {'query': {'pages': [_make_page('B', 'bbb')]}},
+    ]
+
+    with patch.object(client, '_make_request', side_effect=responses) as mock_req:
+        result = client.get_pages_content(['A', 'B'], namespace=0)
+
+    assert result == {'A': 'aaa', 'B': 'bbb'}
+    assert mock_req.call_args_list[-1][0][0]['titles'] == 'B'
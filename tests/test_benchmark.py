@@ -0,0 +1,37 @@
+"""Unit tests for the benchmark suite and its performance budgets."""
+
+from tests.benchmark import compare_results, run_benchmarks
+
+
+def _results(seconds, peak_bytes, requests_total):
+    return {'results': {'1000': {
+        'template_parsing': {'seconds': seconds, 'peak_bytes': peak_bytes},
+        'offline_run': {'seconds': seconds, 'peak_bytes': peak_bytes, 'requests_total': requests_total},
+    }}}
+
+
+def test_compare_results_flags_regressions_beyond_tolerance():
+    """Growth within the tolerances passes; more time, memory or requests fail."""
+    baseline = _results(2.0, 1000, 100)
+    assert compare_results(baseline, _results(2.4, 1090, 100)) == []
+    # Tiny timings may jitter by more than the relative tolerance
+    assert compare_results(_results(0.001, 1000, 100), _results(0.02, 1000, 100)) == []
+
+    regressions = compare_results(baseline, _results(3.0, 1200, 101))
+    assert len(regressions) == 5
+    assert any('offline_run' in r and 'requests_total' in r for r in regressions)
+    # Sizes or benchmarks missing from the baseline are not compared
+    assert compare_results({'results': {}}, _results(3.0, 1200, 101)) == []
+
+
+def test_run_benchmarks_small_contest():
+    """A whole benchmark run on a tiny contest measures every step and counts API requests."""
+    results = run_benchmarks(sizes=[20], repeat=1)['results']['20']
+    assert set(results) == {'wikidata_id_extraction', 'template_parsing', 'readable_length', 'validation',
+                            'report_wikitext_table', 'report_participants', 'report_contest_categories',
+                            'offline_run'}
+    assert all(r['seconds'] >= 0 and r['peak_bytes'] > 0 for r in results.values())
+    offline = results['offline_run']
+    assert offline['requests_total'] == sum(offline['requests'].values())
+    assert offline['requests']['query:embeddedin'] >= 1
+    assert compare_results({'results': {'20': results}}, {'results': {'20': results}}) == []
@@ -0,0 +1,113 @@
+"""Unit tests for the article collection pipeline in CEESpringStats."""
+
+import itertools
+import re
+from unittest.mock import patch
+import pytest
+from cee_spring_stats import CEESpringStats
+from src.crawl_checkpoint import CrawlCheckpoint
+from src.data_validator import DataValidator
+from src.config import CONTEST_TEMPLATE
+from tests.fake_mediawiki import FakeMediaWikiServer, SyntheticContest, offline_stats
+
+
+def _talk(participant, country):
+    return f"{{{{{CONTEST_TEMPLATE}\n|dalībnieks = {participant}\n|tēma = Vēsture\n|valsts = {country}\n}}}}"
+
+
+TALK_PAGES = {
+    'Rīga': _talk('User1', 'Polija'),
+    'Tallina': _talk('User2', 'Latvija'),  # not a contest country
+    'Bez veidnes': 'Tikai teksts',
+    'Bez diskusijas': None,
+}
+PAGE_INFO = {t: {'pageid': i, 'size': 100, 'wikidata_id': None} for i, t in enumerate(TALK_PAGES)}
+
+
+def _collect(metrics_scope, stream_chunk_size=0):
+    stats = CEESpringStats(metrics_scope=metrics_scope, stream_chunk_size=stream_chunk_size)
+    requested = {0: [], 1: []}
+
+    def fake_contents(titles, namespace=0, sizes=None):
+        requested[namespace].extend(titles)
+        requested.setdefault(('calls', namespace), 0)
+        requested[('calls', namespace)] += 1
+        if namespace == 1:
+            return {t: TALK_PAGES[t] for t in titles}
+        return {t: 'Raksta teksts ' * 10 for t in titles}
+
+    with patch.object(stats.client, 'find_articles_with_template', return_value=list(TALK_PAGES)), \
+            patch.object(stats.client, 'get_page_info', return_value=PAGE_INFO), \
+            patch.object(stats.client, 'get_pages_content', side_effect=fake_contents):
+        articles = stats._collect_articles_data()
+    return articles, requested
+
+
+def test_article_content_only_for_parseable_templates(capsys):
+    """Talk pages without a contest template never trigger an article download."""
+    articles, requested = _collect('all')
+    output = capsys.readouterr().out
+
+    assert requested[0] == ['Rīga', 'Tallina']
+    assert [a['title'] for a in articles] == ['Rīga', 'Tallina']
+    assert all(a['readable_length'] > 0 for a in articles)
+    assert "Could not parse the CEE Spring template on the talk page of Bez veidnes" in output
+    assert "No talk page found for Bez veidnes" not in output
+    assert "No talk page found for Bez diskusijas" in output
+
+
+def test_eligible_scope_skips_ineligible_articles():
+    """With the 'eligible' scope only articles with a valid country are downloaded."""
+    articles, requested = _collect('eligible')
+
+    assert requested[0] == ['Rīga']
+    by_title = {a['title']: a for a in articles}
+    assert by_title['Rīga']['readable_length'] > 0
+    assert by_title['Tallina']['readable_length'] == 0
+    assert by_title['Tallina']['eligible_for_contest'] is False
+
+
+def test_streaming_mode_fetches_chunk_by_chunk():
+    """In streaming mode each chunk is fetched and processed separately."""
+    articles, requested = _collect('all', stream_chunk_size=2)
+
+    assert requested[('calls', 1)] == 2
+    assert requested[1] == list(TALK_PAGES)
+    assert [a['title'] for a in articles] == ['Rīga', 'Tallina']
+
+
+def test_validator_streams_and_keeps_duplicate_warning_first():
+    """Streaming validation still reports duplicates before per-article warnings."""
+    validator = DataValidator()
+    articles = iter([
+        {'title': 'A', 'participant': 'U', 'topics': [], 'countries': ['Polija']},
+        {'title': 'A', 'participant': 'U', 'topics': [], 'countries': ['Polija']},
+    ])
+
+    cleaned = list(validator.iter_clean_articles(articles))
+
+    assert [a['title'] for a in cleaned] == ['A']
+    assert validator.warnings[0].startswith('Removed 1 duplicate articles')
+
+
+@pytest.mark.parametrize('stream_chunk_size, chunks', [(0, [45]), (20, [20, 20, 5])])
+def test_run_chunks_articles_only_when_streaming(tmp_path, capsys, stream_chunk_size, chunks):
+    """A whole run fetches content in chunks only with --stream, and checkpoints each chunk."""
+    with FakeMediaWikiServer(SyntheticContest(n_articles=45)) as server:
+        stats = offline_stats(server.url, str(tmp_path))
+        stats.stream_chunk_size = stream_chunk_size
+        recorded = []
+        original_record = CrawlCheckpoint.record
+
+        def record(checkpoint, values=None, extend=None, merge=None):
+            if values and 'crawled_titles' in values:
+                recorded.append(values['crawled_titles'])
+            original_record(checkpoint, values, extend, merge)
+
+        # A chunk size below the contest size, so an unstreamed run chunking anyway would show
+        with patch.object(CrawlCheckpoint, 'record', record), patch('cee_spring_stats.STREAM_CHUNK_SIZE', 20):
+            assert stats.run(use_cache=False, save_cache=False)
+
+    output = capsys.readouterr().out
+    assert re.findall(r"Fetching talk page content \((\d+) pages\)", output) == [str(n) for n in chunks]
+    assert recorded == list(itertools.accumulate(chunks))
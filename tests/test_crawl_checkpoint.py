@@ -0,0 +1,127 @@
+"""Unit tests for resuming an interrupted crawl from its checkpoint."""
+
+from unittest.mock import patch
+import pytest
+from cee_spring_stats import CEESpringStats
+from src.api_transport import ApiRequestError
+from src.crawl_checkpoint import CrawlCheckpoint
+from src.mediawiki_client import MediaWikiClient
+from src.config import CONTEST_TEMPLATE
+
+
+def _embeddedin(titles, eicontinue=None):
+    data = {'query': {'embeddedin': [{'title': f'Diskusija:{t}'} for t in titles]}}
+    if eicontinue:
+        data['continue'] = {'eicontinue': eicontinue}
+    return data
+
+
+def test_template_search_resumes_from_eicontinue(tmp_path):
+    """A failed page of embeddedin results is retried from its token, not from the start."""
+    path = str(tmp_path / 'checkpoint.json')
+    client = MediaWikiClient()
+
+    with patch.object(client, '_make_request') as mock_request:
+        mock_request.side_effect = [_embeddedin(['A', 'B'], 'tok1'), ApiRequestError('down')]
+        with pytest.raises(ApiRequestError):
+            client.find_articles_with_template('T', checkpoint=CrawlCheckpoint(path, 'T'))
+
+    checkpoint = CrawlCheckpoint(path, 'T')
+    assert checkpoint.load()
+    with patch.object(client, '_make_request', return_value=_embeddedin(['C'])) as mock_request:
+        titles = client.find_articles_with_template('T', checkpoint=checkpoint)
+
+    assert titles == ['A', 'B', 'C']
+    assert mock_request.call_args[0][0]['eicontinue'] == 'tok1'
+
+
+def test_edit_counts_resume_pending_user(tmp_path):
+    """Finished users are not queried again and an interrupted user continues from uccontinue."""
+    path = str(tmp_path / 'checkpoint.json')
+    client = MediaWikiClient()
+    partial = {'query': {'usercontribs': [{}] * 3}, 'continue': {'uccontinue': 'uc1'}}
+
+    with patch.object(client, '_make_request') as mock_request:
+        mock_request.side_effect = [{'query': {'usercontribs': [{}]}}, partial, ApiRequestError('down')]
+        with pytest.raises(ApiRequestError):
+            client.get_user_edit_counts_before_date(['U1', 'U2'], 'D', checkpoint=CrawlCheckpoint(path))
+
+    checkpoint = CrawlCheckpoint(path)
+    assert checkpoint.load()
+    with patch.object(client, '_make_request', return_value={'query': {'usercontribs': [{}] * 2}}) as mock_request:
+        counts = client.get_user_edit_counts_before_date(['U1', 'U2'], 'D', checkpoint=checkpoint)
+
+    assert counts == {'U1': 1, 'U2': 5}
+    assert mock_request.call_count == 1
+    assert mock_request.call_args[0][0]['uccontinue'] == 'uc1'
+
+
+def _talk(participant):
+    return f"{{{{{CONTEST_TEMPLATE}\n|dalībnieks = {participant}\n|tēma = Vēsture\n|valsts = Polija\n}}}}"
+
+
+def test_crawl_resumes_after_last_finished_chunk(tmp_path):
+    """Chunks finished before a failure are taken from the checkpoint, not refetched."""
+    titles = ['A', 'B', 'C', 'D']
+    page_info = {t: {'pageid': i, 'size': 10, 'wikidata_id': None} for i, t in enumerate(titles)}
+    path = str(tmp_path / 'checkpoint.json')
+    fetched = []
+
+    def fake_contents(chunk, namespace=0, sizes=None):
+        if namespace == 1:
+            fetched.extend(chunk)
+            if chunk == ['C', 'D'] and fetched.count('C') == 1:
+                raise ApiRequestError('down')
+            return {t: _talk(f'User{t}') for t in chunk}
+        return {t: 'Teksts' for t in chunk}
+
+    def collect(checkpoint):
+        stats = CEESpringStats(stream_chunk_size=2)
+        stats.checkpoint = checkpoint
+        with patch.object(stats.client, 'find_articles_with_template', return_value=titles), \
+                patch.object(stats.client, 'get_page_info', return_value=page_info) as mock_info, \
+                patch.object(stats.client, 'get_pages_content', side_effect=fake_contents):
+            return stats._collect_articles_data(), mock_info
+
+    with pytest.raises(ApiRequestError):
+        collect(CrawlCheckpoint(path))
+
+    checkpoint = CrawlCheckpoint(path)
+    assert checkpoint.load()
+    articles, mock_info = collect(checkpoint)
+
+    assert [a['title'] for a in articles] == titles
+    assert fetched == ['A', 'B', 'C', 'D', 'C', 'D']
+    mock_info.assert_not_called()
+
+
+def test_checkpoint_for_other_template_is_ignored(tmp_path):
+    """A checkpoint left by another contest year is not resumed."""
+    path = str(tmp_path / 'checkpoint.json')
+    CrawlCheckpoint(path, 'CEE Spring 2025').update(page_info={})
+
+    assert not CrawlCheckpoint(path, 'CEE Spring 2026').load()
+
+
+def test_checkpoint_journal_appends_only_new_progress(tmp_path):
+    """Each step appends only its own progress; a record cut short by a crash is ignored."""
+    path = tmp_path / 'checkpoint.json'
+    checkpoint = CrawlCheckpoint(str(path), 'T')
+    checkpoint.update(page_info={'A': {'size': 1}})
+    sizes = []
+    for chunk in (['A', 'B'], ['C', 'D'], ['E', 'F']):
+        checkpoint.record(values={'crawled_titles': ord(chunk[1]) - ord('A') + 1},
+                          extend={'crawled_articles': [{'title': t} for t in chunk]})
+        sizes.append(path.stat().st_size)
+    checkpoint.record(merge={'edit_counts': {'U1': 3}})
+    checkpoint.record(merge={'edit_counts': {'U2': 7}})
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"set": {"crawled_tit')
+
+    assert sizes[2] - sizes[1] == sizes[1] - sizes[0]
+    loaded = CrawlCheckpoint(str(path), 'T')
+    assert loaded.load()
+    assert loaded.get('crawled_titles') == 6
+    assert [a['title'] for a in loaded.get('crawled_articles')] == list('ABCDEF')
+    assert loaded.get('edit_counts') == {'U1': 3, 'U2': 7}
+    assert loaded.get('page_info') == {'A': {'size': 1}}
@@ -0,0 +1,116 @@
+"""Offline end-to-end tests of the API clients against the fake MediaWiki API."""
+
+from unittest.mock import patch
+from cee_spring_stats import CEESpringStats
+from src.api_transport import ApiTransport
+from src.config import NEW_USER_EDIT_THRESHOLD, STRUCTURE_PAGE_PREFIX
+from src.mediawiki_client import MediaWikiClient
+from src.suggested_articles import SuggestedArticlesCollector
+from src.wikipedia_poster import WikipediaPoster
+from tests.fake_mediawiki import FakeMediaWikiServer, SyntheticContest
+
+
+def _stats(server):
+    transport = ApiTransport(rate_limit=1000, rate_mode='fixed')
+    stats = CEESpringStats()
+    stats.client = MediaWikiClient(transport, api_url=server.url)
+    stats.suggested_collector = SuggestedArticlesCollector(transport)
+    stats.suggested_collector.meta_api_url = server.url
+    return stats
+
+
+def test_crawl_collects_every_synthetic_article():
+    """The crawl finds, fetches and parses all tagged articles in batches."""
+    contest = SyntheticContest(n_articles=120)
+    with FakeMediaWikiServer(contest) as server:
+        articles = _stats(server)._collect_articles_data()
+        counts = server.api.module_counts()
+
+    assert [a['title'] for a in articles] == contest.titles
+    for article in articles[:10]:
+        expected = contest.article(contest.index(article['title']))
+        assert article['participant'] == expected['participant']
+        assert article['wikidata_id'] == expected['wikidata_id']
+        assert article['readable_length'] > 0
+    # 120 titles: one embeddedin page, 3 info batches, 3 talk and 3 article content batches
+    assert counts == {'query:embeddedin': 1, 'query:info|pageprops': 3, 'query:revisions': 6}
+
+
+def test_streamed_content_maps_normalized_titles():
+    """Non-canonical titles come back under the requested name without refetching."""
+    contest = SyntheticContest(n_articles=5)
+    requested = [title.replace(' ', '_') for title in contest.titles[:3]]
+    with FakeMediaWikiServer(contest) as server:
+        client = MediaWikiClient(ApiTransport(rate_limit=1000, rate_mode='fixed'), api_url=server.url,
+                                 stream_json=True)
+        content = client.get_pages_content(requested)
+        counts = server.api.module_counts()
+
+    assert sorted(content) == sorted(requested)
+    assert all(content.values())
+    assert counts == {'query:revisions': 1}
+
+
+def test_suggested_lists_and_edit_counts():
+    """Suggestion lists come from the structure pages; edit counts stop at the threshold."""
+    contest = SyntheticContest(n_articles=50)
+    with FakeMediaWikiServer(contest) as server:
+        stats = _stats(server)
+        suggested = stats.suggested_collector.collect_all_suggested_wikidata_ids()
+        counts = stats.client.get_user_edit_counts_before_date(contest.participants[:3] + ['Nav'], 'D')
+
+    assert suggested == contest.suggested_ids()
+    for user in contest.participants[:3]:
+        assert counts[user] == min(contest.edit_count(user), NEW_USER_EDIT_THRESHOLD)
+    assert counts['Nav'] == -1
+
+
+def test_retries_injected_errors_and_maxlag():
+    """With injected 503s and maxlag answers the crawl still completes."""
+    contest = SyntheticContest(n_articles=60)
+    with FakeMediaWikiServer(contest, error_rate=0.2, maxlag_rate=0.2, seed=3) as server, \
+            patch('src.api_transport.time.sleep'):
+        articles = _stats(server)._collect_articles_data()
+
+    assert len(articles) == 60
+
+
+def test_poster_logs_in_and_edits_marker_section(tmp_path):
+    """Login, section edit and no-change detection work against the fake API."""
+    page = "Ievads\n== Statistika ==\n<!-- BEGIN -->\nvecs\n<!-- END -->\n== Diskusija ==\nTeksts\n"
+    with FakeMediaWikiServer(SyntheticContest(n_articles=1)) as server:
+        server.api.set_page('Stats', page)
+        poster = WikipediaPoster(session_file=str(tmp_path / 'session.json'),
+                                 transport=ApiTransport(rate_limit=1000, rate_mode='fixed'))
+        poster.api_url = server.url
+
+        assert poster.login('Bots@stats', 'parole', prefetch_titles=['Stats'])
+        assert poster.update_between_markers('Stats', 'jauns', '<!-- BEGIN -->', '<!-- END -->')
+        edit = server.api.edits[-1]
+
+    assert edit['section'] == '1'
+    assert server.api.pages['Stats']['text'] == page.replace('vecs', 'jauns')
+
+
+def test_structure_pages_refetched_only_when_changed(tmp_path):
+    """Unchanged structure pages are served from the revision-keyed cache."""
+    contest = SyntheticContest(n_articles=50)
+    with FakeMediaWikiServer(contest) as server:
+        collector = _stats(server).suggested_collector
+        collector.cache_file = str(tmp_path / 'structure_pages.json')
+        first = collector.collect_all_suggested_wikidata_ids()
+        assert server.api.module_counts() == {'query:info': 1, 'query:revisions': 1}
+
+        server.api.requests.clear()
+        assert collector.collect_all_suggested_wikidata_ids() == first
+        assert server.api.module_counts() == {'query:info': 1}
+
+        changed = f"{STRUCTURE_PAGE_PREFIX}{contest.structure_countries[0]}"
+        server.api.set_page(changed, "{{#invoke:WikimediaCEETable|table\n|Q1\n|Q2\n}}")
+        server.api.requests.clear()
+        third = collector.collect_all_suggested_wikidata_ids()
+        assert [r['titles'] for r in server.api.requests if r.get('prop') == 'revisions'] == [changed]
+
+    assert third[contest.structure_countries[0]] == {'Q1', 'Q2'}
+    assert {c: ids for c, ids in third.items() if c != contest.structure_countries[0]} == \
+        {c: ids for c, ids in first.items() if c != contest.structure_countries[0]}
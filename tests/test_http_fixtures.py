@@ -0,0 +1,61 @@
+"""Unit tests for record-and-replay of API traffic."""
+
+import gzip
+import os
+import pytest
+import requests
+from src.http_fixtures import HttpFixtures
+from tests.fake_mediawiki import FakeMediaWikiServer, SyntheticContest, offline_stats
+
+REPORTS = ('results.txt', 'participant_report.txt', 'contest_categories.txt', 'validation_report.txt',
+           'suggested_coverage.txt')
+
+
+def _run(tmp_path, name, fixtures, api_url):
+    """Run the whole pipeline with all output under tmp_path/name."""
+    out = tmp_path / name
+    assert offline_stats(api_url, str(out), fixtures).run(use_cache=False, save_cache=False)
+    return {report: (out / report).read_bytes() for report in REPORTS}
+
+
+def test_replayed_run_reproduces_reports_byte_for_byte(tmp_path):
+    """A run replayed from a recording makes identical reports without the server."""
+    fixture_path = str(tmp_path / 'contest.json.gz')
+    with FakeMediaWikiServer(SyntheticContest(n_articles=80)) as server:
+        api_url = server.url
+        recorder = HttpFixtures(fixture_path, 'record')
+        recorded = _run(tmp_path, 'recorded', recorder, api_url)
+        live_requests = len(server.api.requests)
+    recorder.save()
+
+    replayer = HttpFixtures(fixture_path, 'replay')
+    replayed = _run(tmp_path, 'replayed', replayer, api_url)
+
+    assert replayed == recorded
+    assert len(recorder.entries) == live_requests
+    assert replayer.unused == 0
+
+
+def test_fixture_redacts_secrets_and_reports_unknown_requests(tmp_path):
+    """Passwords and tokens never reach the fixture file; unrecorded requests fail."""
+    path = str(tmp_path / 'login.json.gz')
+    response = requests.Response()
+    response.status_code = 200
+    response.headers['Set-Cookie'] = 'session=secret-cookie'
+    response._content = b'{"login": {"result": "Success"}}'
+    fixtures = HttpFixtures(path, 'record')
+    fixtures.record('https://lv.wikipedia.org/w/api.php',
+                    {'action': 'login', 'lgname': 'Bots', 'lgpassword': 'hunter2', 'lgtoken': 'abc+\\'}, response)
+    fixtures.save()
+
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        stored = f.read()
+    assert 'hunter2' not in stored and 'secret-cookie' not in stored and 'abc+' not in stored
+
+    replay = HttpFixtures(path, 'replay')
+    replayed = replay.replay('https://lv.wikipedia.org/w/api.php',
+                             {'action': 'login', 'lgname': 'Bots', 'lgpassword': 'other', 'lgtoken': 'xyz'})
+    assert replayed.json() == {'login': {'result': 'Success'}}
+    with pytest.raises(requests.ConnectionError):
+        replay.replay('https://lv.wikipedia.org/w/api.php', {'action': 'logout'})
+    assert os.path.getsize(path) > 0
@@ -0,0 +1,57 @@
+"""Unit tests for incremental decoding of query responses."""
+
+import json
+from unittest.mock import MagicMock, patch
+from src.api_transport import ApiTransport
+from src.json_stream import iter_query_pages
+from src.mediawiki_client import MediaWikiClient
+
+
+def _chunks(payload, size):
+    raw = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    return [raw[i:i + size] for i in range(0, len(raw), size)]
+
+
+RESPONSE = {
+    'batchcomplete': True,
+    'continue': {'rvcontinue': '1|2', 'continue': '||'},
+    'query': {
+        'normalized': [{'from': 'rīga', 'to': 'Rīga'}],
+        'pages': [
+            {'title': 'Rīga', 'revisions': [{'slots': {'main': {'content': 'Rīga ir Latvijas galvaspilsēta. ' * 50}}}]},
+            {'title': 'Nav', 'missing': True},
+            {'title': 'Skaitlis', 'pageid': 1234567},
+        ],
+    },
+    'limits': {'revisions': 50},
+}
+
+
+def test_iter_query_pages_matches_full_decode():
+    """Pages and envelope match json.loads even with tiny, UTF-8-splitting chunks."""
+    envelope = {}
+    pages = list(iter_query_pages(_chunks(RESPONSE, 7), envelope))
+
+    assert pages == RESPONSE['query']['pages']
+    assert envelope['continue'] == RESPONSE['continue']
+    assert envelope['query']['normalized'] == RESPONSE['query']['normalized']
+    assert envelope['limits'] == {'revisions': 50}
+
+
+def test_get_pages_content_streaming_keeps_return_type():
+    """The streaming option returns the same title -> content mapping."""
+    client = MediaWikiClient(transport=ApiTransport(), stream_json=True)
+    response = MagicMock()
+    response.iter_content.return_value = _chunks({
+        'query': {'pages': [
+            {'title': 'Alpha', 'revisions': [{'slots': {'main': {'content': 'alpha content'}}}]},
+            {'title': 'Beta', 'missing': True},
+        ]}
+    }, 16)
+
+    with patch.object(client.transport, 'request', return_value=response) as mock_request:
+        result = client.get_pages_content(['Alpha', 'Beta'])
+
+    assert result == {'Alpha': 'alpha content', 'Beta': None}
+    assert mock_request.call_args[1]['stream'] is True
+    assert mock_request.call_args[1]['params']['formatversion'] == '2'
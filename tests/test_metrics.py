@@ -0,0 +1,107 @@
+"""Unit tests for run metrics and the run report."""
+
+import gzip
+import io
+import json
+from unittest.mock import patch
+import pytest
+import requests
+from urllib3 import HTTPResponse
+from src.api_transport import ApiTransport
+from src.mediawiki_client import MediaWikiClient
+from src.metrics import RunMetrics, get_metrics
+from src.template_parser import TemplateParser
+
+
+def test_counters_histograms_and_cache_ratio():
+    """Metrics with labels accumulate and cache hit ratios are derived per cache."""
+    metrics = RunMetrics()
+    metrics.inc('api_requests_total', host='lv', module='revisions')
+    metrics.inc('api_requests_total', host='lv', module='revisions')
+    metrics.observe('article_parse_seconds', 0.003)
+    metrics.observe('article_parse_seconds', 2.0)
+    metrics.cache_lookup('stage', True)
+    metrics.cache_lookup('stage', False)
+    metrics.cache_lookup('stage', True)
+
+    report = metrics.to_dict()
+
+    assert report['counters']['api_requests_total'] == [
+        {'labels': {'host': 'lv', 'module': 'revisions'}, 'value': 2.0}
+    ]
+    histogram = report['histograms']['article_parse_seconds'][0]['value']
+    assert histogram['count'] == 2
+    assert histogram['buckets']['0.005'] == 1
+    assert histogram['buckets']['5.0'] == 2
+    assert report['cache_hit_ratios'] == {'stage': 2 / 3}
+
+
+def test_prometheus_text_format(tmp_path):
+    """Counters, gauges and cumulative histogram buckets are written in exposition format."""
+    metrics = RunMetrics()
+    metrics.inc('api_requests_total', host='lv"wiki')
+    metrics.set('stage_wall_seconds', 1.5, stage='articles')
+    metrics.observe('article_parse_seconds', 0.02)
+
+    path = tmp_path / 'metrics.prom'
+    assert metrics.write_prometheus(str(path))
+    text = path.read_text()
+
+    assert '# TYPE cee_spring_api_requests_total counter' in text
+    assert 'cee_spring_api_requests_total{host="lv\\"wiki"} 1' in text
+    assert 'cee_spring_stage_wall_seconds{stage="articles"} 1.5' in text
+    assert 'cee_spring_article_parse_seconds_bucket{le="0.01"} 0' in text
+    assert 'cee_spring_article_parse_seconds_bucket{le="+Inf"} 1' in text
+    assert 'cee_spring_article_parse_seconds_count 1' in text
+
+
+def test_transport_and_parser_are_instrumented(tmp_path):
+    """API requests are counted per endpoint and module; parses land in a histogram."""
+    metrics = get_metrics()
+    metrics.reset()
+    transport = ApiTransport(rate_limit=1000)
+
+    with patch.object(transport.session, 'get') as mock_get:
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = b'{"query": {}}'
+        transport.request('https://lv.wikipedia.org/w/api.php',
+                          params={'action': 'query', 'prop': 'revisions', 'titles': 'A'})
+    TemplateParser().build_article_data('A', {'participant': 'U', 'topics': [], 'countries': []}, 'Teksts', {})
+
+    path = tmp_path / 'run_report.json'
+    assert metrics.write_json(str(path), success=True)
+    report = json.loads(path.read_text())
+
+    assert report['success'] is True
+    assert report['counters']['api_requests_total'] == [{
+        'labels': {'action': 'query', 'host': 'lv.wikipedia.org', 'module': 'revisions'}, 'value': 1.0
+    }]
+    assert report['counters']['api_response_bytes_total'][0]['value'] == 13
+    assert report['histograms']['article_parse_seconds'][0]['value']['count'] == 1
+
+
+def _gzip_response(body):
+    response = requests.Response()
+    response.status_code = 200
+    response.headers['Content-Encoding'] = 'gzip'
+    response.raw = HTTPResponse(body=io.BytesIO(gzip.compress(body)), headers={'Content-Encoding': 'gzip'},
+                                status=200, preload_content=False, decode_content=True)
+    return response
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_response_bytes_count_compressed_body(stream):
+    """The byte counter measures what was transferred, not the decoded body."""
+    metrics = get_metrics()
+    metrics.reset()
+    body = json.dumps({'query': {'pages': [{'title': 'A', 'missing': True}] * 200}}).encode()
+    client = MediaWikiClient(transport=ApiTransport(rate_limit=1000), stream_json=stream)
+
+    with patch.object(client.transport.session, 'get', return_value=_gzip_response(body)):
+        if stream:
+            list(client._iter_streamed_pages({'action': 'query', 'titles': 'A'}))
+        else:
+            client._make_request({'action': 'query', 'titles': 'A'})
+
+    counted = metrics.to_dict()['counters']['api_response_bytes_total'][0]['value']
+    assert counted == len(gzip.compress(body)) < len(body)
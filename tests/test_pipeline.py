@@ -0,0 +1,70 @@
+"""Unit tests for the stage-graph pipeline runner."""
+
+import threading
+import pytest
+from src.pipeline import PipelineRunner, Stage, StageFailed
+
+
+def test_independent_stages_run_concurrently(tmp_path):
+    """Stages without a dependency between them overlap in time."""
+    barrier = threading.Barrier(2, timeout=5)
+
+    def wait_for_other():
+        barrier.wait()  # only passes if both stages are running at once
+        return [1]
+
+    stages = [
+        Stage('a', wait_for_other, output_type=list),
+        Stage('b', wait_for_other, output_type=list),
+        Stage('c', lambda a, b: a + b, inputs=['a', 'b'], output_type=list),
+    ]
+    results = PipelineRunner(stages, cache_dir=str(tmp_path)).run()
+
+    assert results['c'] == [1, 1]
+
+
+def test_cacheable_stage_skipped_when_inputs_unchanged(tmp_path):
+    """A cacheable stage reuses its output while its inputs fingerprint the same."""
+    calls = []
+
+    def count(names):
+        calls.append(names)
+        return {n: len(n) for n in names}
+
+    def build(names):
+        return [
+            Stage('names', lambda: names, output_type=list),
+            Stage('counts', count, inputs=['names'], output_type=dict, cacheable=True),
+        ]
+
+    first = PipelineRunner(build(['Anna', 'Jānis']), cache_dir=str(tmp_path))
+    first.run()
+    second = PipelineRunner(build(['Anna', 'Jānis']), cache_dir=str(tmp_path))
+    assert second.run()['counts'] == {'Anna': 4, 'Jānis': 5}
+    assert second.timings['counts']['cached'] is True
+
+    PipelineRunner(build(['Anna']), cache_dir=str(tmp_path)).run()
+    assert calls == [['Anna', 'Jānis'], ['Anna']]
+
+
+def test_failed_stage_stops_dependents(tmp_path):
+    """A failing stage raises StageFailed and its dependents never run."""
+    def fail():
+        raise StageFailed("No articles found")
+
+    ran = []
+    stages = [
+        Stage('articles', fail, output_type=list),
+        Stage('reports', lambda articles: ran.append(True) or True, inputs=['articles'], output_type=bool),
+    ]
+
+    with pytest.raises(StageFailed, match="No articles found"):
+        PipelineRunner(stages, cache_dir=str(tmp_path)).run()
+    assert not ran
+
+
+def test_output_type_is_checked(tmp_path):
+    """A stage returning the wrong type fails loudly."""
+    stages = [Stage('counts', lambda: [], output_type=dict)]
+    with pytest.raises(StageFailed, match="expected dict"):
+        PipelineRunner(stages, cache_dir=str(tmp_path)).run()
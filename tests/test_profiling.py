@@ -0,0 +1,79 @@
+"""Unit tests for per-stage profiling."""
+
+import cProfile
+import pstats
+import tracemalloc
+import pytest
+from src.pipeline import PipelineRunner, Stage
+from src.profiling import MemoryProfiler, collapse_stacks
+
+
+def _leaf(n):
+    return sum(i * i for i in range(n))
+
+
+def _parent():
+    return _leaf(20000) + _leaf(20000)
+
+
+def test_collapsed_stacks_follow_call_graph():
+    """Self time of a callee appears under the stack of its caller."""
+    profiler = cProfile.Profile()
+    profiler.runcall(_parent)
+
+    stacks = collapse_stacks(pstats.Stats(profiler))
+
+    leaf_stacks = [s for s in stacks if s.split(';')[-1].startswith('<genexpr>')]
+    assert leaf_stacks
+    assert all(s.startswith('_parent (test_profiling.py:') for s in leaf_stacks)
+    assert all(';_leaf (test_profiling.py:' in s for s in leaf_stacks)
+    assert all(micros > 0 for micros in stacks.values())
+
+
+def test_runner_writes_profile_per_stage(tmp_path):
+    """Each stage that runs gets its own .pstats and .collapsed file."""
+    stages = [
+        Stage('first', lambda: _leaf(1000), output_type=int),
+        Stage('second', lambda first: first + 1, inputs=['first'], output_type=int),
+    ]
+    runner = PipelineRunner(stages, use_cache=False, profile_dir=str(tmp_path))
+
+    results = runner.run()
+
+    assert results['second'] == results['first'] + 1
+    for name in ('first', 'second'):
+        assert pstats.Stats(str(tmp_path / f'{name}.pstats')).total_calls > 0
+        assert (tmp_path / f'{name}.collapsed').exists()
+
+
+@pytest.mark.parametrize('can_reset_peak', [True, False])
+def test_runner_records_memory_per_stage(monkeypatch, can_reset_peak):
+    """Peak covers temporary allocations, retained memory what a stage keeps."""
+    if not can_reset_peak:  # as on Python 3.8
+        monkeypatch.delattr(tracemalloc, 'reset_peak', raising=False)
+    profiler = MemoryProfiler(top_sites=3)
+
+    def build():
+        temporary = [bytes(1000) for _ in range(2000)]  # about 2 MB, freed on return
+        profiler.mark('temporary')
+        del temporary
+        return [str(i) * 50 for i in range(5000)]  # about 1 MB, kept as the output
+
+    stages = [
+        Stage('build', build, output_type=list),
+        Stage('count', lambda build: len(build), inputs=['build'], output_type=int),
+    ]
+    profiler.start()
+    try:
+        PipelineRunner(stages, use_cache=False, memory_profiler=profiler).run()
+    finally:
+        profiler.stop()
+
+    built = profiler.records['build']
+    assert built['peak_bytes'] > built['retained_bytes'] + 500_000
+    assert built['retained_increase_bytes'] > 250_000
+    assert profiler.records['build:temporary']['retained_bytes'] > 1_500_000
+    assert len(built['top_sites']) == 3
+    assert built['top_sites'][0]['site'].startswith('tests/test_profiling.py:')
+    assert abs(profiler.records['count']['retained_increase_bytes']) < 100_000
+    assert 'Largest allocations alive after build:' in profiler.report()
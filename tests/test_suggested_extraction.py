@@ -0,0 +1,26 @@
+"""Unit tests for extracting suggested Wikidata IDs from structure pages."""
+
+from src.suggested_articles import SuggestedArticlesCollector, iter_wikidata_ids
+
+
+def test_extracts_rows_with_comments_and_notes():
+    """Rows may carry comments or notes; other parameters and text outside tables are ignored."""
+    content = (
+        "Ievads ar Q999 ārpus tabulas.\n"
+        "{{#invoke:WikimediaCEETable|table\n"
+        "|Q1<!--RO-->\n|<!--MD--> Q2 \n| Q3 (RO)\n|Q4x\n|title=Q5\n|Q6}}\n"
+        "{{#Invoke:UCDMtable|table|Q7|Q8}}"
+    )
+    assert list(iter_wikidata_ids(content)) == ['Q1', 'Q2', 'Q3', 'Q6', 'Q7', 'Q8']
+
+
+def test_nested_templates_do_not_end_the_table():
+    """Braces are matched, so rows after a nested template are still found."""
+    content = (
+        "{{#invoke:WikimediaCEETable|table\n"
+        "|caption={{lang|ro|Q10}} {{small|{{nowrap|Q11}}}}\n"
+        "|Q12\n<!-- }} | Q13 -->\n|Q14\n}}"
+    )
+    collector = SuggestedArticlesCollector()
+    assert collector.extract_wikidata_ids_from_content(content) == {'Q12', 'Q14'}
+    assert collector.extract_wikidata_ids_from_content("{{#invoke:WikimediaCEETable|table|Q1") == set()
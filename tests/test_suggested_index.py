@@ -0,0 +1,44 @@
+"""Unit tests for the compact suggested Wikidata ID index."""
+
+import pickle
+import pytest
+from src.suggested_index import SuggestedIndex, qid_number
+
+SUGGESTED = {
+    'Polija': {'Q42', 'Q7', 'Q100000'},
+    'Igaunija': {'Q7', 'Q191'},
+    'Malta': {'Q5', 'not-an-id'},
+}
+
+
+def test_lookup_single_and_batch():
+    """Single and batch lookups agree and return the suggesting countries in name order."""
+    index = SuggestedIndex.from_countries(SUGGESTED)
+
+    assert list(index.ids) == [5, 7, 42, 191, 100000]
+    assert 'Q7' in index and 'Q8' not in index and None not in index
+    assert index.countries_for('Q7') == ['Igaunija', 'Polija']
+    assert index.countries_for('Q99') == []
+
+    batch = ['Q100000', None, 'Q5', 'Q6', 'Q42', 'Q42', 'bad', 'Q999999']
+    assert index.contains_many(batch) == [qid in index for qid in batch]
+    positions = index.positions(batch)
+    assert [index.countries_at(p) for p in positions] == [index.countries_for(qid) for qid in batch]
+    assert qid_number('Q191') == 191 and qid_number('Q') is None
+
+
+def test_round_trip_through_bytes_file_and_pickle(tmp_path):
+    """The index survives saving, loading and pickling unchanged."""
+    index = SuggestedIndex.from_countries(SUGGESTED)
+    expected = {country: {q for q in ids if q.startswith('Q')} for country, ids in SUGGESTED.items()}
+
+    path = str(tmp_path / 'suggested.idx')
+    index.save(path)
+    for loaded in (SuggestedIndex.load(path), pickle.loads(pickle.dumps(index))):
+        assert loaded.by_country() == expected
+        assert loaded.countries_for('Q7') == ['Igaunija', 'Polija']
+
+    empty = SuggestedIndex.from_bytes(SuggestedIndex().to_bytes())
+    assert len(empty) == 0 and empty.contains_many(['Q1']) == [False]
+    with pytest.raises(ValueError):
+        SuggestedIndex.from_bytes(index.to_bytes()[:-3])
@@ -5,6 +5,7 @@ import os
 import sys
 from cee_spring_stats import CEESpringStats
 from src.config import CONTEST_TEMPLATE
+from src.suggested_index import SuggestedIndex
 
 def test_suggested_integration():
     """Test the suggested articles integration with a small sample."""
@@ -18,12 +19,12 @@ def test_suggested_integration():
     # Test suggested articles collection
     print("1. Testing suggested articles collection...")
     try:
-        suggested_ids = stats.suggested_collector.collect_all_suggested_articles()
-        print(f"✅ Found {len(suggested_ids)} suggested Wikidata IDs")
+        suggested = SuggestedIndex.from_countries(stats.suggested_collector.collect_all_suggested_wikidata_ids())
+        print(f"✅ Found {len(suggested)} suggested Wikidata IDs")
 
         # Show a few examples
-        if suggested_ids:
-            sample_ids = list(suggested_ids)[:5]
+        if suggested:
+            sample_ids = sorted(set().union(*suggested.by_country().values()))[:5]
             print(f"   Sample IDs: {', '.join(sample_ids)}")
 
     except Exception as e:
@@ -44,24 +45,32 @@ def test_suggested_integration():
         print(f"   Processing {len(test_articles)} test articles...")
 
         page_info = stats.client.get_page_info(test_articles)
+        talk_contents = stats.client.get_pages_content(test_articles, namespace=1)
+        article_contents = stats.client.get_pages_content(test_articles, namespace=0)
 
-        processed_count = 0
-        suggested_count = 0
-
+        processed = []
         for title in test_articles:
             try:
-                article_data = stats._process_single_article(title, page_info.get(title, {}))
+                article_data = stats._process_single_article(
+                    title, page_info.get(title, {}),
+                    talk_contents.get(title), article_contents.get(title),
+                )
                 if article_data:
-                    processed_count += 1
-                    is_suggested = article_data.get('from_suggested_list', False)
-                    if is_suggested:
-                        suggested_count += 1
-
-                    print(f"   ✓ {title}: Suggested={is_suggested}, Wikidata={article_data.get('wikidata_id', 'None')}")
-
+                    processed.append(article_data)
             except Exception as e:
                 print(f"   ❌ Error processing {title}: {e}")
 
+        # Mark suggested articles the way the pipeline's enrich stage does
+        enriched = stats._stage_enrich(processed, suggested, edit_counts={}, claims={}, wikidata_ids={})
+        processed_count = len(enriched)
+        suggested_count = 0
+        for article_data in enriched:
+            is_suggested = article_data.get('from_suggested_list', False)
+            if is_suggested:
+                suggested_count += 1
+            print(f"   ✓ {article_data['title']}: Suggested={is_suggested}, "
+                  f"Wikidata={article_data.get('wikidata_id', 'None')}")
+
         print(f"✅ Processed {processed_count} articles, {suggested_count} from suggested lists")
 
     except Exception as e:
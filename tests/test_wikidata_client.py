@@ -0,0 +1,200 @@
+"""Unit tests for batched Wikidata lookups and the reports built on them."""
+
+from cee_spring_stats import CEESpringStats
+from src.api_transport import ApiTransport
+from src.report_generator import ReportGenerator
+from src.suggested_index import SuggestedIndex
+from src.wikidata_client import WikidataClient, is_woman
+from tests.fake_mediawiki import FakeMediaWikiServer, SyntheticContest, offline_stats
+
+
+def _wbgetentities_calls(server):
+    return [r for r in server.api.requests if r.get('action') == 'wbgetentities']
+
+
+def test_resolve_sitelinks_batches_and_caches(tmp_path):
+    """Items are fetched 50 at a time; only items without an article are checked again."""
+    contest = SyntheticContest(n_articles=100)
+    suggested = set().union(*contest.suggested_ids().values())
+    open_ids = {qid for qid in suggested if not contest.item(qid)['sitelink']}
+    with FakeMediaWikiServer(contest) as server:
+        client = WikidataClient(ApiTransport(rate_limit=1000, rate_mode='fixed'), api_url=server.url,
+                                sitelinks_cache_file=str(tmp_path / 'sitelinks.json'))
+        first = client.resolve_sitelinks(suggested)
+        calls = _wbgetentities_calls(server)
+        assert len(calls) == -(-len(suggested) // 50)
+        assert all(len(call['ids'].split('|')) <= 50 for call in calls)
+
+        server.api.requests.clear()
+        newly_written = sorted(open_ids)[0]
+        server.api.set_sitelink(newly_written, 'Jauns raksts')
+        second = client.resolve_sitelinks(suggested)
+        refetched = {qid for call in _wbgetentities_calls(server) for qid in call['ids'].split('|')}
+
+    assert {qid for qid, item in first.items() if not item['sitelink']} == open_ids
+    assert first['Q100000']['sitelink'] == contest.titles[0]
+    assert refetched == open_ids
+    assert second[newly_written]['sitelink'] == 'Jauns raksts'
+    assert second[newly_written]['revid'] != first[newly_written]['revid']
+
+
+def test_coverage_report_lists_open_items_per_country():
+    """Written items are counted, open ones listed with labels, deleted ones noted."""
+    items = {
+        'Q1': {'revid': 1, 'sitelink': 'Rīga', 'label': 'Rīga', 'missing': False},
+        'Q20': {'revid': 2, 'sitelink': None, 'label': 'Tartu', 'missing': False},
+        'Q3': {'revid': 3, 'sitelink': None, 'label': None, 'missing': False},
+        'Q4': {'revid': None, 'sitelink': None, 'label': None, 'missing': True},
+    }
+    report = ReportGenerator().generate_suggested_coverage_report(
+        {'Igaunija': {'Q20', 'Q3', 'Q4'}, 'Latvija': {'Q1'}}, items)
+
+    assert "Ieteikti 4 Vikidatu elementi, no tiem 1 (25.0%)" in report
+    assert "vēl jāuzraksta 2." in report
+    assert "=== Igaunija (0/3 uzrakstīti) ===\nVēl jāuzraksta:\n* [[d:Q3|Q3]]\n* [[d:Q20|Tartu]] (Q20)\n" in report
+    assert "=== Latvija (1/1 uzrakstīti) ===\n''Visi ieteiktie raksti ir uzrakstīti.''" in report
+    assert "1 ieteiktie elementi Vikidatos ir dzēsti" in report
+
+
+def test_reports_stage_takes_suggested_lists_as_input(tmp_path):
+    """The coverage report is built from the stage input, not state left by the suggested stage."""
+    stats = CEESpringStats()
+    stats.output_file = str(tmp_path / 'results.txt')
+    stats.report_dir = str(tmp_path)
+    article = {'title': 'Rīga', 'participant': 'Anna', 'topics': ['Vēsture'], 'countries': ['Latvija'],
+               'readable_length': 1000, 'wikidata_id': 'Q1'}
+    items = {'Q1': {'revid': 1, 'sitelink': 'Rīga', 'label': 'Rīga', 'missing': False},
+             'Q20': {'revid': 2, 'sitelink': None, 'label': 'Tartu', 'missing': False}}
+
+    assert stats._stage_reports(([article], [], []), SuggestedIndex.from_countries({'Igaunija': {'Q20'},
+                                                                                      'Latvija': {'Q1'}}), items)
+
+    report = (tmp_path / 'suggested_coverage.txt').read_text(encoding='utf-8')
+    assert "=== Igaunija (0/1 uzrakstīti) ===" in report
+    assert "=== Latvija (1/1 uzrakstīti) ===" in report
+
+
+def test_resolve_claims_reuses_classified_items(tmp_path):
+    """Claims come 50 items per request; only unclassified items are fetched again."""
+    contest = SyntheticContest(n_articles=120)
+    qids = [contest.article(i)['wikidata_id'] for i in range(contest.n_articles)]
+    unclassified = {qid for qid in qids if not contest.item(qid)['instance_of']}
+    with FakeMediaWikiServer(contest) as server:
+        client = WikidataClient(ApiTransport(rate_limit=1000, rate_mode='fixed'), api_url=server.url,
+                                claims_cache_file=str(tmp_path / 'claims.json'))
+        first = client.resolve_claims(qids)
+        assert len(_wbgetentities_calls(server)) == 3
+
+        server.api.requests.clear()
+        classified = sorted(unclassified)[0]
+        server.api.set_claims(classified, ['Q5'], ['Q6581072'])
+        second = client.resolve_claims(qids)
+        refetched = {qid for call in _wbgetentities_calls(server) for qid in call['ids'].split('|')}
+
+    assert unclassified and refetched == unclassified
+    assert is_woman(first[classified]) is None and is_woman(second[classified]) is True
+    for i, qid in enumerate(qids):
+        item = contest.item(qid)
+        assert first[qid]['instance_of'] == item['instance_of'] and first[qid]['sex'] == item['sex']
+        if 'Sievietes' not in contest.article(i)['topics'] and item['instance_of']:
+            assert is_woman(first[qid]) is False
+    assert is_woman({'revid': 1, 'instance_of': ['Q5'], 'sex': [], 'missing': False}) is None
+    assert is_woman(None) is None
+
+
+def test_review_report_cross_checks_women_topic():
+    """Articles whose women topic disagrees with Wikidata are listed for the jury, not on the results page."""
+    def article(title, topics, is_woman_biography):
+        return {'title': title, 'participant': 'Anna', 'topics': topics, 'readable_length': 2000,
+                'eligible_for_contest': True, 'is_woman_biography': is_woman_biography,
+                'wikidata_id': f"Q{len(title)}"}
+
+    articles = [
+        article('Marija', ['Sievietes'], True),
+        article('Tilts', ['Sievietes'], False),
+        article('Ieva', ['Vēsture'], True),
+        article('Pēteris', ['Vēsture'], False),
+        article('Jaunā', ['Sievietes'], None),
+    ]
+    reporter = ReportGenerator()
+    review = reporter.generate_review_report(articles)
+    categories = reporter.generate_contest_categories_report(articles)
+
+    assert "NOT A WOMAN'S BIOGRAPHY ON WIKIDATA:\n  🔍 Tilts (Anna, Q5)\n" in review
+    assert "WITHOUT TOPIC 'Sievietes':\n  🔍 Ieva (Anna, Q4)\n" in review
+    assert "Marija" not in review and "Jaunā" not in review
+    assert "# {{U|Anna}} - 3 raksti" in categories
+    assert "Tilts" not in categories and "Vikidat" not in categories
+    assert reporter.generate_review_report(articles[:1]) == ""
+
+
+def test_resolve_titles_caches_found_items_until_linked(tmp_path):
+    """Titles are looked up 50 per request; found items are cached while the article stays unlinked."""
+    contest = SyntheticContest(n_articles=80)
+    titles = contest.titles[:60] + ['Nav tāda raksta']
+    with FakeMediaWikiServer(contest) as server:
+        client = WikidataClient(ApiTransport(rate_limit=1000, rate_mode='fixed'), api_url=server.url,
+                                titles_cache_file=str(tmp_path / 'titles.json'))
+        first = client.resolve_titles(titles)
+        assert len(_wbgetentities_calls(server)) == 2
+
+        server.api.requests.clear()
+        server.api.set_sitelink('Q42', 'Nav tāda raksta')
+        second = client.resolve_titles(titles[50:])
+        calls = _wbgetentities_calls(server)
+
+    assert first == {title: f"Q{100000 + i}" for i, title in enumerate(contest.titles[:60])}
+    assert [call['titles'] for call in calls] == ['Nav tāda raksta']
+    assert second['Nav tāda raksta'] == 'Q42' and len(second) == 11
+    # Titles no longer asked about (their articles got linked) are dropped from the cache
+    assert set(client.titles_cache.items) == set(titles[50:])
+
+
+def test_unlinked_articles_matched_to_suggested_items(tmp_path):
+    """Articles found by sitelink count as suggested; label matches are only listed for the jury."""
+    contest = SyntheticContest(n_articles=60)
+    suggested = [i for i in range(contest.n_articles) if contest.article(i)['suggested']]
+    unlinked = [contest.titles[i] for i in suggested[:3]]
+    with FakeMediaWikiServer(contest) as server:
+        server.api.unlinked.update(unlinked)
+        stats = offline_stats(server.url, str(tmp_path))
+        assert stats.run(use_cache=False, save_cache=False)
+        results = (tmp_path / 'results.txt').read_text(encoding='utf-8')
+
+        def item(label, language='lv'):
+            return {'revid': 1, 'sitelink': None, 'label': label, 'label_language': language, 'missing': False}
+
+        coverage = {'Q7': item('salaspils'), 'Q8': item('Tērvete'), 'Q9': item('Tērvete'), 'Q10': item('Ogre', 'en')}
+        articles = [{'title': title, 'wikidata_id': None, 'participant': 'Anna'}
+                    for title in ('Salaspils', 'Tērvete', 'Ogre', 'Salaspils (pilsēta)')]
+        found = stats._stage_wikidata_ids(articles + [{'title': contest.titles[0], 'wikidata_id': 'Q100000'}],
+                                          coverage)
+
+    for i in suggested[:3]:
+        row = next(line for line in results.splitlines() if line.startswith(f"| [[{contest.titles[i]}]]"))
+        assert f"[[d:Q{100000 + i}|" in row and "/Structure/" in row
+    # Only lv labels match, ambiguous labels match nothing; linked articles are not looked up
+    assert found == {'Salaspils': {'id': 'Q7', 'source': 'label'}}
+
+    enriched = stats._stage_enrich(articles[:1], SuggestedIndex.from_countries({'Polija': {'Q7'}}), {}, {}, found)[0]
+    assert enriched['wikidata_id'] is None and enriched['wikidata_id_source'] == 'label'
+    assert enriched['from_suggested_list'] is False and enriched['label_match_countries'] == ['Polija']
+    reporter = ReportGenerator()
+    assert "[[d:" not in reporter.generate_wikitext_table([enriched])
+    assert "  🔍 Salaspils (Anna, Q7: Polija)" in reporter.generate_review_report([enriched])
+
+
+def test_wikidata_caches_used_without_articles_cache(tmp_path):
+    """--no-cache runs (as the nightly job makes) still reuse the Wikidata caches."""
+    contest = SyntheticContest(n_articles=60)
+    suggested = set().union(*contest.suggested_ids().values())
+    articles = {contest.article(i)['wikidata_id'] for i in range(contest.n_articles)}
+    expected = ({qid for qid in suggested if not contest.item(qid)['sitelink']}
+                | {qid for qid in articles if not contest.item(qid)['instance_of']})
+    with FakeMediaWikiServer(contest) as server:
+        assert offline_stats(server.url, str(tmp_path)).run(use_cache=False, save_cache=False)
+        server.api.requests.clear()
+        assert offline_stats(server.url, str(tmp_path)).run(use_cache=False, save_cache=False)
+        refetched = {qid for call in _wbgetentities_calls(server) for qid in call['ids'].split('|')}
+
+    assert refetched == expected
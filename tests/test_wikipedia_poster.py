@@ -0,0 +1,148 @@
+"""Unit tests for WikipediaPoster marker editing."""
+
+from unittest.mock import MagicMock, patch
+from src.api_transport import ApiTransport
+from src.wikipedia_poster import WikipediaPoster, content_hash, locate_marker_section
+
+
+PAGE = "Intro\n<!-- BEGIN -->\nold stats\n<!-- END -->\nFooter"
+
+
+def _poster(**kwargs):
+    return WikipediaPoster(transport=ApiTransport(), **kwargs)
+
+
+def _response(payload):
+    response = MagicMock()
+    response.json.return_value = payload
+    return response
+
+
+REVISION = {'content': PAGE, 'revid': 100, 'timestamp': '2026-04-01T00:00:00Z',
+            'starttimestamp': '2026-04-02T00:00:00Z'}
+
+
+def test_content_hash_ignores_surrounding_whitespace():
+    """Hashes match regardless of leading/trailing whitespace."""
+    assert content_hash("\nstats\n") == content_hash("stats")
+    assert content_hash("stats") != content_hash("other stats")
+
+
+def test_update_skips_unchanged_content():
+    """Unchanged block returns early without touching token or edit endpoints."""
+    poster = _poster()
+    poster.logged_in = True
+
+    with patch.object(poster, 'get_page_revision', return_value=REVISION), \
+            patch.object(poster, '_get_csrf_token') as mock_token, \
+            patch.object(poster.transport, 'request') as mock_request:
+        result = poster.update_between_markers(
+            "Test", "old stats\n", "<!-- BEGIN -->", "<!-- END -->"
+        )
+
+    assert result is True
+    mock_token.assert_not_called()
+    mock_request.assert_not_called()
+
+
+def test_update_posts_changed_content():
+    """Changed block is spliced between the markers and posted."""
+    poster = _poster()
+    poster.logged_in = True
+
+    with patch.object(poster, 'get_page_revision', return_value=REVISION), \
+            patch.object(poster, '_get_csrf_token', return_value='token+\\'), \
+            patch.object(poster.transport, 'request') as mock_post:
+        mock_post.return_value = _response({'edit': {'result': 'Success', 'newrevid': 42}})
+        result = poster.update_between_markers(
+            "Test", "new stats", "<!-- BEGIN -->", "<!-- END -->"
+        )
+
+    assert result is True
+    edit_data = mock_post.call_args[1]['data']
+    assert edit_data['text'] == "Intro\n<!-- BEGIN -->\nnew stats\n<!-- END -->\nFooter"
+    assert edit_data['section'] == '0'
+    assert edit_data['baserevid'] == '100'
+    assert edit_data['starttimestamp'] == '2026-04-02T00:00:00Z'
+
+
+def test_locate_marker_section_includes_subsections():
+    """The innermost section around the markers is found with MediaWiki numbering."""
+    text = ("Lead\n== Stats ==\nIntro\n=== Table ===\n<!-- BEGIN -->\nx\n<!-- END -->\n"
+            "=== Notes ===\ny\n== Discussion ==\nz\n")
+    index, start, end = locate_marker_section(text, "<!-- BEGIN -->", "<!-- END -->")
+    assert index == 2
+    assert text[start:end] == "=== Table ===\n<!-- BEGIN -->\nx\n<!-- END -->\n"
+
+    spanning = "== A ==\n<!-- BEGIN -->\n=== B ===\n<!-- END -->\n== C ==\n"
+    index, start, end = locate_marker_section(spanning, "<!-- BEGIN -->", "<!-- END -->")
+    assert index == 1
+    assert spanning[start:end] == "== A ==\n<!-- BEGIN -->\n=== B ===\n<!-- END -->\n"
+
+
+def test_update_submits_only_marker_section_and_reports_conflict():
+    """Only the marker section is posted; an edit conflict is not overwritten."""
+    page = "Lead\n== Stats ==\n<!-- BEGIN -->\nold\n<!-- END -->\n== Discussion ==\nLong talk\n"
+    poster = _poster()
+    poster.logged_in = True
+
+    with patch.object(poster, 'get_page_revision', return_value={**REVISION, 'content': page}), \
+            patch.object(poster, '_get_csrf_token', return_value='token+\\'), \
+            patch.object(poster.transport, 'request') as mock_post:
+        mock_post.return_value = _response({'error': {'code': 'editconflict'}})
+        result = poster.update_between_markers(
+            "Test", "new", "<!-- BEGIN -->", "<!-- END -->"
+        )
+
+    assert result is False
+    edit_data = mock_post.call_args[1]['data']
+    assert edit_data['section'] == '1'
+    assert edit_data['text'] == "== Stats ==\n<!-- BEGIN -->\nnew\n<!-- END -->\n"
+
+
+def _prefetch_response(user_id, name, pages=()):
+    return {
+        'query': {
+            'tokens': {'csrftoken': 'csrf+\\', 'logintoken': 'login+\\'},
+            'userinfo': {'id': user_id, 'name': name} if user_id else {'id': 0, 'name': name, 'anon': True},
+            'pages': [
+                {'title': t, 'revisions': [{'revid': 1, 'slots': {'main': {'content': c}}}]}
+                for t, c in pages
+            ],
+        }
+    }
+
+
+def test_login_reuses_saved_session(tmp_path):
+    """A still-valid saved session needs one combined query and no login POST."""
+    session_file = tmp_path / 'session.json'
+    session_file.write_text('[{"name": "lvwikiSession", "value": "abc", "domain": ".wikipedia.org"}]')
+    poster = _poster(session_file=str(session_file))
+
+    with patch.object(poster.transport, 'request') as mock_request:
+        mock_request.return_value = _response(_prefetch_response(7, 'Bot', [('Stats', PAGE)]))
+        assert poster.login('Bot@stats', 'secret', prefetch_titles=['Stats']) is True
+
+    assert mock_request.call_count == 1
+    assert 'data' not in mock_request.call_args[1]
+    assert poster.csrf_token == 'csrf+\\'
+    assert poster.get_page_content('Stats') == PAGE
+
+
+def test_fresh_login_saves_session_with_restricted_permissions(tmp_path):
+    """After a password login the cookies are written to a 0600 file."""
+    session_file = tmp_path / 'session.json'
+    poster = _poster(session_file=str(session_file))
+    poster.session.cookies.set('lvwikiSession', 'abc', domain='.wikipedia.org')
+
+    with patch.object(poster.transport, 'request') as mock_request:
+        mock_request.side_effect = [
+            _response({'query': {'tokens': {'logintoken': 'login+\\'}}}),
+            _response({'login': {'result': 'Success', 'lgusername': 'Bot'}}),
+            _response(_prefetch_response(7, 'Bot')),
+        ]
+        assert poster.login('Bot@stats', 'secret') is True
+
+    assert session_file.exists()
+    assert (session_file.stat().st_mode & 0o777) == 0o600
+    assert poster.csrf_token == 'csrf+\\'